@@ -0,0 +1,128 @@
+"""Время выбора хендлера для нажатия кнопки: цепочка фильтров против таблицы действий.
+
+"filters" воспроизводит прежнюю схему: роутеры common, admin и user,
+в админском — хендлеры с F.data == "admin_..." и
+F.data.startswith("admin_..._") в исходном порядке. "table" — настоящие
+роутеры бота, где кнопки админ-панели выбираются одним поиском
+в CallbackActionTable. Хендлеры не вызываются: inner-middleware
+завершает обработку сразу после выбора хендлера, поэтому в замер
+входят только разбор обновления и маршрутизация.
+
+Запуск из корня репозитория:
+    python -m benchmarks.callback_routing --rounds 2000
+"""
+import argparse
+import asyncio
+import time
+
+from aiogram import Bot, Dispatcher, F, Router
+from aiogram.types import Update
+
+from bot.handlers import admin_handlers, common_handlers, user_handlers
+from bot.handlers.admin_handlers import admin_actions
+from bot.keyboards.callback_data import admin_cb
+
+
+TOKEN = "42:BENCHMARK"
+
+# Действия админ-панели без аргумента: в прежней схеме F.data == ...
+PLAIN_ACTIONS = {"panel", "pin_subscribe", "applications", "stats", "messages", "questions"}
+COMMON_DATA = ["faq", "main_menu"]
+USER_DATA = ["fill_form", "application_filled", "user_question"]
+
+
+def _make_update(update_id: int, data: str) -> Update:
+    return Update.model_validate({
+        "update_id": update_id,
+        "callback_query": {
+            "id": str(update_id),
+            "from": {"id": 1, "is_bot": False, "first_name": "Бенчмарк"},
+            "chat_instance": "x",
+            "data": data,
+        },
+    })
+
+
+async def _resolved(handler, event, data):
+    """Хендлер выбран — дальше не идём"""
+    return data["handler"]
+
+
+def _filters_dispatcher() -> Dispatcher:
+    """Прежняя схема: по хендлеру на каждую кнопку"""
+    async def _handler(callback):
+        pass
+
+    routers = []
+    for values in (COMMON_DATA, None, USER_DATA):
+        router = Router()
+        if values is None:
+            for action in admin_actions._actions:
+                if action in PLAIN_ACTIONS:
+                    router.callback_query.register(_handler, F.data == f"admin_{action}")
+                else:
+                    router.callback_query.register(_handler, F.data.startswith(f"admin_{action}_"))
+        else:
+            for value in values:
+                router.callback_query.register(_handler, F.data == value)
+        routers.append(router)
+
+    dp = Dispatcher()
+    dp.callback_query.middleware(_resolved)
+    dp.include_routers(*routers)
+    return dp
+
+
+def _table_dispatcher() -> Dispatcher:
+    dp = Dispatcher()
+    dp.callback_query.middleware(_resolved)
+    dp.include_routers(common_handlers.router, admin_handlers.router, user_handlers.router)
+    return dp
+
+
+def _workload(packed: bool) -> dict:
+    """callback_data по группам кнопок"""
+    admin = [
+        (admin_cb(action) if packed else f"admin_{action}") if action in PLAIN_ACTIONS
+        else (admin_cb(action, 10) if packed else f"admin_{action}_10")
+        for action in admin_actions._actions
+    ]
+    return {"admin": admin, "common": COMMON_DATA, "user": USER_DATA}
+
+
+async def bench(dp: Dispatcher, workload: dict, rounds: int) -> dict:
+    bot = Bot(TOKEN)
+    results = {}
+    for group, values in workload.items():
+        updates = [_make_update(index, value) for index, value in enumerate(values)]
+        # Прогрев кэшей фильтров и pydantic
+        for update in updates:
+            assert await dp.feed_update(bot, update) is not None, update.callback_query.data
+
+        started = time.perf_counter()
+        for _ in range(rounds):
+            for update in updates:
+                await dp.feed_update(bot, update)
+        elapsed = time.perf_counter() - started
+        results[group] = elapsed / (rounds * len(updates))
+    return results
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--rounds", type=int, default=2000)
+    args = parser.parse_args()
+
+    results = {
+        "filters": asyncio.run(bench(_filters_dispatcher(), _workload(packed=False), args.rounds)),
+        "table": asyncio.run(bench(_table_dispatcher(), _workload(packed=True), args.rounds)),
+    }
+
+    print(f"Действий админ-панели: {len(admin_actions._actions)}, повторов: {args.rounds}")
+    print(f"{'схема':<10}" + "".join(f"{group + ', мкс':>14}" for group in results["table"]))
+    for name, result in results.items():
+        print(f"{name:<10}" + "".join(f"{value * 1e6:>14.1f}" for value in result.values()))
+
+
+if __name__ == "__main__":
+    main()
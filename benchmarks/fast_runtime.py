@@ -0,0 +1,145 @@
+"""Пропускная способность и задержка обработки: стандартный режим против FAST_RUNTIME.
+
+Обновления в виде сырого JSON разбираются кодеком сессии бота (как это
+делает webhook-обработчик aiogram) и передаются в Dispatcher. Хендлер
+отвечает сообщением с inline-клавиатурой через локальный фейковый Bot API,
+поэтому в замер входят сериализация запроса и разбор ответа Telegram.
+Каждый режим запускается в отдельном цикле событий: стандартный asyncio
+и json против uvloop и orjson (если пакеты установлены).
+
+Запуск из корня репозитория:
+    python -m benchmarks.fast_runtime --count 5000 --concurrency 64
+"""
+import argparse
+import asyncio
+import json
+import statistics
+import time
+
+from aiogram import Bot, Dispatcher
+from aiogram.client.telegram import TelegramAPIServer
+from aiogram.types import InlineKeyboardButton, InlineKeyboardMarkup, Message
+from aiohttp import web
+
+from bot.utils.runtime import create_session, install_uvloop
+
+
+TOKEN = "42:BENCHMARK"
+API_PORT = 18083
+
+KEYBOARD = InlineKeyboardMarkup(inline_keyboard=[
+    [InlineKeyboardButton(text=f"Кнопка {row}-{col}", callback_data=f"bench_{row}_{col}")
+     for col in range(2)]
+    for row in range(4)
+])
+
+
+def _make_update(update_id: int) -> bytes:
+    """Текстовое сообщение в том виде, в каком его присылает Telegram"""
+    user = {"id": 1000 + update_id % 50, "is_bot": False, "first_name": "Бенчмарк"}
+    return json.dumps({
+        "update_id": update_id,
+        "message": {
+            "message_id": update_id,
+            "date": int(time.time()),
+            "chat": {"id": user["id"], "type": "private", "first_name": user["first_name"]},
+            "from": user,
+            "text": "Привет! " * 20,
+        },
+    }).encode()
+
+
+async def _send_message(request: web.Request) -> web.Response:
+    """Фейковый sendMessage: возвращает отправленное сообщение целиком"""
+    params = await request.post()
+    result = {
+        "message_id": 1,
+        "date": int(time.time()),
+        "chat": {"id": int(params["chat_id"]), "type": "private"},
+        "from": {"id": 42, "is_bot": True, "first_name": "Bench"},
+        "text": params["text"],
+        "reply_markup": json.loads(params["reply_markup"]),
+    }
+    return web.json_response({"ok": True, "result": result})
+
+
+async def bench(count: int, concurrency: int, fast: bool) -> dict:
+    app = web.Application()
+    app.router.add_post("/bot{token}/sendMessage", _send_message)
+    runner = web.AppRunner(app)
+    await runner.setup()
+    await web.TCPSite(runner, "127.0.0.1", API_PORT).start()
+
+    session = create_session(
+        fast=fast,
+        api=TelegramAPIServer.from_base(f"http://127.0.0.1:{API_PORT}")
+    )
+    bot = Bot(TOKEN, session=session)
+    dp = Dispatcher()
+
+    @dp.message()
+    async def _handler(message: Message):
+        await message.answer(message.text, reply_markup=KEYBOARD)
+
+    updates = [_make_update(update_id) for update_id in range(1, count + 1)]
+    latencies = []
+    semaphore = asyncio.Semaphore(concurrency)
+
+    async def _process(raw: bytes):
+        async with semaphore:
+            started = time.perf_counter()
+            await dp.feed_raw_update(bot, session.json_loads(raw))
+            latencies.append(time.perf_counter() - started)
+
+    # Прогрев соединения и кэшей pydantic
+    await asyncio.gather(*(_process(raw) for raw in updates[:100]))
+    latencies.clear()
+
+    started = time.perf_counter()
+    await asyncio.gather(*(_process(raw) for raw in updates))
+    elapsed = time.perf_counter() - started
+
+    await session.close()
+    await runner.cleanup()
+
+    ordered = sorted(latencies)
+    return {
+        "rate": count / elapsed,
+        "p50": statistics.median(ordered),
+        "p99": ordered[min(len(ordered) - 1, int(len(ordered) * 0.99))],
+    }
+
+
+def run_mode(count: int, concurrency: int, fast: bool) -> dict:
+    """Запуск замера в новом цикле событий выбранного режима"""
+    asyncio.set_event_loop_policy(None)
+    if fast:
+        install_uvloop()
+    try:
+        return asyncio.run(bench(count, concurrency, fast))
+    finally:
+        asyncio.set_event_loop_policy(None)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--count", type=int, default=5000)
+    parser.add_argument("--concurrency", type=int, default=64)
+    args = parser.parse_args()
+
+    results = {
+        "default": run_mode(args.count, args.concurrency, fast=False),
+        "fast": run_mode(args.count, args.concurrency, fast=True),
+    }
+
+    print(f"Обновлений: {args.count}, параллельно: {args.concurrency}")
+    print(f"{'режим':<10}{'upd/s':>10}{'p50, мс':>10}{'p99, мс':>10}")
+    for name, result in results.items():
+        print(
+            f"{name:<10}{result['rate']:>10.0f}"
+            f"{result['p50'] * 1000:>10.2f}{result['p99'] * 1000:>10.2f}"
+        )
+
+
+if __name__ == "__main__":
+    main()
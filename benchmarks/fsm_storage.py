@@ -0,0 +1,145 @@
+"""Задержка FSM-операций сценариев бота: RedisStorage против SQLiteStorage.
+
+Каждое обновление повторяет то, что происходит в боте: FSMContextMiddleware
+читает состояние, хендлер работает с CachedFSMContext. Сценарии:
+- question — «Задать вопрос» и ввод текста (user_handlers);
+- message_edit — выбор сообщения, ввод нового текста и подтверждение
+  (admin_handlers).
+
+RedisStorage замеряется на настоящем Redis (--redis-url), а если он
+недоступен — на fakeredis без сетевого обмена (результат будет занижен).
+SQLiteStorage пишет изменения во временную БД в фоне, как в боте.
+
+Запуск из корня репозитория:
+    python -m benchmarks.fsm_storage --users 500 --redis-url redis://localhost:6379/15
+"""
+import argparse
+import asyncio
+import os
+import statistics
+import tempfile
+import time
+
+from aiogram.fsm.storage.base import StorageKey
+from aiogram.fsm.storage.redis import RedisStorage
+from redis.asyncio import Redis
+from redis.exceptions import RedisError
+
+from bot.database.models import Database
+from bot.utils.fsm import CachedFSMContext
+from bot.utils.fsm_storage import CompactRedisStorage, SQLiteStorage
+from bot.utils.states import MessageEditStates, QuestionStates
+
+
+DRAFT = "Новый текст приветствия с <b>разметкой</b> и эмодзи 👋\n" * 20
+
+
+async def _update(storage, key: StorageKey, latencies: list, handler):
+    """Одно обновление: чтение состояния middleware и работа хендлера"""
+    started = time.perf_counter()
+    raw_state = await storage.get_state(key)
+    await handler(CachedFSMContext(storage, key, state=raw_state))
+    latencies.append(time.perf_counter() - started)
+
+
+async def question_flow(storage, key: StorageKey, latencies: list):
+    async def ask(state):
+        await state.set_state(QuestionStates.waiting_for_question)
+
+    async def save_question(state):
+        await state.clear()
+
+    await _update(storage, key, latencies, ask)
+    await _update(storage, key, latencies, save_question)
+
+
+async def message_edit_flow(storage, key: StorageKey, latencies: list):
+    async def start_edit(state):
+        await state.replace_state_and_data(
+            MessageEditStates.waiting_for_new_content,
+            {"message_key": "welcome"}
+        )
+
+    async def receive_content(state):
+        data = await state.get_data()
+        await state.update_data(new_content=DRAFT, message_key=data["message_key"])
+
+    async def confirm(state):
+        await state.get_data()
+        await state.clear()
+
+    for handler in (start_edit, receive_content, confirm):
+        await _update(storage, key, latencies, handler)
+
+
+async def bench(storage, flow, users: int, concurrency: int) -> dict:
+    latencies = []
+    semaphore = asyncio.Semaphore(concurrency)
+
+    async def _user(user_id: int):
+        async with semaphore:
+            await flow(storage, StorageKey(bot_id=42, chat_id=user_id, user_id=user_id), latencies)
+
+    started = time.perf_counter()
+    await asyncio.gather(*(_user(user_id) for user_id in range(1, users + 1)))
+    elapsed = time.perf_counter() - started
+
+    ordered = sorted(latencies)
+    return {
+        "rate": len(ordered) / elapsed,
+        "p50": statistics.median(ordered),
+        "p99": ordered[min(len(ordered) - 1, int(len(ordered) * 0.99))],
+    }
+
+
+async def _redis(url: str):
+    redis = Redis.from_url(url)
+    try:
+        await redis.ping()
+        return redis, url
+    except (RedisError, OSError):
+        await redis.aclose()
+        import fakeredis
+        return fakeredis.FakeAsyncRedis(), "fakeredis"
+
+
+async def run(users: int, concurrency: int, redis_url: str):
+    redis, redis_name = await _redis(redis_url)
+    fd, path = tempfile.mkstemp(suffix=".db")
+    os.close(fd)
+    db = Database(path)
+    await db.init_db()
+
+    storages = {
+        "redis": RedisStorage(redis),
+        "compact_redis": CompactRedisStorage(redis),
+        "sqlite": SQLiteStorage(db),
+    }
+    storages["sqlite"].start()
+
+    print(f"Пользователей: {users}, параллельно: {concurrency}, Redis: {redis_name}")
+    print(f"{'сценарий':<14}{'хранилище':<15}{'upd/s':>10}{'p50, мс':>10}{'p99, мс':>10}")
+    for flow_name, flow in (("question", question_flow), ("message_edit", message_edit_flow)):
+        for storage_name, storage in storages.items():
+            result = await bench(storage, flow, users, concurrency)
+            print(
+                f"{flow_name:<14}{storage_name:<15}{result['rate']:>10.0f}"
+                f"{result['p50'] * 1000:>10.3f}{result['p99'] * 1000:>10.3f}"
+            )
+
+    await storages["sqlite"].close()
+    await redis.aclose()
+    os.unlink(path)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--users", type=int, default=500)
+    parser.add_argument("--concurrency", type=int, default=32)
+    parser.add_argument("--redis-url", default="redis://localhost:6379/15")
+    args = parser.parse_args()
+    asyncio.run(run(args.users, args.concurrency, args.redis_url))
+
+
+if __name__ == "__main__":
+    main()
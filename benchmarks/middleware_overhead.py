@@ -0,0 +1,155 @@
+"""Накладные расходы middleware на одно обновление: прежняя цепочка против общего middleware.
+
+"chain" воспроизводит прежнюю схему: LoggingMiddleware и
+DependencyMiddleware (шесть записей в data) как inner-middleware
+на dp.message и dp.callback_query. "fused" — UpdateContextMiddleware
+на dp.update с контейнером сервисов и его injector, который подставляет
+только сервисы из аргументов хендлера. "none" — Dispatcher без них, для
+отсчёта. Хендлеры пустые, а логирование выключено уровнем WARNING,
+как это бывает в продакшене, поэтому в замер входят только работа
+middleware и сам Dispatcher. Схемы замеряются по очереди в каждом
+раунде со сборщиком мусора, выключенным на время замеров; в отчёт идёт
+лучший раунд (как в timeit): фоновая нагрузка машины только замедляет
+раунды, а разница между схемами в несколько микросекунд иначе тонет
+в её колебаниях.
+
+Запуск из корня репозитория:
+    python -m benchmarks.middleware_overhead --count 10000 --rounds 15
+"""
+import argparse
+import asyncio
+import gc
+import logging
+import time
+from typing import Any, Awaitable, Callable, Dict
+
+from aiogram import BaseMiddleware, Bot, Dispatcher
+from aiogram.types import CallbackQuery, Message, TelegramObject, Update
+
+from bot.middlewares.update_context_middleware import UpdateContextMiddleware
+from bot.services.container import ServiceContainer
+
+
+TOKEN = "42:BENCHMARK"
+SERVICE_NAMES = [
+    "user_service", "application_service", "notification_service",
+    "reminder_service", "message_service", "question_service",
+]
+
+chain_logger = logging.getLogger("benchmarks.middleware_overhead.chain")
+
+
+class ChainLoggingMiddleware(BaseMiddleware):
+    """Прежний LoggingMiddleware: f-строка собирается при каждом событии"""
+
+    async def __call__(
+        self,
+        handler: Callable[[TelegramObject, Dict[str, Any]], Awaitable[Any]],
+        event: TelegramObject,
+        data: Dict[str, Any]
+    ) -> Any:
+        if isinstance(event, Message):
+            user = event.from_user
+            chain_logger.info(f"Message from user {user.id} (@{user.username}): {event.text}")
+        elif isinstance(event, CallbackQuery):
+            user = event.from_user
+            chain_logger.info(f"Callback from user {user.id} (@{user.username}): {event.data}")
+        return await handler(event, data)
+
+
+class ChainDependencyMiddleware(BaseMiddleware):
+    """Прежний DependencyMiddleware: шесть записей в data на каждое событие"""
+
+    def __init__(self, services: Dict[str, Any]):
+        self.services = services
+
+    async def __call__(self, handler, event, data):
+        for name in SERVICE_NAMES:
+            data[name] = self.services[name]
+        return await handler(event, data)
+
+
+def _make_updates(count: int) -> list:
+    user = {"id": 1, "is_bot": False, "first_name": "Бенчмарк", "username": "bench"}
+    updates = []
+    for update_id in range(count):
+        if update_id % 2:
+            payload = {"callback_query": {
+                "id": str(update_id), "from": user, "chat_instance": "x", "data": "faq",
+            }}
+        else:
+            payload = {"message": {
+                "message_id": update_id, "date": 0, "from": user,
+                "chat": {"id": 1, "type": "private"}, "text": "Привет",
+            }}
+        updates.append(Update.model_validate({"update_id": update_id, **payload}))
+    return updates
+
+
+def _dispatcher(mode: str) -> Dispatcher:
+    dp = Dispatcher()
+    services = {name: object() for name in SERVICE_NAMES}
+    if mode == "chain":
+        for observer in (dp.message, dp.callback_query):
+            observer.middleware(ChainLoggingMiddleware())
+            observer.middleware(ChainDependencyMiddleware(services))
+    elif mode == "fused":
+        container = ServiceContainer()
+        for name, service in services.items():
+            container.add(name, service)
+        update_context = UpdateContextMiddleware(container)
+        dp.update.outer_middleware(update_context)
+        dp.message.middleware(update_context.injector)
+        dp.callback_query.middleware(update_context.injector)
+
+    @dp.message()
+    async def _message(message: Message, user_service=None):
+        pass
+
+    @dp.callback_query()
+    async def _callback(callback: CallbackQuery, question_service=None):
+        pass
+
+    return dp
+
+
+async def bench(modes: tuple, updates: list, rounds: int) -> dict:
+    bot = Bot(TOKEN)
+    dispatchers = {mode: _dispatcher(mode) for mode in modes}
+    for dp in dispatchers.values():
+        for update in updates[:500]:
+            await dp.feed_update(bot, update)
+
+    samples = {mode: [] for mode in modes}
+    gc.disable()
+    try:
+        for _ in range(rounds):
+            for mode, dp in dispatchers.items():
+                started = time.perf_counter()
+                for update in updates:
+                    await dp.feed_update(bot, update)
+                samples[mode].append((time.perf_counter() - started) / len(updates))
+    finally:
+        gc.enable()
+    return {mode: min(values) for mode, values in samples.items()}
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--count", type=int, default=10000)
+    parser.add_argument("--rounds", type=int, default=15)
+    args = parser.parse_args()
+
+    logging.basicConfig(level=logging.WARNING)
+    updates = _make_updates(args.count)
+    results = asyncio.run(bench(("none", "chain", "fused"), updates, args.rounds))
+
+    print(f"Обновлений: {args.count} (сообщения и нажатия поровну), раундов: {args.rounds}")
+    print(f"{'схема':<8}{'мкс/upd':>10}{'middleware, мкс':>18}")
+    for mode, per_update in results.items():
+        overhead = (per_update - results["none"]) * 1e6
+        print(f"{mode:<8}{per_update * 1e6:>10.1f}{overhead:>18.1f}")
+
+
+if __name__ == "__main__":
+    main()
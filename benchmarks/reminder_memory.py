@@ -0,0 +1,93 @@
+"""Сравнение памяти: задачи APScheduler против движка напоминаний.
+
+Запуск из корня репозитория:
+    python -m benchmarks.reminder_memory --count 50000
+"""
+import argparse
+import asyncio
+import gc
+import time
+import tracemalloc
+from datetime import datetime, timedelta
+
+from apscheduler.schedulers.asyncio import AsyncIOScheduler
+
+from bot.services.reminder_engine import ReminderEngine
+
+
+REMINDER_MESSAGE = (
+    "⏰ Привет! Прошли сутки с момента, как вы собирались заполнить анкету "
+    "в Art Lift Community.\n\n"
+    "Удалось ли уже отправить её? Если нет — самое время сделать это."
+)
+
+
+async def _send_reminder(user_id: int, message: str, job_id: str):
+    """Заглушка отправки, повторяющая сигнатуру прежней задачи"""
+
+
+def _fill_apscheduler(count: int) -> AsyncIOScheduler:
+    """Прежний путь: отдельная задача APScheduler на каждое напоминание"""
+    scheduler = AsyncIOScheduler()
+    scheduler.start(paused=True)
+    base = datetime.now() + timedelta(days=1)
+    for user_id in range(count):
+        scheduled_at = base + timedelta(seconds=user_id % 3600)
+        job_id = f"reminder_{user_id}_1d_{scheduled_at.timestamp()}"
+        scheduler.add_job(
+            _send_reminder,
+            "date",
+            run_date=scheduled_at,
+            args=[user_id, REMINDER_MESSAGE, job_id],
+            id=job_id
+        )
+    return scheduler
+
+
+def _fill_engine(count: int) -> ReminderEngine:
+    """Новый путь: тройки (due_tick, user_id, type) в массивах колеса"""
+    engine = ReminderEngine()
+    base = time.time() + 86400
+    for user_id in range(count):
+        engine.schedule(user_id, "1d", base + user_id % 3600)
+    return engine
+
+
+def _measure(build, count: int) -> tuple[int, float]:
+    """Возвращает (байты в куче, секунды) для построения структуры"""
+    gc.collect()
+    tracemalloc.start()
+    started = time.perf_counter()
+    holder = build(count)
+    elapsed = time.perf_counter() - started
+    gc.collect()
+    used, _ = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    del holder
+    return used, elapsed
+
+
+async def run(count: int):
+    results = {}
+
+    used, elapsed = _measure(_fill_apscheduler, count)
+    results["apscheduler"] = (used, elapsed)
+
+    used, elapsed = _measure(_fill_engine, count)
+    results["reminder_engine"] = (used, elapsed)
+
+    print(f"Напоминаний: {count}")
+    print(f"{'путь':<18}{'память, МБ':>12}{'байт/шт':>10}{'время, с':>10}")
+    for name, (used, elapsed) in results.items():
+        print(f"{name:<18}{used / 2**20:>12.2f}{used / count:>10.0f}{elapsed:>10.2f}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--count", type=int, default=50000)
+    args = parser.parse_args()
+    asyncio.run(run(args.count))
+
+
+if __name__ == "__main__":
+    main()
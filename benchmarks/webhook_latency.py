@@ -0,0 +1,193 @@
+"""Задержка от появления обновления до вызова хендлера: polling против webhook.
+
+Поднимается локальный фейковый Bot API (getMe, getUpdates с long polling),
+синтетические обновления подаются либо в очередь getUpdates, либо POST-запросом
+на webhook, собранный так же, как в bot.main.run_webhook.
+
+Запуск из корня репозитория:
+    python -m benchmarks.webhook_latency --count 2000 --interval 0.002
+"""
+import argparse
+import asyncio
+import statistics
+import time
+
+from aiogram import Bot, Dispatcher
+from aiogram.client.session.aiohttp import AiohttpSession
+from aiogram.client.telegram import TelegramAPIServer
+from aiogram.types import Message
+from aiogram.webhook.aiohttp_server import SimpleRequestHandler, setup_application
+from aiohttp import ClientSession, web
+
+
+TOKEN = "42:BENCHMARK"
+SECRET = "benchmark-secret"
+API_PORT = 18081
+WEBHOOK_PORT = 18082
+WEBHOOK_PATH = "/webhook"
+
+
+def _make_update(update_id: int) -> dict:
+    """Минимальное текстовое сообщение; в тексте — номер для сопоставления"""
+    return {
+        "update_id": update_id,
+        "message": {
+            "message_id": update_id,
+            "date": int(time.time()),
+            "chat": {"id": 1000 + update_id % 50, "type": "private"},
+            "from": {"id": 1000 + update_id % 50, "is_bot": False, "first_name": "Bench"},
+            "text": str(update_id),
+        },
+    }
+
+
+class FakeTelegramAPI:
+    """Фейковый Bot API: отдаёт обновления из очереди через long polling"""
+
+    def __init__(self):
+        self.updates: asyncio.Queue = asyncio.Queue()
+
+    async def handle(self, request: web.Request) -> web.Response:
+        method = request.match_info["method"].lower()
+        if method == "getme":
+            result = {"id": 42, "is_bot": True, "first_name": "Bench", "username": "bench_bot"}
+        elif method == "getupdates":
+            result = await self._get_updates(await request.post())
+        else:
+            result = True
+        return web.json_response({"ok": True, "result": result})
+
+    async def _get_updates(self, params) -> list:
+        timeout = float(params.get("timeout") or 0)
+        limit = int(params.get("limit") or 100)
+        try:
+            first = await asyncio.wait_for(self.updates.get(), timeout or 0.001)
+        except asyncio.TimeoutError:
+            return []
+        batch = [first]
+        while len(batch) < limit and not self.updates.empty():
+            batch.append(self.updates.get_nowait())
+        return batch
+
+    def app(self) -> web.Application:
+        app = web.Application()
+        app.router.add_post("/bot{token}/{method}", self.handle)
+        return app
+
+
+async def _start_site(app: web.Application, port: int) -> web.AppRunner:
+    runner = web.AppRunner(app)
+    await runner.setup()
+    await web.TCPSite(runner, "127.0.0.1", port).start()
+    return runner
+
+
+def _make_dispatcher(sent_at: dict, latencies: list, done: asyncio.Event, count: int):
+    dp = Dispatcher()
+
+    @dp.message()
+    async def _handler(message: Message):
+        latencies.append(time.perf_counter() - sent_at[int(message.text)])
+        if len(latencies) >= count:
+            done.set()
+
+    return dp
+
+
+async def bench_polling(count: int, interval: float) -> list:
+    api = FakeTelegramAPI()
+    api_runner = await _start_site(api.app(), API_PORT)
+    session = AiohttpSession(
+        api=TelegramAPIServer.from_base(f"http://127.0.0.1:{API_PORT}")
+    )
+    bot = Bot(TOKEN, session=session)
+
+    sent_at, latencies, done = {}, [], asyncio.Event()
+    dp = _make_dispatcher(sent_at, latencies, done, count)
+    polling = asyncio.create_task(
+        dp.start_polling(bot, handle_signals=False, close_bot_session=False)
+    )
+    # Даём циклу polling выполнить getMe и встать на первый getUpdates
+    await asyncio.sleep(0.5)
+
+    for update_id in range(1, count + 1):
+        sent_at[update_id] = time.perf_counter()
+        api.updates.put_nowait(_make_update(update_id))
+        await asyncio.sleep(interval)
+
+    await asyncio.wait_for(done.wait(), 60)
+    await dp.stop_polling()
+    await polling
+    await session.close()
+    await api_runner.cleanup()
+    return latencies
+
+
+async def bench_webhook(count: int, interval: float) -> list:
+    api = FakeTelegramAPI()
+    api_runner = await _start_site(api.app(), API_PORT)
+    session = AiohttpSession(
+        api=TelegramAPIServer.from_base(f"http://127.0.0.1:{API_PORT}")
+    )
+    bot = Bot(TOKEN, session=session)
+
+    sent_at, latencies, done = {}, [], asyncio.Event()
+    dp = _make_dispatcher(sent_at, latencies, done, count)
+    app = web.Application()
+    SimpleRequestHandler(dispatcher=dp, bot=bot, secret_token=SECRET).register(
+        app, path=WEBHOOK_PATH
+    )
+    setup_application(app, dp, bot=bot)
+    webhook_runner = await _start_site(app, WEBHOOK_PORT)
+
+    url = f"http://127.0.0.1:{WEBHOOK_PORT}{WEBHOOK_PATH}"
+    headers = {"X-Telegram-Bot-Api-Secret-Token": SECRET}
+    posts = []
+    async with ClientSession() as client:
+        async def _post(update: dict):
+            async with client.post(url, json=update, headers=headers) as response:
+                response.raise_for_status()
+
+        for update_id in range(1, count + 1):
+            sent_at[update_id] = time.perf_counter()
+            posts.append(asyncio.create_task(_post(_make_update(update_id))))
+            await asyncio.sleep(interval)
+
+        await asyncio.gather(*posts)
+        await asyncio.wait_for(done.wait(), 60)
+
+    await webhook_runner.cleanup()
+    await session.close()
+    await api_runner.cleanup()
+    return latencies
+
+
+def _report(name: str, latencies: list):
+    ordered = sorted(latencies)
+    p99 = ordered[min(len(ordered) - 1, int(len(ordered) * 0.99))]
+    print(
+        f"{name:<10}{statistics.median(ordered) * 1000:>10.2f}"
+        f"{p99 * 1000:>10.2f}{ordered[-1] * 1000:>10.2f}"
+    )
+
+
+async def run(count: int, interval: float):
+    polling = await bench_polling(count, interval)
+    webhook = await bench_webhook(count, interval)
+
+    print(f"Обновлений: {count}, интервал подачи: {interval * 1000:.1f} мс")
+    print(f"{'режим':<10}{'p50, мс':>10}{'p99, мс':>10}{'max, мс':>10}")
+    _report("polling", polling)
+    _report("webhook", webhook)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--count", type=int, default=2000)
+    parser.add_argument("--interval", type=float, default=0.002)
+    args = parser.parse_args()
+    asyncio.run(run(args.count, args.interval))
+
+
+if __name__ == "__main__":
+    main()
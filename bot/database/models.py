@@ -1,18 +1,68 @@
 """Модели базы данных"""
-from datetime import datetime
+import functools
+import inspect
+import time
+from datetime import datetime, timedelta
 from typing import Optional
 import aiosqlite
 
+from bot.utils.metrics import DB_QUERY_DURATION, DB_QUERY_ERRORS
 
+
+# Максимальное число параметров в одном запросе (с запасом для старых версий SQLite)
+SQLITE_MAX_PARAMS = 900
+
+# Версия схемы хранится в PRAGMA user_version. При любом изменении таблиц,
+# индексов или дефолтных шаблонов в init_db версию нужно увеличить,
+# иначе существующие базы не получат изменения
+SCHEMA_VERSION = 2
+
+
+def _timed_query(method):
+    """Время запроса и ошибки в метриках с меткой query=<имя метода>"""
+    name = method.__name__
+
+    @functools.wraps(method)
+    async def wrapper(*args, **kwargs):
+        started = time.perf_counter()
+        try:
+            return await method(*args, **kwargs)
+        except Exception:
+            DB_QUERY_ERRORS.inc(query=name)
+            raise
+        finally:
+            DB_QUERY_DURATION.observe(time.perf_counter() - started, query=name)
+
+    return wrapper
+
+
+def _instrument_queries(cls):
+    """Оборачивает все публичные корутины класса в _timed_query"""
+    for name, member in list(vars(cls).items()):
+        if not name.startswith("_") and inspect.iscoroutinefunction(member):
+            setattr(cls, name, _timed_query(member))
+    return cls
+
+
+@_instrument_queries
 class Database:
     """Класс для работы с базой данных SQLite"""
     
     def __init__(self, db_path: str):
         self.db_path = db_path
     
-    async def init_db(self):
-        """Инициализация базы данных - создание таблиц"""
+    async def init_db(self) -> bool:
+        """Инициализация базы данных - создание таблиц
+
+        Если версия схемы в базе совпадает с SCHEMA_VERSION, создание таблиц
+        и шаблонов пропускается. Возвращает True, если схема обновлялась.
+        """
         async with aiosqlite.connect(self.db_path) as db:
+            async with db.execute("PRAGMA user_version") as cursor:
+                row = await cursor.fetchone()
+            if row[0] == SCHEMA_VERSION:
+                return False
+            
             # Таблица пользователей
             await db.execute("""
                 CREATE TABLE IF NOT EXISTS users (
@@ -107,6 +157,40 @@ class Database:
                 )
             """)
             
+            # Таблица состояний FSM (для FSM_STORAGE=sqlite).
+            # Пустые thread_id и business_connection_id хранятся как 0 и '',
+            # чтобы они участвовали в первичном ключе
+            await db.execute("""
+                CREATE TABLE IF NOT EXISTS fsm_storage (
+                    bot_id INTEGER NOT NULL,
+                    chat_id INTEGER NOT NULL,
+                    user_id INTEGER NOT NULL,
+                    thread_id INTEGER NOT NULL DEFAULT 0,
+                    business_connection_id TEXT NOT NULL DEFAULT '',
+                    destiny TEXT NOT NULL,
+                    state TEXT,
+                    data TEXT,
+                    updated_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+                    PRIMARY KEY (
+                        bot_id, chat_id, user_id, thread_id, business_connection_id, destiny
+                    )
+                )
+            """)
+            
+            # Индексы для выборки напоминаний и последней заявки пользователя
+            await db.execute("""
+                CREATE INDEX IF NOT EXISTS idx_applications_user_created
+                ON applications (user_id, created_at)
+            """)
+            await db.execute("""
+                CREATE INDEX IF NOT EXISTS idx_reminders_due
+                ON reminders (sent_at, cancelled, scheduled_at)
+            """)
+            await db.execute("""
+                CREATE INDEX IF NOT EXISTS idx_reminders_user_type
+                ON reminders (user_id, reminder_type)
+            """)
+            
             # Инициализация дефолтных шаблонов
             default_templates = [
                 ("welcome", 
@@ -133,6 +217,15 @@ class Database:
                 ("faq",
                  "<b>Часто задаваемые вопросы</b>\n\n<b>Что такое Art Lift Community?</b>\nПрофессиональное пространство для художников, кураторов и арт-менеджеров.\n\n<b>Что включает членство?</b>\n• Общение в закрытом Telegram-чате\n• Ответы на вопросы от команды специалистов\n• Встречи с экспертами арт-рынка\n• Обзоры на международные события в сфере искусства\n• Портфолио-ревью\n• Еженедельные обсуждения актуальных тем\n• Random coffee с участниками\n• Поддержка от комьюнити\n\n<b>Стоимость:</b>\n• Первый пробный месяц — 2 500 ₽\n• Последующие месяцы — 5 000 ₽\n\nОстались вопросы? Нажмите «❓ Задать вопрос» в меню, и мы ответим лично.",
                  "FAQ раздел"),
+                ("reminder_1d",
+                 "⏰ Привет! Прошли сутки с момента, как вы собирались заполнить анкету в Art Lift Community.\n\nУдалось ли уже отправить её? Если нет — самое время сделать это.",
+                 "Напоминание через сутки после /start"),
+                ("reminder_3d",
+                 "⏰ Напоминаем об анкете в Art Lift Community.\n\nПрошло три дня — если вы ещё не успели её заполнить, это займёт всего пару минут.",
+                 "Напоминание через 3 дня после /start"),
+                ("reminder_7d",
+                 "👋 Прошла неделя с вашего знакомства с Art Lift Community.\n\nМы всё ещё ждём вашу анкету! Если остались вопросы — нажмите «❓ Задать вопрос» в меню.",
+                 "Напоминание через 7 дней после /start"),
             ]
             
             for key, content, description in default_templates:
@@ -141,7 +234,10 @@ class Database:
                     VALUES (?, ?, ?)
                 """, (key, content, description))
             
+            # PRAGMA не поддерживает параметры; значение — константа модуля
+            await db.execute(f"PRAGMA user_version = {SCHEMA_VERSION}")
             await db.commit()
+            return True
     
     async def create_user(
         self,
@@ -172,15 +268,23 @@ class Database:
                     return dict(row)
                 return None
     
-    async def create_application(self, user_id: int) -> int:
-        """Создание новой заявки"""
+    async def create_application(self, user_id: int) -> Optional[int]:
+        """Создание новой заявки
+
+        Если у пользователя уже есть заявка на рассмотрении, новая
+        не создаётся и возвращается None.
+        """
         async with aiosqlite.connect(self.db_path) as db:
             cursor = await db.execute("""
                 INSERT INTO applications (user_id, status, created_at)
-                VALUES (?, 'pending', ?)
+                SELECT ?1, 'pending', ?2
+                WHERE NOT EXISTS (
+                    SELECT 1 FROM applications
+                    WHERE user_id = ?1 AND status = 'pending'
+                )
             """, (user_id, datetime.now()))
             await db.commit()
-            return cursor.lastrowid
+            return cursor.lastrowid if cursor.rowcount else None
     
     async def get_application(self, user_id: int) -> Optional[dict]:
         """Получение заявки пользователя"""
@@ -195,21 +299,42 @@ class Database:
                     return dict(row)
                 return None
     
+    async def get_users_with_applications(self, user_ids: list) -> set:
+        """Получение множества пользователей, у которых есть хотя бы одна заявка"""
+        if not user_ids:
+            return set()
+        
+        found = set()
+        async with aiosqlite.connect(self.db_path) as db:
+            for start in range(0, len(user_ids), SQLITE_MAX_PARAMS):
+                chunk = user_ids[start:start + SQLITE_MAX_PARAMS]
+                placeholders = ",".join("?" * len(chunk))
+                async with db.execute(
+                    f"SELECT DISTINCT user_id FROM applications WHERE user_id IN ({placeholders})",
+                    chunk
+                ) as cursor:
+                    found.update(row[0] for row in await cursor.fetchall())
+        return found
+    
     async def update_application_status(
         self,
         user_id: int,
         status: str,
         admin_id: int
     ) -> bool:
-        """Обновление статуса заявки"""
+        """Обновление статуса заявки на рассмотрении
+
+        Возвращает False, если заявки в статусе pending нет (например,
+        её уже обработал другой администратор).
+        """
         async with aiosqlite.connect(self.db_path) as db:
-            await db.execute("""
+            cursor = await db.execute("""
                 UPDATE applications
                 SET status = ?, admin_id = ?, reviewed_at = ?
                 WHERE user_id = ? AND status = 'pending'
             """, (status, admin_id, datetime.now(), user_id))
             await db.commit()
-            return True
+            return cursor.rowcount > 0
     
     async def get_pending_applications(self, limit: int = 10, offset: int = 0) -> list:
         """Получение списка заявок со статусом pending"""
@@ -277,6 +402,55 @@ class Database:
             await db.commit()
             return cursor.lastrowid
     
+    async def create_reminders(self, reminders: list) -> int:
+        """Пакетное создание напоминаний из кортежей (user_id, reminder_type, scheduled_at)
+
+        Шаг, который уже ждёт отправки у пользователя, не дублируется:
+        повторный /start не множит цепочку. Возвращает число созданных.
+        """
+        if not reminders:
+            return 0
+        
+        async with aiosqlite.connect(self.db_path) as db:
+            cursor = await db.executemany("""
+                INSERT INTO reminders (user_id, reminder_type, scheduled_at)
+                SELECT ?1, ?2, ?3
+                WHERE NOT EXISTS (
+                    SELECT 1 FROM reminders
+                    WHERE user_id = ?1 AND reminder_type = ?2
+                      AND sent_at IS NULL AND cancelled = 0
+                )
+            """, reminders)
+            await db.commit()
+            return cursor.rowcount
+    
+    async def get_reminders_after(self, last_id: int) -> list:
+        """Получение неотправленных напоминаний с id больше заданного"""
+        async with aiosqlite.connect(self.db_path) as db:
+            db.row_factory = aiosqlite.Row
+            async with db.execute("""
+                SELECT id, user_id, reminder_type, scheduled_at FROM reminders
+                WHERE id > ? AND sent_at IS NULL AND cancelled = 0
+                ORDER BY id ASC
+            """, (last_id,)) as cursor:
+                rows = await cursor.fetchall()
+                return [dict(row) for row in rows]
+    
+    async def mark_reminder_steps_sent(self, steps: list, due_before: datetime) -> int:
+        """Пакетная отметка наступивших шагов (user_id, reminder_type) как отправленных"""
+        if not steps:
+            return 0
+        
+        sent_at = datetime.now()
+        async with aiosqlite.connect(self.db_path) as db:
+            cursor = await db.executemany("""
+                UPDATE reminders SET sent_at = ?
+                WHERE sent_at IS NULL AND scheduled_at < ? AND user_id = ? AND reminder_type = ?
+            """, [(sent_at, due_before, user_id, reminder_type) for user_id, reminder_type in steps])
+            updated = cursor.rowcount
+            await db.commit()
+        return updated
+    
     async def get_pending_reminders(self) -> list:
         """Получение напоминаний, которые нужно отправить"""
         async with aiosqlite.connect(self.db_path) as db:
@@ -298,6 +472,45 @@ class Database:
             await db.commit()
             return True
     
+    async def get_due_reminders_with_status(self) -> list:
+        """Получение напоминаний к отправке вместе со статусом последней заявки пользователя"""
+        async with aiosqlite.connect(self.db_path) as db:
+            db.row_factory = aiosqlite.Row
+            async with db.execute("""
+                SELECT r.id, r.user_id, r.reminder_type, r.scheduled_at,
+                    (
+                        SELECT a.status FROM applications a
+                        WHERE a.user_id = r.user_id
+                        ORDER BY a.created_at DESC
+                        LIMIT 1
+                    ) AS application_status
+                FROM reminders r
+                WHERE r.scheduled_at <= ? AND r.sent_at IS NULL AND r.cancelled = 0
+                ORDER BY r.scheduled_at ASC
+            """, (datetime.now(),)) as cursor:
+                rows = await cursor.fetchall()
+                return [dict(row) for row in rows]
+    
+    async def mark_reminders_sent(self, reminder_ids: list) -> int:
+        """Пакетная отметка напоминаний как отправленных"""
+        if not reminder_ids:
+            return 0
+        
+        updated = 0
+        sent_at = datetime.now()
+        async with aiosqlite.connect(self.db_path) as db:
+            # Разбиваем на части, чтобы не превысить лимит параметров SQLite
+            for start in range(0, len(reminder_ids), SQLITE_MAX_PARAMS):
+                chunk = reminder_ids[start:start + SQLITE_MAX_PARAMS]
+                placeholders = ",".join("?" * len(chunk))
+                cursor = await db.execute(
+                    f"UPDATE reminders SET sent_at = ? WHERE id IN ({placeholders})",
+                    (sent_at, *chunk)
+                )
+                updated += cursor.rowcount
+            await db.commit()
+        return updated
+    
     async def cancel_user_reminders(self, user_id: int) -> bool:
         """Отмена всех напоминаний пользователя"""
         async with aiosqlite.connect(self.db_path) as db:
@@ -337,6 +550,21 @@ class Database:
                     return dict(row)
                 return None
     
+    async def get_messages(self, message_keys: list) -> dict:
+        """Получение нескольких шаблонов сообщений одним запросом"""
+        if not message_keys:
+            return {}
+        
+        placeholders = ",".join("?" * len(message_keys))
+        async with aiosqlite.connect(self.db_path) as db:
+            db.row_factory = aiosqlite.Row
+            async with db.execute(
+                f"SELECT * FROM bot_messages WHERE message_key IN ({placeholders})",
+                list(message_keys)
+            ) as cursor:
+                rows = await cursor.fetchall()
+                return {row["message_key"]: dict(row) for row in rows}
+    
     async def update_message(
         self,
         message_key: str,
@@ -537,4 +765,50 @@ class Database:
             ) as cursor:
                 row = await cursor.fetchone()
                 return row[0] if row else 0
+    
+    async def load_fsm_records(self, max_age_seconds: Optional[float] = None) -> list:
+        """Загрузка сохранённых состояний FSM; устаревшие записи удаляются"""
+        async with aiosqlite.connect(self.db_path) as db:
+            if max_age_seconds:
+                await db.execute(
+                    "DELETE FROM fsm_storage WHERE updated_at < ?",
+                    (datetime.now() - timedelta(seconds=max_age_seconds),)
+                )
+                await db.commit()
+            db.row_factory = aiosqlite.Row
+            async with db.execute("SELECT * FROM fsm_storage") as cursor:
+                rows = await cursor.fetchall()
+                return [dict(row) for row in rows]
+    
+    async def save_fsm_records(self, upserts: list, deletes: list) -> int:
+        """Пакетная запись состояний FSM одной транзакцией
 
+        upserts — кортежи (bot_id, chat_id, user_id, thread_id,
+        business_connection_id, destiny, state, data), deletes — те же
+        кортежи без state и data.
+        """
+        if not upserts and not deletes:
+            return 0
+        
+        now = datetime.now()
+        async with aiosqlite.connect(self.db_path) as db:
+            await db.executemany("""
+                INSERT INTO fsm_storage (
+                    bot_id, chat_id, user_id, thread_id, business_connection_id,
+                    destiny, state, data, updated_at
+                )
+                VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?)
+                ON CONFLICT (
+                    bot_id, chat_id, user_id, thread_id, business_connection_id, destiny
+                ) DO UPDATE SET
+                    state = excluded.state,
+                    data = excluded.data,
+                    updated_at = excluded.updated_at
+            """, [(*record, now) for record in upserts])
+            await db.executemany("""
+                DELETE FROM fsm_storage
+                WHERE bot_id = ? AND chat_id = ? AND user_id = ? AND thread_id = ?
+                  AND business_connection_id = ? AND destiny = ?
+            """, deletes)
+            await db.commit()
+            return len(upserts) + len(deletes)
@@ -1,5 +1,5 @@
 """Handlers для администраторов"""
-from aiogram import Router, F
+from aiogram import Router
 from aiogram.types import CallbackQuery, Message, InlineKeyboardMarkup, InlineKeyboardButton
 from aiogram.filters import Command
 from bot.keyboards.admin_keyboards import (
@@ -15,6 +15,7 @@ from bot.keyboards.admin_keyboards import (
     get_questions_list_keyboard,
     get_question_action_keyboard
 )
+from bot.keyboards.callback_data import AdminCallback
 from bot.keyboards.user_keyboards import get_main_menu_keyboard
 from bot.services.application_service import ApplicationService
 from bot.services.notification_service import NotificationService
@@ -23,6 +24,8 @@ from bot.services.message_service import MessageService
 from bot.services.question_service import QuestionService
 from bot.utils.states import MessageEditStates, QuestionStates
 from bot.middlewares.auth_middleware import is_admin
+from bot.utils.callback_router import CallbackActionTable
+from bot.utils.fsm import CachedFSMContext
 from bot.utils.telegram_utils import (
     answer_with_retry,
     edit_text_with_retry,
@@ -33,6 +36,15 @@ from config.settings import settings
 from aiogram.fsm.context import FSMContext
 
 router = Router()
+# Кнопки админ-панели маршрутизируются одним поиском по действию.
+# Любая кнопка может показать всплывающее сообщение (нет прав, заявка
+# или сообщение не найдены), поэтому все отвечают сами (deferred_answer)
+admin_actions = CallbackActionTable(
+    AdminCallback,
+    legacy_prefix="admin_",
+    flags={"deferred_answer": True}
+)
+admin_actions.register(router)
 
 
 async def check_admin_access(event: CallbackQuery | Message) -> bool:
@@ -47,7 +59,7 @@ async def check_admin_access(event: CallbackQuery | Message) -> bool:
     return True
 
 
-@router.callback_query(F.data == "admin_panel")
+@admin_actions.action("panel")
 async def show_admin_panel(
     callback: CallbackQuery,
     application_service: ApplicationService,
@@ -79,7 +91,7 @@ async def show_admin_panel(
     await callback.answer()
 
 
-@router.callback_query(F.data == "admin_pin_subscribe")
+@admin_actions.action("pin_subscribe", flags={"idempotent": True})
 async def pin_channel_subscribe_message(
     callback: CallbackQuery,
     message_service: MessageService
@@ -141,7 +153,7 @@ async def pin_channel_subscribe_message(
     await callback.answer("Сообщение закреплено", show_alert=True)
 
 
-@router.callback_query(F.data == "admin_applications")
+@admin_actions.action("applications")
 async def show_applications_list(
     callback: CallbackQuery,
     application_service: ApplicationService,
@@ -179,16 +191,17 @@ async def show_applications_list(
     await callback.answer()
 
 
-@router.callback_query(F.data.startswith("admin_applications_page_"))
+@admin_actions.action("applications_page")
 async def show_applications_page(
     callback: CallbackQuery,
+    callback_data: AdminCallback,
     application_service: ApplicationService
 ):
     """Пагинация списка заявок"""
     if not await check_admin_access(callback):
         return
     
-    offset = int(callback.data.split("_")[-1])
+    offset = callback_data.int_arg
     limit = 10
     
     applications = await application_service.get_pending_applications(limit, offset)
@@ -210,9 +223,10 @@ async def show_applications_page(
     await callback.answer()
 
 
-@router.callback_query(F.data.startswith("admin_view_application_"))
+@admin_actions.action("view_application")
 async def view_application(
     callback: CallbackQuery,
+    callback_data: AdminCallback,
     application_service: ApplicationService,
     user_service: UserService
 ):
@@ -220,7 +234,7 @@ async def view_application(
     if not await check_admin_access(callback):
         return
     
-    user_id = int(callback.data.split("_")[-1])
+    user_id = callback_data.int_arg
     
     application = await application_service.get_application(user_id)
     user = await user_service.get_user(user_id)
@@ -249,9 +263,10 @@ async def view_application(
     await callback.answer()
 
 
-@router.callback_query(F.data.startswith("admin_approve_"))
+@admin_actions.action("approve", flags={"idempotent": True})
 async def approve_application(
     callback: CallbackQuery,
+    callback_data: AdminCallback,
     application_service: ApplicationService,
     notification_service: NotificationService,
     user_service: UserService
@@ -260,11 +275,18 @@ async def approve_application(
     if not await check_admin_access(callback):
         return
     
-    user_id = int(callback.data.split("_")[-1])
+    user_id = callback_data.int_arg
     admin_id = callback.from_user.id
     
-    # Одобряем заявку
-    await application_service.approve_application(user_id, admin_id)
+    # Одобряем заявку; если её уже обработали, пользователь не получает
+    # повторное уведомление
+    if not await application_service.approve_application(user_id, admin_id):
+        await edit_text_with_retry(
+            callback.message,
+            f"ℹ️ Заявка пользователя {user_id} уже обработана."
+        )
+        await callback.answer("Заявка уже обработана", show_alert=True)
+        return
     
     # Получаем данные пользователя
     user = await user_service.get_user(user_id)
@@ -286,9 +308,10 @@ async def approve_application(
     await callback.answer("Заявка одобрена", show_alert=True)
 
 
-@router.callback_query(F.data.startswith("admin_reject_"))
+@admin_actions.action("reject", flags={"idempotent": True})
 async def reject_application(
     callback: CallbackQuery,
+    callback_data: AdminCallback,
     application_service: ApplicationService,
     notification_service: NotificationService,
     user_service: UserService
@@ -297,11 +320,18 @@ async def reject_application(
     if not await check_admin_access(callback):
         return
     
-    user_id = int(callback.data.split("_")[-1])
+    user_id = callback_data.int_arg
     admin_id = callback.from_user.id
     
-    # Отклоняем заявку
-    await application_service.reject_application(user_id, admin_id)
+    # Отклоняем заявку; если её уже обработали, пользователь не получает
+    # повторное уведомление
+    if not await application_service.reject_application(user_id, admin_id):
+        await edit_text_with_retry(
+            callback.message,
+            f"ℹ️ Заявка пользователя {user_id} уже обработана."
+        )
+        await callback.answer("Заявка уже обработана", show_alert=True)
+        return
     
     # Получаем данные пользователя
     user = await user_service.get_user(user_id)
@@ -323,7 +353,7 @@ async def reject_application(
     await callback.answer("Заявка отклонена", show_alert=True)
 
 
-@router.callback_query(F.data == "admin_stats")
+@admin_actions.action("stats")
 async def show_stats(
     callback: CallbackQuery,
     application_service: ApplicationService,
@@ -372,7 +402,7 @@ async def show_stats(
     await callback.answer()
 
 
-@router.callback_query(F.data == "admin_messages")
+@admin_actions.action("messages")
 async def show_messages_list(
     callback: CallbackQuery,
     message_service: MessageService,
@@ -407,16 +437,17 @@ async def show_messages_list(
     await callback.answer()
 
 
-@router.callback_query(F.data.startswith("admin_edit_message_"))
+@admin_actions.action("edit_message")
 async def show_message_edit_menu(
     callback: CallbackQuery,
+    callback_data: AdminCallback,
     message_service: MessageService
 ):
     """Показ меню редактирования сообщения"""
     if not await check_admin_access(callback):
         return
     
-    message_key = callback.data.replace("admin_edit_message_", "")
+    message_key = callback_data.arg
     
     message_data = await message_service.db.get_message(message_key)
     
@@ -442,16 +473,17 @@ async def show_message_edit_menu(
     await callback.answer()
 
 
-@router.callback_query(F.data.startswith("admin_message_view_"))
+@admin_actions.action("message_view")
 async def view_message_content(
     callback: CallbackQuery,
+    callback_data: AdminCallback,
     message_service: MessageService
 ):
     """Просмотр текущего содержимого сообщения"""
     if not await check_admin_access(callback):
         return
     
-    message_key = callback.data.replace("admin_message_view_", "")
+    message_key = callback_data.arg
     
     message_data = await message_service.db.get_message(message_key)
     
@@ -481,20 +513,23 @@ async def view_message_content(
     await callback.answer()
 
 
-@router.callback_query(F.data.startswith("admin_message_edit_"))
+@admin_actions.action("message_edit")
 async def start_message_edit(
     callback: CallbackQuery,
-    state: FSMContext
+    callback_data: AdminCallback,
+    state: CachedFSMContext
 ):
     """Начало редактирования сообщения"""
     if not await check_admin_access(callback):
         return
     
-    message_key = callback.data.replace("admin_message_edit_", "")
+    message_key = callback_data.arg
     
-    # Сохраняем ключ сообщения в состоянии
-    await state.update_data(message_key=message_key)
-    await state.set_state(MessageEditStates.waiting_for_new_content)
+    # Сохраняем ключ сообщения в состоянии (один запрос к хранилищу)
+    await state.replace_state_and_data(
+        MessageEditStates.waiting_for_new_content,
+        {"message_key": message_key}
+    )
     
     text = (
         f"<b>✏️ Редактирование: {message_key}</b>\n\n"
@@ -521,9 +556,10 @@ async def start_message_edit(
     await callback.answer()
 
 
-@router.callback_query(F.data.startswith("admin_message_cancel_"))
+@admin_actions.action("message_cancel")
 async def cancel_message_edit(
     callback: CallbackQuery,
+    callback_data: AdminCallback,
     state: FSMContext,
     message_service: MessageService
 ):
@@ -531,7 +567,7 @@ async def cancel_message_edit(
     if not await check_admin_access(callback):
         return
 
-    message_key = callback.data.replace("admin_message_cancel_", "")
+    message_key = callback_data.arg
     await state.clear()
 
     message_data = await message_service.db.get_message(message_key)
@@ -604,9 +640,10 @@ async def save_message_content(
     )
 
 
-@router.callback_query(F.data.startswith("admin_message_save_"))
+@admin_actions.action("message_save", flags={"idempotent": True})
 async def confirm_message_save(
     callback: CallbackQuery,
+    callback_data: AdminCallback,
     state: FSMContext,
     message_service: MessageService
 ):
@@ -615,7 +652,7 @@ async def confirm_message_save(
         await state.clear()
         return
     
-    message_key = callback.data.replace("admin_message_save_", "")
+    message_key = callback_data.arg
     admin_id = callback.from_user.id
     
     data = await state.get_data()
@@ -665,16 +702,17 @@ async def cancel_message_edit(
         await answer_with_retry(message, "✅ Ответ на вопрос отменен")
 
 
-@router.callback_query(F.data.startswith("admin_message_history_"))
+@admin_actions.action("message_history")
 async def show_message_history(
     callback: CallbackQuery,
+    callback_data: AdminCallback,
     message_service: MessageService
 ):
     """Показ истории версий сообщения"""
     if not await check_admin_access(callback):
         return
     
-    message_key = callback.data.replace("admin_message_history_", "")
+    message_key = callback_data.arg
     
     history = await message_service.get_message_history(message_key, limit=10)
     
@@ -706,16 +744,17 @@ async def show_message_history(
     await callback.answer()
 
 
-@router.callback_query(F.data.startswith("admin_history_view_"))
+@admin_actions.action("history_view")
 async def view_history_item(
     callback: CallbackQuery,
+    callback_data: AdminCallback,
     message_service: MessageService
 ):
     """Просмотр конкретной версии из истории"""
     if not await check_admin_access(callback):
         return
     
-    history_id = int(callback.data.replace("admin_history_view_", ""))
+    history_id = callback_data.int_arg
     
     history_item = await message_service.get_history_item(history_id)
     
@@ -750,16 +789,17 @@ async def view_history_item(
     await callback.answer()
 
 
-@router.callback_query(F.data.startswith("admin_history_restore_"))
+@admin_actions.action("history_restore", flags={"idempotent": True})
 async def restore_from_history(
     callback: CallbackQuery,
+    callback_data: AdminCallback,
     message_service: MessageService
 ):
     """Восстановление сообщения из истории"""
     if not await check_admin_access(callback):
         return
     
-    history_id = int(callback.data.replace("admin_history_restore_", ""))
+    history_id = callback_data.int_arg
     admin_id = callback.from_user.id
     
     history_item = await message_service.get_history_item(history_id)
@@ -791,16 +831,17 @@ async def restore_from_history(
         await callback.answer("Ошибка при восстановлении", show_alert=True)
 
 
-@router.callback_query(F.data.startswith("admin_history_delete_"))
+@admin_actions.action("history_delete", flags={"idempotent": True})
 async def delete_history_item(
     callback: CallbackQuery,
+    callback_data: AdminCallback,
     message_service: MessageService
 ):
     """Удаление элемента из истории"""
     if not await check_admin_access(callback):
         return
     
-    history_id = int(callback.data.replace("admin_history_delete_", ""))
+    history_id = callback_data.int_arg
     
     history_item = await message_service.get_history_item(history_id)
     
@@ -844,7 +885,7 @@ async def delete_history_item(
         await callback.answer("Ошибка при удалении", show_alert=True)
 
 
-@router.callback_query(F.data == "admin_questions")
+@admin_actions.action("questions")
 async def show_questions_list(
     callback: CallbackQuery,
     question_service: QuestionService
@@ -881,16 +922,17 @@ async def show_questions_list(
     await callback.answer()
 
 
-@router.callback_query(F.data.startswith("admin_questions_page_"))
+@admin_actions.action("questions_page")
 async def show_questions_page(
     callback: CallbackQuery,
+    callback_data: AdminCallback,
     question_service: QuestionService
 ):
     """Пагинация списка вопросов"""
     if not await check_admin_access(callback):
         return
     
-    offset = int(callback.data.split("_")[-1])
+    offset = callback_data.int_arg
     limit = 10
     
     questions = await question_service.get_pending_questions(limit, offset)
@@ -912,16 +954,17 @@ async def show_questions_page(
     await callback.answer()
 
 
-@router.callback_query(F.data.startswith("admin_view_question_"))
+@admin_actions.action("view_question")
 async def view_question(
     callback: CallbackQuery,
+    callback_data: AdminCallback,
     question_service: QuestionService
 ):
     """Просмотр конкретного вопроса"""
     if not await check_admin_access(callback):
         return
     
-    question_id = int(callback.data.split("_")[-1])
+    question_id = callback_data.int_arg
     
     question = await question_service.get_question(question_id)
     
@@ -952,17 +995,18 @@ async def view_question(
     await callback.answer()
 
 
-@router.callback_query(F.data.startswith("admin_answer_question_"))
+@admin_actions.action("answer_question")
 async def start_answering_question(
     callback: CallbackQuery,
-    state: FSMContext,
+    callback_data: AdminCallback,
+    state: CachedFSMContext,
     question_service: QuestionService
 ):
     """Начало ответа на вопрос"""
     if not await check_admin_access(callback):
         return
     
-    question_id = int(callback.data.split("_")[-1])
+    question_id = callback_data.int_arg
     
     question = await question_service.get_question(question_id)
     
@@ -970,9 +1014,11 @@ async def start_answering_question(
         await callback.answer("Вопрос не найден", show_alert=True)
         return
     
-    # Сохраняем ID вопроса в состоянии
-    await state.update_data(question_id=question_id)
-    await state.set_state(QuestionStates.waiting_for_answer)
+    # Сохраняем ID вопроса в состоянии (один запрос к хранилищу)
+    await state.replace_state_and_data(
+        QuestionStates.waiting_for_answer,
+        {"question_id": question_id}
+    )
     
     user_name = question.get("full_name") or question.get("username") or "Неизвестно"
     question_text = question.get("question_text", "")
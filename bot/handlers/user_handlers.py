@@ -15,6 +15,7 @@ from bot.services.notification_service import NotificationService
 from bot.services.reminder_service import ReminderService
 from bot.services.message_service import MessageService
 from bot.services.question_service import QuestionService
+from bot.services.task_supervisor import TaskSupervisor
 from bot.utils.states import ApplicationStates, QuestionStates
 from bot.middlewares.auth_middleware import is_admin
 from bot.utils.telegram_utils import answer_with_retry, edit_text_with_retry
@@ -52,7 +53,7 @@ async def cmd_start(
     )
     
     # Планируем напоминания
-    reminder_service.schedule_reminders(user_id)
+    await reminder_service.schedule_reminders(user_id)
 
 
 @router.message(Command("cancel"))
@@ -90,14 +91,15 @@ async def handle_fill_form(callback: CallbackQuery):
     await callback.answer()
 
 
-@router.callback_query(F.data == "application_filled")
+@router.callback_query(F.data == "application_filled", flags={"idempotent": True})
 async def handle_application_filled(
     callback: CallbackQuery,
     application_service: ApplicationService,
     notification_service: NotificationService,
     reminder_service: ReminderService,
     user_service: UserService,
-    message_service: MessageService
+    message_service: MessageService,
+    task_supervisor: TaskSupervisor
 ):
     """Обработчик подтверждения заполнения анкеты"""
     user_id = callback.from_user.id
@@ -105,18 +107,23 @@ async def handle_application_filled(
     # Отменяем напоминания
     await reminder_service.cancel_user_reminders(user_id)
     
-    # Создаем заявку
-    await application_service.create_application(user_id)
-    
-    # Получаем данные пользователя
-    user = await user_service.get_user(user_id)
-    
-    # Уведомляем админа
-    await notification_service.notify_admin_new_application(
-        user_id,
-        user.get("username") if user else callback.from_user.username,
-        user.get("full_name") if user else callback.from_user.full_name
-    )
+    # Создаем заявку; повторное подтверждение не создаёт новую
+    # и не уведомляет админов ещё раз
+    application_id = await application_service.create_application(user_id)
+    
+    if application_id is not None:
+        # Получаем данные пользователя
+        user = await user_service.get_user(user_id)
+        
+        # Уведомляем админов в фоне: пользователю не нужно ждать отправки
+        task_supervisor.spawn(
+            notification_service.notify_admin_new_application(
+                user_id,
+                user.get("username") if user else callback.from_user.username,
+                user.get("full_name") if user else callback.from_user.full_name
+            ),
+            name=f"notify-admins:application:{user_id}"
+        )
     
     # Получаем ответ из базы данных
     response_text = await message_service.get_message("application_filled_response")
@@ -170,7 +177,8 @@ async def save_user_question(
     notification_service: NotificationService,
     user_service: UserService,
     message_service: MessageService,
-    question_service: QuestionService
+    question_service: QuestionService,
+    task_supervisor: TaskSupervisor
 ):
     """Сохранение вопроса пользователя"""
     # Пропускаем команды (они обрабатываются отдельным handler)
@@ -190,12 +198,15 @@ async def save_user_question(
     # Получаем данные пользователя
     user = await user_service.get_user(user_id)
     
-    # Уведомляем админа
-    await notification_service.notify_admin_user_question(
-        user_id,
-        user.get("username") if user else message.from_user.username,
-        user.get("full_name") if user else message.from_user.full_name,
-        question_text
+    # Уведомляем админов в фоне: пользователю не нужно ждать отправки
+    task_supervisor.spawn(
+        notification_service.notify_admin_user_question(
+            user_id,
+            user.get("username") if user else message.from_user.username,
+            user.get("full_name") if user else message.from_user.full_name,
+            question_text
+        ),
+        name=f"notify-admins:question:{question_id}"
     )
     
     # Получаем ответ из базы данных
@@ -2,29 +2,31 @@
 from typing import Tuple
 from aiogram.types import InlineKeyboardMarkup, InlineKeyboardButton
 
+from bot.keyboards.callback_data import admin_cb
+
 
 def get_admin_panel_keyboard(pending_count: int = 0, pending_questions: int = 0) -> InlineKeyboardMarkup:
     """Главная панель администратора"""
     buttons = [
         [InlineKeyboardButton(
             text=f"📋 Заявки на рассмотрении ({pending_count})",
-            callback_data="admin_applications"
+            callback_data=admin_cb("applications")
         )],
         [InlineKeyboardButton(
             text=f"❓ Вопросы пользователей ({pending_questions})",
-            callback_data="admin_questions"
+            callback_data=admin_cb("questions")
         )],
         [InlineKeyboardButton(
             text="📊 Статистика",
-            callback_data="admin_stats"
+            callback_data=admin_cb("stats")
         )],
         [InlineKeyboardButton(
             text="✏️ Редактировать сообщения",
-            callback_data="admin_messages"
+            callback_data=admin_cb("messages")
         )],
         [InlineKeyboardButton(
             text="📌 Обновить закреп",
-            callback_data="admin_pin_subscribe"
+            callback_data=admin_cb("pin_subscribe")
         )],
         [InlineKeyboardButton(
             text="◀️ Вернуться в меню",
@@ -48,7 +50,7 @@ def get_applications_list_keyboard(
         user_id = app.get("user_id")
         buttons.append([InlineKeyboardButton(
             text=f"👤 {user_name} (ID: {user_id})",
-            callback_data=f"admin_view_application_{user_id}"
+            callback_data=admin_cb("view_application", user_id)
         )])
     
     # Пагинация
@@ -56,13 +58,13 @@ def get_applications_list_keyboard(
     if offset > 0:
         nav_buttons.append(InlineKeyboardButton(
             text="◀️ Назад",
-            callback_data=f"admin_applications_page_{offset - limit}"
+            callback_data=admin_cb("applications_page", offset - limit)
         ))
     
     if len(applications) == limit:
         nav_buttons.append(InlineKeyboardButton(
             text="Вперед ▶️",
-            callback_data=f"admin_applications_page_{offset + limit}"
+            callback_data=admin_cb("applications_page", offset + limit)
         ))
     
     if nav_buttons:
@@ -70,7 +72,7 @@ def get_applications_list_keyboard(
     
     buttons.append([InlineKeyboardButton(
         text="◀️ Назад в админ-панель",
-        callback_data="admin_panel"
+        callback_data=admin_cb("panel")
     )])
     
     return InlineKeyboardMarkup(inline_keyboard=buttons), applications
@@ -82,16 +84,16 @@ def get_application_action_keyboard(user_id: int) -> InlineKeyboardMarkup:
         [
             InlineKeyboardButton(
                 text="✅ Одобрить",
-                callback_data=f"admin_approve_{user_id}"
+                callback_data=admin_cb("approve", user_id)
             ),
             InlineKeyboardButton(
                 text="❌ Отклонить",
-                callback_data=f"admin_reject_{user_id}"
+                callback_data=admin_cb("reject", user_id)
             )
         ],
         [InlineKeyboardButton(
             text="◀️ Назад к заявкам",
-            callback_data="admin_applications"
+            callback_data=admin_cb("applications")
         )]
     ]
     
@@ -107,12 +109,12 @@ def get_messages_list_keyboard(messages: list) -> InlineKeyboardMarkup:
         description = msg.get("description", "Без описания")
         buttons.append([InlineKeyboardButton(
             text=f"✏️ {key} - {description}",
-            callback_data=f"admin_edit_message_{key}"
+            callback_data=admin_cb("edit_message", key)
         )])
     
     buttons.append([InlineKeyboardButton(
         text="◀️ Назад в админ-панель",
-        callback_data="admin_panel"
+        callback_data=admin_cb("panel")
     )])
     
     return InlineKeyboardMarkup(inline_keyboard=buttons)
@@ -123,19 +125,19 @@ def get_message_edit_keyboard(message_key: str) -> InlineKeyboardMarkup:
     buttons = [
         [InlineKeyboardButton(
             text="✏️ Редактировать текст",
-            callback_data=f"admin_message_edit_{message_key}"
+            callback_data=admin_cb("message_edit", message_key)
         )],
         [InlineKeyboardButton(
             text="👁️ Просмотреть текущий текст",
-            callback_data=f"admin_message_view_{message_key}"
+            callback_data=admin_cb("message_view", message_key)
         )],
         [InlineKeyboardButton(
             text="📜 История версий",
-            callback_data=f"admin_message_history_{message_key}"
+            callback_data=admin_cb("message_history", message_key)
         )],
         [InlineKeyboardButton(
             text="◀️ Назад к сообщениям",
-            callback_data="admin_messages"
+            callback_data=admin_cb("messages")
         )]
     ]
     
@@ -148,11 +150,11 @@ def get_message_edit_cancel_keyboard(message_key: str) -> InlineKeyboardMarkup:
         inline_keyboard=[
             [InlineKeyboardButton(
                 text="❌ Отменить редактирование",
-                callback_data=f"admin_message_cancel_{message_key}"
+                callback_data=admin_cb("message_cancel", message_key)
             )],
             [InlineKeyboardButton(
                 text="◀️ Назад к действиям",
-                callback_data=f"admin_edit_message_{message_key}"
+                callback_data=admin_cb("edit_message", message_key)
             )]
         ]
     )
@@ -164,11 +166,11 @@ def get_message_edit_confirm_keyboard(message_key: str) -> InlineKeyboardMarkup:
         [
             InlineKeyboardButton(
                 text="✅ Сохранить",
-                callback_data=f"admin_message_save_{message_key}"
+                callback_data=admin_cb("message_save", message_key)
             ),
             InlineKeyboardButton(
                 text="❌ Отменить",
-                callback_data=f"admin_edit_message_{message_key}"
+                callback_data=admin_cb("edit_message", message_key)
             )
         ]
     ]
@@ -194,12 +196,12 @@ def get_message_history_keyboard(message_key: str, history: list) -> InlineKeybo
         
         buttons.append([InlineKeyboardButton(
             text=f"📄 {created_at} - {content_preview}",
-            callback_data=f"admin_history_view_{history_id}"
+            callback_data=admin_cb("history_view", history_id)
         )])
     
     buttons.append([InlineKeyboardButton(
         text="◀️ Назад к сообщению",
-        callback_data=f"admin_edit_message_{message_key}"
+        callback_data=admin_cb("edit_message", message_key)
     )])
     
     return InlineKeyboardMarkup(inline_keyboard=buttons)
@@ -211,16 +213,16 @@ def get_history_item_keyboard(message_key: str, history_id: int) -> InlineKeyboa
         [
             InlineKeyboardButton(
                 text="✅ Восстановить эту версию",
-                callback_data=f"admin_history_restore_{history_id}"
+                callback_data=admin_cb("history_restore", history_id)
             )
         ],
         [InlineKeyboardButton(
             text="🗑️ Удалить из истории",
-            callback_data=f"admin_history_delete_{history_id}"
+            callback_data=admin_cb("history_delete", history_id)
         )],
         [InlineKeyboardButton(
             text="◀️ Назад к истории",
-            callback_data=f"admin_message_history_{message_key}"
+            callback_data=admin_cb("message_history", message_key)
         )]
     ]
     
@@ -242,7 +244,7 @@ def get_questions_list_keyboard(
         
         buttons.append([InlineKeyboardButton(
             text=f"❓ {user_name}: {question_text}",
-            callback_data=f"admin_view_question_{question_id}"
+            callback_data=admin_cb("view_question", question_id)
         )])
     
     # Пагинация
@@ -250,13 +252,13 @@ def get_questions_list_keyboard(
     if offset > 0:
         nav_buttons.append(InlineKeyboardButton(
             text="◀️ Назад",
-            callback_data=f"admin_questions_page_{offset - limit}"
+            callback_data=admin_cb("questions_page", offset - limit)
         ))
     
     if len(questions) == limit:
         nav_buttons.append(InlineKeyboardButton(
             text="Вперед ▶️",
-            callback_data=f"admin_questions_page_{offset + limit}"
+            callback_data=admin_cb("questions_page", offset + limit)
         ))
     
     if nav_buttons:
@@ -264,7 +266,7 @@ def get_questions_list_keyboard(
     
     buttons.append([InlineKeyboardButton(
         text="◀️ Назад в админ-панель",
-        callback_data="admin_panel"
+        callback_data=admin_cb("panel")
     )])
     
     return InlineKeyboardMarkup(inline_keyboard=buttons)
@@ -275,11 +277,11 @@ def get_question_action_keyboard(question_id: int) -> InlineKeyboardMarkup:
     buttons = [
         [InlineKeyboardButton(
             text="💬 Ответить на вопрос",
-            callback_data=f"admin_answer_question_{question_id}"
+            callback_data=admin_cb("answer_question", question_id)
         )],
         [InlineKeyboardButton(
             text="◀️ Назад к вопросам",
-            callback_data="admin_questions"
+            callback_data=admin_cb("questions")
         )]
     ]
     
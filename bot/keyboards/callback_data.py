@@ -0,0 +1,24 @@
+"""Данные нажатий кнопок"""
+from typing import Optional
+
+from aiogram.filters.callback_data import CallbackData
+
+
+class AdminCallback(CallbackData, prefix="adm"):
+    """Кнопка админ-панели: действие и его аргумент.
+
+    Упаковывается в "adm:<action>:<arg>", например "adm:approve:123";
+    arg — id заявки или вопроса, ключ сообщения или смещение страницы.
+    """
+
+    action: str
+    arg: Optional[str] = None
+
+    @property
+    def int_arg(self) -> int:
+        return int(self.arg)
+
+
+def admin_cb(action: str, arg: Optional[object] = None) -> str:
+    """callback_data кнопки админ-панели"""
+    return AdminCallback(action=action, arg=None if arg is None else str(arg)).pack()
@@ -1,5 +1,6 @@
 """Клавиатуры для пользователей"""
 from aiogram.types import InlineKeyboardMarkup, InlineKeyboardButton
+from bot.keyboards.callback_data import admin_cb
 from config.settings import settings
 
 
@@ -19,7 +20,7 @@ def get_start_keyboard(include_admin_panel: bool = False) -> InlineKeyboardMarku
     if include_admin_panel:
         buttons.append([InlineKeyboardButton(
             text="⚙️ Админ-панель",
-            callback_data="admin_panel"
+            callback_data=admin_cb("panel")
         )])
 
     return InlineKeyboardMarkup(inline_keyboard=buttons)
@@ -49,7 +50,7 @@ def get_after_form_keyboard(include_admin_panel: bool = False) -> InlineKeyboard
     if include_admin_panel:
         buttons.append([InlineKeyboardButton(
             text="⚙️ Админ-панель",
-            callback_data="admin_panel"
+            callback_data=admin_cb("panel")
         )])
 
     return InlineKeyboardMarkup(inline_keyboard=buttons)
@@ -75,7 +76,7 @@ def get_main_menu_keyboard(include_admin_panel: bool = False) -> InlineKeyboardM
     if include_admin_panel:
         buttons.append([InlineKeyboardButton(
             text="⚙️ Админ-панель",
-            callback_data="admin_panel"
+            callback_data=admin_cb("panel")
         )])
 
     return InlineKeyboardMarkup(inline_keyboard=buttons)
@@ -93,7 +94,7 @@ def get_back_to_menu_keyboard(include_admin_panel: bool = False) -> InlineKeyboa
     if include_admin_panel:
         buttons.append([InlineKeyboardButton(
             text="⚙️ Админ-панель",
-            callback_data="admin_panel"
+            callback_data=admin_cb("panel")
         )])
     
     return InlineKeyboardMarkup(inline_keyboard=buttons)
\ No newline at end of file
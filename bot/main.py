@@ -1,11 +1,15 @@
 """Главный файл запуска бота"""
 import asyncio
 import logging
-from aiogram import Bot, Dispatcher, BaseMiddleware
+from aiogram import Bot, Dispatcher
 from aiogram.client.default import DefaultBotProperties
 from aiogram.enums import ParseMode
+from aiogram.fsm.storage.memory import DisabledEventIsolation
 from aiogram.fsm.storage.redis import RedisStorage
+from aiogram.webhook.aiohttp_server import SimpleRequestHandler, setup_application
+from aiohttp import web
 from apscheduler.schedulers.asyncio import AsyncIOScheduler
+from redis.asyncio import Redis
 
 from config.settings import settings
 from bot.database.models import Database
@@ -15,47 +19,312 @@ from bot.services.notification_service import NotificationService
 from bot.services.reminder_service import ReminderService
 from bot.services.message_service import MessageService
 from bot.services.question_service import QuestionService
-from bot.middlewares.logging_middleware import LoggingMiddleware
+from bot.services.container import ServiceContainer
+from bot.services.task_supervisor import TaskSupervisor
+from bot.services.leader_election import LeaderElection
+from bot.services.update_stream import (
+    StreamRequestHandler,
+    UpdateStreamConsumer,
+    UpdateStreamProducer,
+)
+from bot.middlewares.update_context_middleware import UpdateContextMiddleware
+from bot.middlewares.concurrency_middleware import ConcurrencyMiddleware
+from bot.middlewares.fsm_cache_middleware import FSMCacheMiddleware
+from bot.middlewares.callback_answer_middleware import CallbackAnswerMiddleware
+from bot.middlewares.api_metrics_middleware import ApiMetricsMiddleware
+from bot.middlewares.idempotency_middleware import IdempotencyMiddleware
+from bot.middlewares.throttling_middleware import ThrottlingMiddleware
+from bot.utils.shutdown import ShutdownCoordinator
+from bot.utils.startup import StartupProfiler
+from bot.utils.rate_limit import MemoryBucketStore, RedisBucketStore
+from bot.utils.fsm_storage import CompactRedisStorage, SQLiteStorage
+from bot.utils.event_isolation import InstrumentedRedisEventIsolation
+from bot.utils.runtime import create_session, install_uvloop
+from bot.utils.telegram_utils import edit_cache
+from bot.utils.log_setup import setup_logging
+from bot.utils.metrics import registry, start_metrics_server
 from bot.handlers import user_handlers, admin_handlers, common_handlers
 
 
-# Настройка логирования
-logging.basicConfig(
-    level=logging.INFO,
-    format='%(asctime)s - %(name)s - %(levelname)s - %(message)s'
-)
 logger = logging.getLogger(__name__)
 
 
+async def run_polling(dp: Dispatcher, bot: Bot, shutdown: ShutdownCoordinator):
+    """Получение обновлений через long polling"""
+    # Telegram не отдаёт getUpdates, пока установлен webhook
+    await bot.delete_webhook()
+    polling = asyncio.create_task(dp.start_polling(
+        bot,
+        allowed_updates=dp.resolve_used_update_types(),
+        handle_signals=False,
+        close_bot_session=False
+    ))
+    
+    async def stop_polling():
+        if not polling.done():
+            await dp.stop_polling()
+        await asyncio.gather(polling, return_exceptions=True)
+    
+    shutdown.on_stop(stop_polling)
+    await shutdown.wait(polling)
+
+
+async def run_webhook(
+    dp: Dispatcher,
+    bot: Bot,
+    shutdown: ShutdownCoordinator,
+    stream_redis=None
+):
+    """Получение обновлений через webhook на встроенном aiohttp-сервере
+
+    Если передан stream_redis, обновления не обрабатываются на месте,
+    а складываются в Redis Streams для воркеров (режим stream_receiver).
+    """
+    if not settings.WEBHOOK_BASE_URL:
+        raise RuntimeError("WEBHOOK_BASE_URL is required for webhook mode")
+    if not settings.WEBHOOK_SECRET:
+        logger.warning("WEBHOOK_SECRET не задан: запросы к webhook не проверяются")
+    
+    app = web.Application()
+    if stream_redis is None:
+        SimpleRequestHandler(
+            dispatcher=dp,
+            bot=bot,
+            secret_token=settings.WEBHOOK_SECRET or None
+        ).register(app, path=settings.WEBHOOK_PATH)
+    else:
+        producer = UpdateStreamProducer(
+            stream_redis,
+            prefix=settings.UPDATE_STREAM_PREFIX,
+            partitions=settings.UPDATE_STREAM_PARTITIONS,
+            maxlen=settings.UPDATE_STREAM_MAXLEN
+        )
+        StreamRequestHandler(
+            producer,
+            secret_token=settings.WEBHOOK_SECRET or None
+        ).register(app, path=settings.WEBHOOK_PATH)
+    setup_application(app, dp, bot=bot)
+    
+    runner = web.AppRunner(app, handle_signals=False)
+    await runner.setup()
+    site = web.TCPSite(runner, settings.WEBAPP_HOST, settings.WEBAPP_PORT)
+    await site.start()
+    # Сначала перестаём принимать соединения, сервер закрывается после дренажа
+    shutdown.on_stop(site.stop)
+    shutdown.on_close(runner.cleanup)
+    
+    await bot.set_webhook(
+        settings.webhook_url,
+        secret_token=settings.WEBHOOK_SECRET or None,
+        allowed_updates=dp.resolve_used_update_types()
+    )
+    logger.info(
+        "Webhook слушает %s:%s%s",
+        settings.WEBAPP_HOST,
+        settings.WEBAPP_PORT,
+        settings.WEBHOOK_PATH
+    )
+    
+    await shutdown.wait()
+
+
+async def run_stream_worker(
+    dp: Dispatcher,
+    bot: Bot,
+    shutdown: ShutdownCoordinator,
+    redis
+):
+    """Обработка обновлений из Redis Streams в составе группы воркеров"""
+    consumer = UpdateStreamConsumer(
+        redis,
+        dp,
+        bot,
+        prefix=settings.UPDATE_STREAM_PREFIX,
+        partitions=settings.UPDATE_STREAM_PARTITIONS,
+        group=settings.UPDATE_STREAM_GROUP,
+        batch_size=settings.UPDATE_STREAM_BATCH_SIZE,
+        claim_idle_ms=settings.UPDATE_STREAM_CLAIM_IDLE_MS,
+        max_partitions=settings.UPDATE_STREAM_MAX_PARTITIONS,
+        max_attempts=settings.UPDATE_STREAM_MAX_ATTEMPTS,
+        lease_seconds=settings.LEADER_LEASE_SECONDS,
+        renew_interval=settings.LEADER_RENEW_INTERVAL
+    )
+    logger.info("Воркер потока обновлений %s запущен", consumer.consumer_name)
+    registry.add_stats("update_stream", lambda: consumer.stats)
+    
+    await dp.emit_startup(bot=bot)
+    worker = asyncio.create_task(consumer.run())
+    
+    async def stop_worker():
+        worker.cancel()
+        await asyncio.gather(worker, return_exceptions=True)
+        await dp.emit_shutdown(bot=bot)
+    
+    # Воркер дочитывает начатые записи, затем отпускает партиции
+    shutdown.on_drain(consumer.drain)
+    shutdown.on_close(stop_worker)
+    await shutdown.wait(worker)
+
+
 async def main():
     """Главная функция запуска бота"""
-    # Инициализация базы данных
-    db = Database(settings.DATABASE_PATH)
-    await db.init_db()
-    logger.info("База данных инициализирована")
+    if settings.BOT_MODE not in ("polling", "webhook", "stream_receiver", "stream_worker"):
+        raise ValueError(f"Unknown BOT_MODE: {settings.BOT_MODE}")
+    if settings.FSM_STORAGE not in ("redis", "sqlite"):
+        raise ValueError(f"Unknown FSM_STORAGE: {settings.FSM_STORAGE}")
+    if settings.EVENT_ISOLATION not in ("auto", "memory", "redis", "none"):
+        raise ValueError(f"Unknown EVENT_ISOLATION: {settings.EVENT_ISOLATION}")
     
-    # Инициализация Redis для FSM
-    storage = RedisStorage.from_url(settings.redis_url)
+    # Несколько реплик или воркеров Redis Streams
+    multi_process = settings.LEADER_ELECTION_ENABLED or settings.BOT_MODE.startswith("stream_")
+    if settings.FSM_STORAGE == "sqlite" and multi_process:
+        # Состояния в памяти одного процесса не видны другим репликам
+        raise ValueError("FSM_STORAGE=sqlite supports a single bot process only")
+    isolation_mode = settings.EVENT_ISOLATION
+    if isolation_mode == "auto":
+        isolation_mode = "redis" if multi_process else "memory"
     
-    # Инициализация бота и диспетчера
+    # SIGTERM/SIGINT запускают штатную остановку с дренажем начатой работы
+    shutdown = ShutdownCoordinator(settings.SHUTDOWN_TIMEOUT)
+    shutdown.install_signal_handlers()
+    
+    profiler = StartupProfiler()
+    
+    # Объекты создаются без сетевых обращений: соединения с Redis
+    # и Telegram открываются лениво при первом запросе
+    db = Database(settings.DATABASE_PATH)
+    # Redis нужен для FSM (FSM_STORAGE=redis), выбора лидера, Redis Streams
+    # и блокировок чатов между процессами; небольшой установке с FSM
+    # в SQLite он не нужен вовсе
+    needs_redis = (
+        settings.FSM_STORAGE == "redis"
+        or multi_process
+        or isolation_mode == "redis"
+    )
+    redis = Redis.from_url(settings.redis_url) if needs_redis else None
+    if settings.FSM_STORAGE == "sqlite":
+        storage = SQLiteStorage(
+            db,
+            flush_interval=settings.FSM_FLUSH_INTERVAL,
+            ttl=settings.FSM_STATE_TTL
+        )
+    else:
+        storage = CompactRedisStorage(
+            redis,
+            state_ttl=settings.FSM_STATE_TTL,
+            data_ttl=settings.FSM_DATA_TTL
+        )
+    # Обработчики событий одного чата (двойное нажатие кнопки) выполняются
+    # по очереди. В пределах процесса это уже делает блокировка чата
+    # в ConcurrencyMiddleware, вторая блокировка в памяти не нужна;
+    # между репликами и воркерами — блокировка в Redis
+    if isolation_mode == "redis":
+        events_isolation = InstrumentedRedisEventIsolation(
+            redis,
+            timeout=settings.EVENT_LOCK_TIMEOUT
+        )
+    else:
+        events_isolation = DisabledEventIsolation()
     bot = Bot(
         token=settings.BOT_TOKEN,
+        session=create_session(
+            fast=settings.FAST_RUNTIME,
+            limit=settings.TELEGRAM_POOL_SIZE,
+            limit_per_host=settings.TELEGRAM_POOL_PER_HOST,
+            keepalive_timeout=settings.TELEGRAM_KEEPALIVE_TIMEOUT,
+            ttl_dns_cache=settings.TELEGRAM_DNS_CACHE_TTL,
+            method_timeouts=settings.TELEGRAM_METHOD_TIMEOUTS,
+            timeout=settings.TELEGRAM_REQUEST_TIMEOUT
+        ),
         default=DefaultBotProperties(parse_mode=ParseMode.HTML)
     )
-    dp = Dispatcher(storage=storage)
     
-    # Инициализация сервисов
-    user_service = UserService(db)
-    application_service = ApplicationService(db)
-    message_service = MessageService(db)
-    notification_service = NotificationService(bot, db, message_service)
-    question_service = QuestionService(db)
+    async def init_database() -> bool:
+        updated = await db.init_db()
+        if isinstance(storage, SQLiteStorage):
+            restored = await storage.load()
+            storage.start()
+            logger.info("Восстановлено состояний FSM из SQLite: %s", restored)
+        return updated
     
-    # Инициализация планировщика
-    scheduler = AsyncIOScheduler()
-    scheduler.start()
+    # Схема БД, соединение с Redis и профиль бота независимы друг от друга,
+    # поэтому прогреваются одновременно. bot.me() кэширует ответ getMe,
+    # и aiogram не запрашивает его повторно при старте polling
+    phases = {"database": init_database(), "telegram": bot.me()}
+    if redis is not None:
+        phases["redis"] = redis.ping()
+    try:
+        results = await profiler.gather(**phases)
+    except Exception:
+        await storage.close()
+        if redis is not None:
+            await redis.aclose()
+        await bot.session.close()
+        raise
+    logger.info(
+        "База данных %s, бот @%s",
+        "обновлена" if results["database"] else "уже актуальна",
+        results["telegram"].username
+    )
+    
+    with profiler.phase("dispatcher"):
+        dp = Dispatcher(storage=storage, events_isolation=events_isolation)
+        # Хранилище FSM закрывается после дренажа обработчиков, а не сразу
+        # при остановке polling/webhook, как это делает aiogram по умолчанию
+        dp.shutdown.handlers = [
+            handler for handler in dp.shutdown.handlers
+            if handler.callback != dp.fsm.close
+        ]
+    
+    with profiler.phase("services"):
+        # Инициализация сервисов
+        # Сервисы, нужные только хендлерам, создаются при первом обновлении
+        services = ServiceContainer()
+        services.register("user_service", lambda: UserService(db))
+        services.register("application_service", lambda: ApplicationService(db))
+        services.register("question_service", lambda: QuestionService(db))
+        message_service = services.add("message_service", MessageService(db))
+        notification_service = services.add(
+            "notification_service", NotificationService(bot, db, message_service)
+        )
+        
+        # Инициализация планировщика
+        scheduler = AsyncIOScheduler()
+        
+        reminder_service = ReminderService(
+            scheduler,
+            db,
+            notification_service,
+            message_service=message_service
+        )
+        reminder_service.start()
+        services.add("reminder_service", reminder_service)
+        # Отправки, которых хендлеру не нужно дожидаться
+        task_supervisor = services.add("task_supervisor", TaskSupervisor(
+            limit=settings.BACKGROUND_TASK_LIMIT,
+            max_queued=settings.BACKGROUND_TASK_QUEUE
+        ))
     
-    reminder_service = ReminderService(scheduler, db, notification_service)
+    # При нескольких репликах задачи планировщика выполняет только лидер.
+    # В режимах Redis Streams процессов заведомо несколько, поэтому
+    # выбор лидера включается всегда
+    leader_election = None
+    if multi_process:
+        scheduler.start(paused=True)
+        leader_election = LeaderElection(
+            redis,
+            key=settings.LEADER_LOCK_KEY,
+            lease_seconds=settings.LEADER_LEASE_SECONDS,
+            renew_interval=settings.LEADER_RENEW_INTERVAL
+        )
+        # Новый лидер заново загружает напоминания из БД
+        leader_election.on_elected(reminder_service.reset)
+        leader_election.on_elected(scheduler.resume)
+        leader_election.on_demoted(scheduler.pause)
+        leader_election.on_demoted(reminder_service.reset)
+        leader_election.start()
+    else:
+        scheduler.start()
     
     # Регистрация роутеров
     # Важно: common_handlers должен быть первым, чтобы reply-кнопки обрабатывались раньше состояний
@@ -63,35 +332,138 @@ async def main():
     dp.include_router(admin_handlers.router)
     dp.include_router(user_handlers.router)
     
-    # Регистрация middleware для логирования
-    dp.message.middleware(LoggingMiddleware())
-    dp.callback_query.middleware(LoggingMiddleware())
-    
-    # Dependency injection для handlers через FSM context
-    class DependencyMiddleware(BaseMiddleware):
-        """Middleware для внедрения зависимостей"""
-        async def __call__(self, handler, event, data):
-            data["user_service"] = user_service
-            data["application_service"] = application_service
-            data["notification_service"] = notification_service
-            data["reminder_service"] = reminder_service
-            data["message_service"] = message_service
-            data["question_service"] = question_service
-            return await handler(event, data)
-    
-    dp.message.middleware(DependencyMiddleware())
-    dp.callback_query.middleware(DependencyMiddleware())
+    # Обновления разных чатов обрабатываются параллельно с общим лимитом,
+    # обновления одного чата — по очереди
+    concurrency = ConcurrencyMiddleware(settings.UPDATE_CONCURRENCY)
+    # FSMContextMiddleware переносится за блокировку чата, чтобы состояние
+    # читалось уже после завершения предыдущего обновления того же чата.
+    # Затем FSMContext заменяется кэшируемым: состояние читается один раз
+    # за обновление, записи без изменений пропускаются
+    fsm_cache = FSMCacheMiddleware()
+    dp.update.outer_middleware.unregister(dp.fsm)
+    # Сервисы для хендлеров, логирование и время обработки — одним проходом
+    # до остальных middleware, чтобы в замер входило ожидание блокировок
+    update_context = UpdateContextMiddleware(services)
+    dp.update.outer_middleware(update_context)
+    # Хендлер получает только свои сервисы, фабрики не вызываются заранее
+    dp.message.middleware(update_context.injector)
+    dp.callback_query.middleware(update_context.injector)
+    if settings.THROTTLE_RATE > 0:
+        # Лишние обновления отбрасываются раньше блокировок и чтения FSM
+        throttling = ThrottlingMiddleware(
+            RedisBucketStore(redis) if multi_process else MemoryBucketStore(),
+            rate=settings.THROTTLE_RATE,
+            burst=settings.THROTTLE_BURST,
+            command_limits=settings.THROTTLE_COMMAND_LIMITS
+        )
+        dp.update.outer_middleware(throttling)
+    dp.update.outer_middleware(concurrency)
+    dp.update.outer_middleware(dp.fsm)
+    dp.update.outer_middleware(fsm_cache)
     
+    # Кнопка перестаёт крутиться не позже CALLBACK_ANSWER_DEADLINE,
+    # повторные ответы хендлеров на тот же callback не уходят в Telegram
+    callback_answers = CallbackAnswerMiddleware(settings.CALLBACK_ANSWER_DEADLINE)
+    dp.callback_query.middleware(callback_answers)
+    bot.session.middleware(callback_answers.guard)
+    # Последним: учитываются только запросы, ушедшие в Telegram
+    bot.session.middleware(ApiMetricsMiddleware())
+    
+    # Повторные нажатия кнопок с флагом idempotent отбрасываются;
+    # при нескольких процессах ключи нажатий общие, в Redis
+    idempotency = IdempotencyMiddleware(
+        ttl=settings.IDEMPOTENCY_TTL,
+        redis=redis if multi_process else None
+    )
+    dp.callback_query.middleware(idempotency)
+    
+    # Счётчики компонентов отдаются в /metrics вместе с временем
+    # обновлений, запросов к БД и вызовов Bot API
+    registry.add_stats("concurrency", lambda: concurrency.stats)
+    registry.add_stats("fsm_cache", lambda: fsm_cache.stats)
+    registry.add_stats("callback_answers", lambda: callback_answers.stats)
+    registry.add_stats("idempotency", lambda: idempotency.stats)
+    registry.add_stats("edit_cache", lambda: edit_cache.stats)
+    registry.add_stats("background_tasks", lambda: task_supervisor.stats)
+    registry.add_stats("bot_session", lambda: bot.session.stats)
+    if settings.THROTTLE_RATE > 0:
+        registry.add_stats("throttling", lambda: throttling.stats)
+    if isinstance(storage, SQLiteStorage):
+        registry.add_stats("fsm_storage", lambda: storage.stats)
+    if isolation_mode == "redis":
+        registry.add_stats("event_isolation", lambda: events_isolation.stats)
+    metrics_runner = None
+    if settings.METRICS_PORT:
+        metrics_runner = await start_metrics_server(settings.METRICS_HOST, settings.METRICS_PORT)
+    
+    profiler.log_report()
     logger.info("Бот запущен")
     
+    # Новые тики напоминаний не запускаются, текущий дорабатывает до конца;
+    # отправленные напоминания отмечаются в БД внутри тика, поэтому
+    # состояние планировщика после дренажа уже сохранено
+    shutdown.on_stop(scheduler.pause)
+    shutdown.on_drain(concurrency.wait_idle)
+    shutdown.on_drain(reminder_service.drain)
+    
+    async def drain_background_tasks(timeout: float) -> bool:
+        # Фоновые задачи запускают хендлеры, поэтому их ждут после хендлеров
+        loop = asyncio.get_running_loop()
+        deadline = loop.time() + timeout
+        await concurrency.wait_idle(timeout)
+        return await task_supervisor.drain(max(0.0, deadline - loop.time()))
+    
+    shutdown.on_drain(drain_background_tasks)
+    if isinstance(storage, SQLiteStorage):
+        # Состояния, изменённые обработчиками при дренаже, пишутся на диск
+        shutdown.on_flush(storage.flush)
+    
     # Запуск бота
     try:
-        await dp.start_polling(bot, allowed_updates=dp.resolve_used_update_types())
+        if settings.BOT_MODE == "webhook":
+            await run_webhook(dp, bot, shutdown)
+        elif settings.BOT_MODE == "stream_receiver":
+            await run_webhook(dp, bot, shutdown, stream_redis=redis)
+        elif settings.BOT_MODE == "stream_worker":
+            await run_stream_worker(dp, bot, shutdown, redis)
+        else:
+            await run_polling(dp, bot, shutdown)
     finally:
-        await bot.session.close()
-        scheduler.shutdown()
-
+        if leader_election:
+            shutdown.on_close(leader_election.stop)
+        shutdown.on_close(task_supervisor.close)
+        shutdown.on_close(storage.close)
+        if redis is not None and not isinstance(storage, RedisStorage):
+            shutdown.on_close(redis.aclose)
+        shutdown.on_close(lambda: logger.info("Сессия Bot API: %s", bot.session.stats))
+        shutdown.on_close(lambda: logger.info("Правки сообщений: %s", edit_cache.stats))
+        shutdown.on_close(lambda: logger.info("Обработка обновлений: %s", update_context.stats))
+        shutdown.on_close(lambda: logger.info("Фоновые задачи: %s", task_supervisor.stats))
+        if isolation_mode == "redis":
+            shutdown.on_close(
+                lambda: logger.info("Блокировки чатов: %s", events_isolation.stats)
+            )
+        shutdown.on_close(events_isolation.close)
+        shutdown.on_close(bot.session.close)
+        shutdown.on_close(lambda: scheduler.shutdown(wait=False))
+        if metrics_runner is not None:
+            shutdown.on_close(metrics_runner.cleanup)
+        await shutdown.shutdown()
+        shutdown.remove_signal_handlers()
 
 if __name__ == "__main__":
-    asyncio.run(main())
+    # Политика цикла событий должна быть установлена до его создания
+    if settings.FAST_RUNTIME:
+        install_uvloop()
+    # Записи форматируются и пишутся отдельным потоком, а не циклом событий
+    log_listener = setup_logging(
+        level=settings.LOG_LEVEL,
+        fmt=settings.LOG_FORMAT,
+        sample_rates=settings.LOG_SAMPLE_RATES,
+        redact_text=settings.LOG_REDACT_TEXT
+    )
+    try:
+        asyncio.run(main())
+    finally:
+        log_listener.stop()
 
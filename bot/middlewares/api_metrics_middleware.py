@@ -0,0 +1,42 @@
+"""Middleware сессии для учёта вызовов Bot API"""
+import time
+
+from aiogram import Bot
+from aiogram.client.session.middlewares.base import BaseRequestMiddleware, NextRequestMiddlewareType
+from aiogram.methods import TelegramMethod
+from aiogram.methods.base import TelegramType
+
+from bot.utils.metrics import TELEGRAM_CALL_DURATION, TELEGRAM_CALLS
+
+
+class ApiMetricsMiddleware(BaseRequestMiddleware):
+    """Время и исход каждого запроса к Bot API.
+
+    Регистрируется на сессии бота последним, чтобы учитывались только
+    запросы, действительно ушедшие в Telegram:
+
+        bot.session.middleware(callback_answers.guard)
+        bot.session.middleware(ApiMetricsMiddleware())
+
+    Каждая попытка send_with_retry — отдельный запрос; паузы между
+    попытками и ожидание RetryAfter не учитываются. Метка method — класс метода Bot API
+    (SendMessage, AnswerCallbackQuery), одинаковый для bot.send_message
+    и message.answer; вызовы в обход send_with_retry тоже учитываются.
+    """
+
+    async def __call__(
+        self,
+        make_request: NextRequestMiddlewareType[TelegramType],
+        bot: Bot,
+        method: TelegramMethod[TelegramType]
+    ) -> TelegramType:
+        name = type(method).__name__
+        started = time.perf_counter()
+        status = "error"
+        try:
+            result = await make_request(bot, method)
+            status = "ok"
+            return result
+        finally:
+            TELEGRAM_CALL_DURATION.observe(time.perf_counter() - started, method=name)
+            TELEGRAM_CALLS.inc(method=name, status=status)
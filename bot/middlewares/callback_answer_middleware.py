@@ -0,0 +1,154 @@
+"""Middleware для раннего ответа на нажатия кнопок"""
+import asyncio
+import logging
+from typing import Any, Awaitable, Callable, Dict, Set
+
+from aiogram import BaseMiddleware, Bot
+from aiogram.client.session.middlewares.base import BaseRequestMiddleware, NextRequestMiddlewareType
+from aiogram.dispatcher.flags import get_flag
+from aiogram.exceptions import TelegramAPIError
+from aiogram.methods import AnswerCallbackQuery, TelegramMethod
+from aiogram.methods.base import TelegramType
+from aiogram.types import CallbackQuery, TelegramObject
+
+
+logger = logging.getLogger(__name__)
+
+
+class CallbackAnswerMiddleware(BaseMiddleware):
+    """Ответ на callback не позже deadline секунд от начала обработки.
+
+    Регистрируется на dp.callback_query как inner-middleware, а его
+    guard — на сессии бота:
+
+        answers = CallbackAnswerMiddleware(deadline=0.3)
+        dp.callback_query.middleware(answers)
+        bot.session.middleware(answers.guard)
+
+    Если хендлер сам ответил до срока, пользователь видит его текст;
+    иначе по истечении deadline отправляется пустой ответ, и кнопка
+    перестаёт крутиться, пока хендлер работает дальше. Повторный ответ
+    на тот же callback guard не отправляет в Telegram, поэтому
+    callback.answer() в конце хендлера остаётся безопасным. deadline=0 —
+    ответ сразу, до хендлера.
+
+    Хендлеры с всплывающими сообщениями (show_alert) помечаются флагом
+    deferred_answer: им срок не ставится, а пустой ответ отправляется,
+    только если хендлер так и не ответил. Всплывающее сообщение хендлера
+    без флага, опоздавшее к сроку, пропадает: оно пишется в лог
+    и считается в stats["alerts_dropped"].
+    """
+
+    def __init__(self, deadline: float = 0.3):
+        self.deadline = deadline
+        self.guard = _AnswerGuard()
+        self._early = 0
+        self._by_handler = 0
+        self._after_handler = 0
+
+    @property
+    def stats(self) -> Dict[str, int]:
+        """Кто ответил на callback: middleware по сроку, хендлер или middleware после него"""
+        return {
+            "answered_early": self._early,
+            "answered_by_handler": self._by_handler,
+            "answered_after_handler": self._after_handler,
+            "alerts_dropped": self.guard.alerts_dropped,
+        }
+
+    async def __call__(
+        self,
+        handler: Callable[[TelegramObject, Dict[str, Any]], Awaitable[Any]],
+        event: TelegramObject,
+        data: Dict[str, Any]
+    ) -> Any:
+        if not isinstance(event, CallbackQuery):
+            return await handler(event, data)
+
+        bot: Bot = data["bot"]
+        self.guard.track(event.id)
+        timer = None
+        if not get_flag(data, "deferred_answer"):
+            if self.deadline <= 0:
+                await self._answer(bot, event.id)
+            else:
+                timer = asyncio.create_task(self._answer_later(bot, event.id))
+        try:
+            return await handler(event, data)
+        finally:
+            if timer is not None:
+                if event.id in self.guard.auto_answered:
+                    # Ответ по сроку уже отправляется — дожидаемся его
+                    await timer
+                else:
+                    timer.cancel()
+            if not self.guard.is_answered(event.id):
+                # Хендлер не ответил (или упал) — кнопка не должна крутиться
+                await self._answer(bot, event.id)
+                self._after_handler += 1
+            elif event.id in self.guard.auto_answered:
+                self._early += 1
+            else:
+                self._by_handler += 1
+            self.guard.forget(event.id)
+
+    async def _answer_later(self, bot: Bot, callback_id: str):
+        await asyncio.sleep(self.deadline)
+        await self._answer(bot, callback_id)
+
+    async def _answer(self, bot: Bot, callback_id: str):
+        if self.guard.is_answered(callback_id):
+            return
+        self.guard.auto_answered.add(callback_id)
+        try:
+            await bot(AnswerCallbackQuery(callback_query_id=callback_id))
+        except TelegramAPIError as exc:
+            # Ответ не критичен: запрос мог устареть, пока ждал очереди
+            logger.warning("Не удалось ответить на callback %s: %s", callback_id, exc)
+
+
+class _AnswerGuard(BaseRequestMiddleware):
+    """Не пропускает в Telegram повторный ответ на отслеживаемый callback"""
+
+    def __init__(self):
+        # Callback в обработке -> был ли на него ответ
+        self._tracked: Dict[str, bool] = {}
+        # Callback, на которые ответил сам middleware
+        self.auto_answered: Set[str] = set()
+        self.alerts_dropped = 0
+
+    def track(self, callback_id: str):
+        self._tracked[callback_id] = False
+
+    def forget(self, callback_id: str):
+        self._tracked.pop(callback_id, None)
+        self.auto_answered.discard(callback_id)
+
+    def is_answered(self, callback_id: str) -> bool:
+        return self._tracked.get(callback_id, False)
+
+    async def __call__(
+        self,
+        make_request: NextRequestMiddlewareType[TelegramType],
+        bot: Bot,
+        method: TelegramMethod[TelegramType]
+    ) -> TelegramType:
+        if isinstance(method, AnswerCallbackQuery) and method.callback_query_id in self._tracked:
+            if self._tracked[method.callback_query_id]:
+                if method.show_alert and method.callback_query_id in self.auto_answered:
+                    # Хендлер без deferred_answer не успел к сроку
+                    self.alerts_dropped += 1
+                    logger.warning(
+                        "Всплывающее сообщение на callback %s не показано, "
+                        "нужен флаг deferred_answer: %r",
+                        method.callback_query_id, method.text
+                    )
+                else:
+                    logger.debug(
+                        "Повторный ответ на callback %s пропущен: %r",
+                        method.callback_query_id, method.text
+                    )
+                return True
+            # Отмечается до запроса: параллельный ответ уже не пройдёт
+            self._tracked[method.callback_query_id] = True
+        return await make_request(bot, method)
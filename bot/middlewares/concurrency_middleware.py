@@ -0,0 +1,112 @@
+"""Middleware для ограничения параллельной обработки обновлений"""
+import asyncio
+import time
+from contextlib import nullcontext
+from typing import Any, Awaitable, Callable, Dict, Optional
+
+from aiogram import BaseMiddleware
+from aiogram.types import TelegramObject
+
+
+class ConcurrencyMiddleware(BaseMiddleware):
+    """Параллельная обработка обновлений разных чатов с общим лимитом.
+
+    Регистрируется как outer-middleware на dp.update. Обновления одного
+    чата выполняются строго по очереди (блокировка на чат), обновления
+    разных чатов — параллельно, но не больше max_concurrency одновременно.
+    Ожидающие своей очереди в чате не занимают слот общего лимита.
+    Счётчик обновлений в работе используется при остановке бота (wait_idle).
+    """
+
+    def __init__(self, max_concurrency: int = 32):
+        if max_concurrency < 0:
+            raise ValueError("max_concurrency must not be negative")
+
+        self.max_concurrency = max_concurrency
+        # 0 — без общего лимита: остаются порядок по чатам и учёт обновлений
+        self._semaphore = (
+            asyncio.Semaphore(max_concurrency) if max_concurrency else nullcontext()
+        )
+        # Блокировка чата и число обновлений, которые её держат или ждут
+        self._chat_locks: Dict[int, list] = {}
+        self._idle = asyncio.Event()
+        self._idle.set()
+
+        self._in_flight = 0
+        self._waiting = 0
+        self._max_in_flight = 0
+        self._processed = 0
+        self._wait_total = 0.0
+        self._wait_max = 0.0
+
+    @property
+    def stats(self) -> Dict[str, float]:
+        """Глубина параллелизма и время ожидания в очереди"""
+        return {
+            "in_flight": self._in_flight,
+            "waiting": self._waiting,
+            "max_in_flight": self._max_in_flight,
+            "processed": self._processed,
+            "queue_wait_avg": self._wait_total / self._processed if self._processed else 0.0,
+            "queue_wait_max": self._wait_max,
+        }
+
+    async def wait_idle(self, timeout: Optional[float] = None) -> bool:
+        """Ожидание завершения всех обновлений, False — если не дождались"""
+        # Даём стартовать задачам обновлений, созданным перед остановкой
+        await asyncio.sleep(0)
+        try:
+            await asyncio.wait_for(self._idle.wait(), timeout)
+            return True
+        except asyncio.TimeoutError:
+            return False
+
+    async def __call__(
+        self,
+        handler: Callable[[TelegramObject, Dict[str, Any]], Awaitable[Any]],
+        event: TelegramObject,
+        data: Dict[str, Any]
+    ) -> Any:
+        chat = data.get("event_chat")
+        user = data.get("event_from_user")
+        key = chat.id if chat else user.id if user else None
+
+        self._waiting += 1
+        self._idle.clear()
+        started = time.perf_counter()
+        waiting = True
+        entry = None
+        try:
+            if key is not None:
+                entry = self._chat_locks.setdefault(key, [asyncio.Lock(), 0])
+                entry[1] += 1
+                await entry[0].acquire()
+            try:
+                async with self._semaphore:
+                    self._waiting -= 1
+                    waiting = False
+                    self._record_wait(time.perf_counter() - started)
+                    self._in_flight += 1
+                    self._max_in_flight = max(self._max_in_flight, self._in_flight)
+                    try:
+                        return await handler(event, data)
+                    finally:
+                        self._in_flight -= 1
+            finally:
+                if entry is not None:
+                    entry[0].release()
+        finally:
+            # Отмена во время ожидания: обновление так и не начало выполняться
+            if waiting:
+                self._waiting -= 1
+            if entry is not None:
+                entry[1] -= 1
+                if not entry[1]:
+                    del self._chat_locks[key]
+            if not self._in_flight and not self._waiting:
+                self._idle.set()
+
+    def _record_wait(self, wait: float):
+        self._processed += 1
+        self._wait_total += wait
+        self._wait_max = max(self._wait_max, wait)
@@ -0,0 +1,41 @@
+"""Middleware для кэширования FSM-контекста в пределах обновления"""
+from typing import Any, Awaitable, Callable, Dict
+
+from aiogram import BaseMiddleware
+from aiogram.types import TelegramObject
+
+from bot.utils.fsm import CachedFSMContext
+
+
+class FSMCacheMiddleware(BaseMiddleware):
+    """Подмена FSMContext на CachedFSMContext.
+
+    Регистрируется как outer-middleware на dp.update после встроенного
+    FSMContextMiddleware aiogram: тот уже прочитал состояние (raw_state)
+    для фильтров, и хендлеры получают его без повторного запроса.
+    """
+
+    def __init__(self):
+        self._stats = {"contexts": 0, "writes": 0, "writes_skipped": 0}
+
+    @property
+    def stats(self) -> Dict[str, int]:
+        """Число контекстов, выполненных и пропущенных записей в хранилище"""
+        return dict(self._stats)
+
+    async def __call__(
+        self,
+        handler: Callable[[TelegramObject, Dict[str, Any]], Awaitable[Any]],
+        event: TelegramObject,
+        data: Dict[str, Any]
+    ) -> Any:
+        state = data.get("state")
+        if state is not None:
+            data["state"] = CachedFSMContext(
+                storage=state.storage,
+                key=state.key,
+                state=data.get("raw_state"),
+                stats=self._stats
+            )
+            self._stats["contexts"] += 1
+        return await handler(event, data)
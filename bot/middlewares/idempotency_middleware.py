@@ -0,0 +1,106 @@
+"""Middleware для защиты от повторных нажатий кнопок"""
+import logging
+import time
+from collections import OrderedDict
+from typing import Any, Awaitable, Callable, Dict, Optional
+
+from aiogram import BaseMiddleware
+from aiogram.dispatcher.flags import get_flag
+from aiogram.types import CallbackQuery, TelegramObject
+from redis.asyncio.client import Redis
+from redis.exceptions import RedisError
+
+
+logger = logging.getLogger(__name__)
+
+
+class IdempotencyMiddleware(BaseMiddleware):
+    """Однократная обработка нажатия кнопки в течение ttl секунд.
+
+    Регистрируется на dp.callback_query как inner-middleware и действует
+    только на хендлеры с флагом idempotent:
+
+        @router.callback_query(F.data == "application_filled", flags={"idempotent": True})
+
+    Ключ — (chat_id, message_id, callback_data): повторное нажатие той же
+    кнопки того же сообщения получает пустой ответ на callback без
+    обращений к БД и отправки уведомлений. Ключи хранятся в памяти или,
+    для нескольких процессов, в Redis (SET NX EX). Если хендлер упал,
+    ключ снимается, и нажатие можно повторить.
+    """
+
+    def __init__(
+        self,
+        ttl: float = 10.0,
+        redis: Optional[Redis] = None,
+        prefix: str = "artlift:idempotency"
+    ):
+        self.ttl = ttl
+        self.redis = redis
+        self.prefix = prefix
+        # Ключ -> момент истечения; порядок вставки совпадает с порядком истечения
+        self._seen: "OrderedDict[str, float]" = OrderedDict()
+        self._checked = 0
+        self._duplicates = 0
+
+    @property
+    def stats(self) -> Dict[str, int]:
+        """Число проверенных и отброшенных повторных нажатий"""
+        return {"checked": self._checked, "duplicates": self._duplicates}
+
+    async def __call__(
+        self,
+        handler: Callable[[TelegramObject, Dict[str, Any]], Awaitable[Any]],
+        event: TelegramObject,
+        data: Dict[str, Any]
+    ) -> Any:
+        if not isinstance(event, CallbackQuery) or not get_flag(data, "idempotent"):
+            return await handler(event, data)
+
+        key = self._key(event)
+        self._checked += 1
+        if not await self._acquire(key):
+            self._duplicates += 1
+            logger.info("Повторное нажатие %s отброшено", key)
+            await event.answer()
+            return None
+
+        try:
+            return await handler(event, data)
+        except Exception:
+            await self._release(key)
+            raise
+
+    def _key(self, callback: CallbackQuery) -> str:
+        message = callback.message
+        chat_id = message.chat.id if message else callback.from_user.id
+        message_id = message.message_id if message else callback.inline_message_id
+        return f"{chat_id}:{message_id}:{callback.data}"
+
+    async def _acquire(self, key: str) -> bool:
+        if self.redis is not None:
+            try:
+                return bool(await self.redis.set(
+                    f"{self.prefix}:{key}", 1, nx=True, px=int(self.ttl * 1000)
+                ))
+            except RedisError:
+                # Без Redis лучше обработать повтор, чем потерять нажатие
+                logger.warning("Проверка повторного нажатия недоступна", exc_info=True)
+                return True
+
+        now = time.monotonic()
+        while self._seen and next(iter(self._seen.values())) <= now:
+            self._seen.popitem(last=False)
+        if key in self._seen:
+            return False
+        self._seen[key] = now + self.ttl
+        return True
+
+    async def _release(self, key: str):
+        if self.redis is not None:
+            try:
+                await self.redis.delete(f"{self.prefix}:{key}")
+            except RedisError:
+                logger.warning("Не удалось снять ключ повторного нажатия", exc_info=True)
+            return
+        self._seen.pop(key, None)
@@ -0,0 +1,98 @@
+"""Middleware для ограничения частоты обновлений от пользователя"""
+import logging
+from typing import Any, Awaitable, Callable, Dict, Optional, Tuple
+
+from aiogram import BaseMiddleware
+from aiogram.types import TelegramObject, Update
+from redis.exceptions import RedisError
+
+from bot.middlewares.auth_middleware import is_admin
+
+
+logger = logging.getLogger(__name__)
+
+
+class ThrottlingMiddleware(BaseMiddleware):
+    """Корзины токенов на пользователя и на команду.
+
+    Регистрируется как outer-middleware на dp.update раньше блокировок
+    чата и чтения FSM, чтобы лишние обновления отбрасывались до любой
+    работы. Общая корзина пользователя — rate обновлений в секунду
+    с запасом burst; для команд из command_limits (например,
+    {"start": (3, 60)} — 3 раза за 60 секунд) действует отдельная корзина.
+    Сверх лимита нажатие кнопки получает короткий ответ, сообщение
+    отбрасывается молча. Администраторы не ограничиваются.
+
+    store — MemoryBucketStore (один процесс) или RedisBucketStore.
+    """
+
+    CALLBACK_TEXT = "Слишком часто, подождите немного"
+
+    def __init__(
+        self,
+        store,
+        rate: float = 2.0,
+        burst: float = 5.0,
+        command_limits: Optional[Dict[str, Tuple[float, float]]] = None
+    ):
+        self.store = store
+        self.rate = rate
+        self.burst = burst
+        self.command_limits = command_limits or {}
+        self._passed = 0
+        self._throttled: Dict[str, int] = {}
+
+    @property
+    def stats(self) -> Dict[str, Any]:
+        """Пропущенные и отброшенные обновления, отброшенные — по корзинам"""
+        return {
+            "passed": self._passed,
+            "throttled": sum(self._throttled.values()),
+            "throttled_by_scope": dict(self._throttled),
+        }
+
+    async def __call__(
+        self,
+        handler: Callable[[TelegramObject, Dict[str, Any]], Awaitable[Any]],
+        event: TelegramObject,
+        data: Dict[str, Any]
+    ) -> Any:
+        user = data.get("event_from_user")
+        if user is None or is_admin(user.id):
+            return await handler(event, data)
+
+        scope = await self._check(user.id, self._command(event))
+        if scope is None:
+            self._passed += 1
+            return await handler(event, data)
+
+        self._throttled[scope] = self._throttled.get(scope, 0) + 1
+        if isinstance(event, Update) and event.callback_query:
+            await event.callback_query.answer(self.CALLBACK_TEXT)
+        return None
+
+    async def _check(self, user_id: int, command: Optional[str]) -> Optional[str]:
+        """Имя исчерпанной корзины или None, если обновление можно обработать"""
+        buckets = [("user", self.rate, self.burst)]
+        if command in self.command_limits:
+            count, period = self.command_limits[command]
+            buckets.append((f"command:{command}", count / period, count))
+
+        for scope, rate, capacity in buckets:
+            try:
+                allowed = await self.store.take(f"{user_id}:{scope}", rate, capacity)
+            except RedisError:
+                # Без хранилища лимитов бот продолжает работать без ограничений
+                logger.warning("Хранилище лимитов недоступно", exc_info=True)
+                return None
+            if not allowed:
+                return scope
+        return None
+
+    @staticmethod
+    def _command(event: TelegramObject) -> Optional[str]:
+        message = event.message if isinstance(event, Update) else None
+        if message is None or not message.text or not message.text.startswith("/"):
+            return None
+        parts = message.text[1:].split(maxsplit=1)
+        return parts[0].split("@", 1)[0].lower() if parts else None
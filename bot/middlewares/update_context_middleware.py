@@ -0,0 +1,134 @@
+"""Middleware обновления: сервисы, логирование и время обработки за один проход"""
+import logging
+import time
+from typing import Any, Awaitable, Callable, Dict, Tuple
+
+from aiogram import BaseMiddleware
+from aiogram.dispatcher.event.handler import HandlerObject
+from aiogram.types import TelegramObject, Update
+
+from bot.services.container import ServiceContainer
+from bot.utils.log_setup import UserText
+from bot.utils.metrics import UPDATE_DURATION, UPDATES
+
+
+logger = logging.getLogger(__name__)
+
+
+class UpdateContextMiddleware(BaseMiddleware):
+    """Одно outer-middleware на dp.update вместо пары LoggingMiddleware
+    и DependencyMiddleware на каждом типе событий.
+
+    Добавляет в data контейнер сервисов (services), пишет в лог
+    сообщения и нажатия кнопок и измеряет время обработки обновления
+    по типам (stats и метрики artlift_update_*). Обновления дольше
+    slow_threshold секунд пишутся в лог предупреждением. Сервисы по
+    именам аргументов подставляет injector — inner-middleware на типах
+    событий с хендлерами:
+
+        update_context = UpdateContextMiddleware(services)
+        dp.update.outer_middleware(update_context)
+        dp.message.middleware(update_context.injector)
+        dp.callback_query.middleware(update_context.injector)
+    """
+
+    def __init__(self, services: ServiceContainer, slow_threshold: float = 1.0):
+        self.services = services
+        self.slow_threshold = slow_threshold
+        self.injector = ServiceInjector(services)
+        # Тип обновления -> [число, суммарное время, максимальное время]
+        self._timings: Dict[str, list] = {}
+
+    @property
+    def stats(self) -> Dict[str, Dict[str, float]]:
+        """Число обновлений и время обработки в секундах по типам"""
+        return {
+            event_type: {"count": count, "avg": total / count, "max": longest}
+            for event_type, (count, total, longest) in self._timings.items()
+        }
+
+    async def __call__(
+        self,
+        handler: Callable[[TelegramObject, Dict[str, Any]], Awaitable[Any]],
+        event: TelegramObject,
+        data: Dict[str, Any]
+    ) -> Any:
+        data["services"] = self.services
+
+        event_type = event.event_type if isinstance(event, Update) else type(event).__name__
+        if logger.isEnabledFor(logging.INFO):
+            self._log_event(event, event_type, data.get("event_from_user"))
+
+        started = time.perf_counter()
+        status = "error"
+        try:
+            result = await handler(event, data)
+            status = "ok"
+            return result
+        finally:
+            elapsed = time.perf_counter() - started
+            UPDATE_DURATION.observe(elapsed, event_type=event_type)
+            UPDATES.inc(event_type=event_type, status=status)
+            timing = self._timings.get(event_type)
+            if timing is None:
+                timing = self._timings[event_type] = [0, 0.0, 0.0]
+            timing[0] += 1
+            timing[1] += elapsed
+            if elapsed > timing[2]:
+                timing[2] = elapsed
+            if elapsed >= self.slow_threshold:
+                logger.warning(
+                    "Медленное обновление %s: %.2f с", event_type, elapsed,
+                    extra={"event_type": event_type, "duration": round(elapsed, 3)}
+                )
+
+    @staticmethod
+    def _log_event(event: TelegramObject, event_type: str, user):
+        # Строка собирается в потоке логирования, текст пользователя
+        # при LOG_REDACT_TEXT скрывается (см. bot.utils.log_setup)
+        user_id = user.id if user else None
+        extra = {"event_type": event_type, "user_id": user_id}
+        if event_type == "message":
+            logger.info(
+                "Message from user %s (@%s): %s",
+                user_id, user.username if user else None, UserText(event.message.text),
+                extra=extra
+            )
+        elif event_type == "callback_query":
+            logger.info(
+                "Callback from user %s (@%s): %s",
+                user_id, user.username if user else None, event.callback_query.data,
+                extra=extra
+            )
+
+
+class ServiceInjector(BaseMiddleware):
+    """Подставляет в data только сервисы из аргументов выбранного хендлера.
+
+    Имена аргументов хендлера, совпадающие с сервисами, вычисляются
+    один раз на хендлер; сервис-фабрика создаётся при первом хендлере,
+    которому он нужен.
+    """
+
+    def __init__(self, services: ServiceContainer):
+        self.services = services
+        # Функция хендлера -> имена нужных ему сервисов
+        self._wanted: Dict[Callable, Tuple[str, ...]] = {}
+
+    async def __call__(
+        self,
+        handler: Callable[[TelegramObject, Dict[str, Any]], Awaitable[Any]],
+        event: TelegramObject,
+        data: Dict[str, Any]
+    ) -> Any:
+        target: HandlerObject = data.get("handler")
+        if target is not None:
+            wanted = self._wanted.get(target.callback)
+            if wanted is None:
+                wanted = self._wanted[target.callback] = tuple(
+                    name for name in target.params if name in self.services
+                )
+            for name in wanted:
+                if name not in data:
+                    data[name] = self.services.get(name)
+        return await handler(event, data)
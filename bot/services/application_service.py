@@ -9,8 +9,8 @@ class ApplicationService:
     def __init__(self, db: Database):
         self.db = db
     
-    async def create_application(self, user_id: int) -> int:
-        """Создание новой заявки"""
+    async def create_application(self, user_id: int) -> Optional[int]:
+        """Создание новой заявки; None — заявка на рассмотрении уже есть"""
         return await self.db.create_application(user_id)
     
     async def get_application(self, user_id: int) -> Optional[dict]:
@@ -18,11 +18,11 @@ class ApplicationService:
         return await self.db.get_application(user_id)
     
     async def approve_application(self, user_id: int, admin_id: int) -> bool:
-        """Одобрение заявки"""
+        """Одобрение заявки; False — заявка уже обработана"""
         return await self.db.update_application_status(user_id, "approved", admin_id)
     
     async def reject_application(self, user_id: int, admin_id: int) -> bool:
-        """Отказ в заявке"""
+        """Отказ в заявке; False — заявка уже обработана"""
         return await self.db.update_application_status(user_id, "rejected", admin_id)
     
     async def get_pending_applications(self, limit: int = 10, offset: int = 0) -> list:
@@ -0,0 +1,45 @@
+"""Контейнер сервисов для хендлеров"""
+from typing import Any, Callable, Dict
+
+
+class ServiceContainer:
+    """Сервисы бота по именам аргументов хендлеров.
+
+    Сервис добавляется готовым объектом (add) или фабрикой (register);
+    фабрика вызывается при первом обращении к сервису, а не при запуске
+    бота. Хендлер получает сервис по имени аргумента (user_service:
+    UserService, см. ServiceInjector) или весь контейнер (services:
+    ServiceContainer) и берёт нужное атрибутом: services.question_service.
+    """
+
+    def __init__(self):
+        self._factories: Dict[str, Callable[[], Any]] = {}
+        self._instances: Dict[str, Any] = {}
+
+    def add(self, name: str, instance: Any) -> Any:
+        self._instances[name] = instance
+        return instance
+
+    def register(self, name: str, factory: Callable[[], Any]):
+        self._factories[name] = factory
+        self._instances.pop(name, None)
+
+    def __contains__(self, name: str) -> bool:
+        return name in self._instances or name in self._factories
+
+    def get(self, name: str) -> Any:
+        try:
+            return self._instances[name]
+        except KeyError:
+            pass
+        if name not in self._factories:
+            raise KeyError(name)
+        return self._instances.setdefault(name, self._factories[name]())
+
+    def __getattr__(self, name: str) -> Any:
+        if name.startswith("_"):
+            raise AttributeError(name)
+        try:
+            return self.get(name)
+        except KeyError:
+            raise AttributeError(name) from None
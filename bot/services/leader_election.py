@@ -0,0 +1,182 @@
+"""Выбор ведущей реплики для запланированных задач через Redis-блокировку"""
+import asyncio
+import inspect
+import logging
+import os
+import socket
+import time
+import uuid
+from typing import Any, Callable, List, Optional
+
+from redis.asyncio import Redis
+from redis.exceptions import RedisError
+
+
+logger = logging.getLogger(__name__)
+
+
+# Продление аренды только владельцем блокировки
+_RENEW_SCRIPT = """
+if redis.call('get', KEYS[1]) == ARGV[1] then
+    return redis.call('pexpire', KEYS[1], ARGV[2])
+end
+return 0
+"""
+
+# Освобождение блокировки только владельцем
+_RELEASE_SCRIPT = """
+if redis.call('get', KEYS[1]) == ARGV[1] then
+    return redis.call('del', KEYS[1])
+end
+return 0
+"""
+
+
+class LeaderElection:
+    """Выбор лидера среди реплик бота на основе аренды ключа в Redis.
+
+    Лидер захватывает ключ через SET NX PX и продлевает аренду каждые
+    renew_interval секунд. Остальные реплики с тем же интервалом пытаются
+    захватить ключ, поэтому при штатной остановке лидера (ключ удаляется)
+    переключение занимает не больше renew_interval, а при падении —
+    не больше срока аренды.
+
+    Срок аренды отслеживается и локально по монотонным часам: если
+    продление не удалось вовремя (медленный Redis, зависший цикл событий),
+    реплика снимает с себя лидерство до того, как ключ истечёт в Redis.
+    """
+
+    def __init__(
+        self,
+        redis: Redis,
+        key: str = "artlift:scheduler:leader",
+        lease_seconds: float = 15.0,
+        renew_interval: float = 5.0,
+        instance_id: Optional[str] = None,
+        clock: Callable[[], float] = time.monotonic
+    ):
+        if renew_interval >= lease_seconds:
+            raise ValueError("renew_interval must be shorter than lease_seconds")
+
+        self.redis = redis
+        self.key = key
+        self.lease_ms = int(lease_seconds * 1000)
+        self.renew_interval = renew_interval
+        self.instance_id = instance_id or (
+            f"{socket.gethostname()}:{os.getpid()}:{uuid.uuid4().hex[:8]}"
+        )
+
+        # Запас до истечения аренды на расхождение часов и задержки сети
+        self.safety_margin = min(1.0, (lease_seconds - renew_interval) / 2)
+        self._clock = clock
+        self._lease_deadline = 0.0
+
+        self._is_leader = False
+        self._task: Optional[asyncio.Task] = None
+        self._on_elected: List[Callable[[], Any]] = []
+        self._on_demoted: List[Callable[[], Any]] = []
+
+    @property
+    def is_leader(self) -> bool:
+        """Является ли текущая реплика лидером"""
+        return self._is_leader
+
+    @property
+    def lease_valid(self) -> bool:
+        """Не истекла ли аренда по локальным часам (с запасом)"""
+        return self._clock() < self._lease_deadline - self.safety_margin
+
+    def on_elected(self, callback: Callable[[], Any]):
+        """Регистрация обработчика получения лидерства"""
+        self._on_elected.append(callback)
+
+    def on_demoted(self, callback: Callable[[], Any]):
+        """Регистрация обработчика потери лидерства"""
+        self._on_demoted.append(callback)
+
+    async def step(self) -> bool:
+        """Одна попытка захватить или продлить аренду, возвращает статус лидера"""
+        if self._is_leader and not self.lease_valid:
+            # Продление опоздало: ключ мог уже достаться другой реплике
+            logger.warning("Аренда лидера %s истекла локально", self.instance_id)
+            await self._set_leader(False)
+
+        # Срок аренды отсчитывается от момента отправки запроса
+        started = self._clock()
+        try:
+            if self._is_leader:
+                renewed = await asyncio.wait_for(
+                    self.redis.eval(
+                        _RENEW_SCRIPT, 1, self.key, self.instance_id, self.lease_ms
+                    ),
+                    self.renew_interval
+                )
+                if renewed:
+                    self._lease_deadline = started + self.lease_ms / 1000
+                else:
+                    logger.warning("Аренда лидера %s потеряна", self.instance_id)
+                    await self._set_leader(False)
+            else:
+                acquired = await asyncio.wait_for(
+                    self.redis.set(
+                        self.key, self.instance_id, nx=True, px=self.lease_ms
+                    ),
+                    self.renew_interval
+                )
+                if acquired:
+                    self._lease_deadline = started + self.lease_ms / 1000
+                    await self._set_leader(True)
+        except (RedisError, asyncio.TimeoutError):
+            # Без связи с Redis нельзя гарантировать единственность лидера
+            logger.exception("Ошибка Redis при выборе лидера")
+            if self._is_leader:
+                await self._set_leader(False)
+
+        return self._is_leader
+
+    async def run(self):
+        """Цикл захвата и продления аренды"""
+        while True:
+            started = self._clock()
+            await self.step()
+            # Медленный запрос не должен растягивать интервал продления
+            await asyncio.sleep(max(0.0, self.renew_interval - (self._clock() - started)))
+
+    def start(self):
+        """Запуск цикла выбора лидера в фоне"""
+        if self._task is None:
+            self._task = asyncio.create_task(self.run(), name="leader-election")
+
+    async def stop(self):
+        """Остановка цикла и освобождение блокировки для быстрого переключения"""
+        if self._task is not None:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+
+        if self._is_leader:
+            try:
+                await self.redis.eval(_RELEASE_SCRIPT, 1, self.key, self.instance_id)
+            except RedisError:
+                logger.exception("Не удалось освободить блокировку лидера")
+            await self._set_leader(False)
+
+    async def _set_leader(self, is_leader: bool):
+        self._is_leader = is_leader
+        logger.info(
+            "Реплика %s %s",
+            self.instance_id,
+            "стала лидером" if is_leader else "больше не лидер",
+        )
+
+        callbacks = self._on_elected if is_leader else self._on_demoted
+        for callback in callbacks:
+            try:
+                result = callback()
+                if inspect.isawaitable(result):
+                    await result
+            except Exception:  # noqa: BLE001
+                logger.exception("Ошибка в обработчике смены лидера")
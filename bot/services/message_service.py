@@ -26,6 +26,25 @@ class MessageService:
             # Fallback на дефолтные значения
             content = self._get_default_message(message_key)
         
+        return self._render(content, variables)
+    
+    async def get_messages(self, message_keys: list, **variables) -> dict:
+        """Получение нескольких шаблонов одним запросом с подстановкой переменных"""
+        templates = await self._db.get_messages(message_keys)
+        
+        messages = {}
+        for message_key in message_keys:
+            template = templates.get(message_key)
+            if template:
+                content = template["content"]
+            else:
+                content = self._get_default_message(message_key)
+            messages[message_key] = self._render(content, variables)
+        
+        return messages
+    
+    def _render(self, content: str, variables: dict) -> str:
+        """Подстановка переменных и применение форматирования"""
         # Всегда добавляем переменные из settings
         all_variables = {
             "APPLICATION_FORM_URL": settings.APPLICATION_FORM_URL,
@@ -172,6 +191,19 @@ class MessageService:
                 "• Последующие месяцы — 5 000 ₽\n\n"
                 "Остались вопросы? Нажмите «❓ Задать вопрос» в меню, и мы ответим лично."
             ),
+            "reminder_1d": (
+                "⏰ Привет! Прошли сутки с момента, как вы собирались заполнить анкету "
+                "в Art Lift Community.\n\n"
+                "Удалось ли уже отправить её? Если нет — самое время сделать это."
+            ),
+            "reminder_3d": (
+                "⏰ Напоминаем об анкете в Art Lift Community.\n\n"
+                "Прошло три дня — если вы ещё не успели её заполнить, это займёт всего пару минут."
+            ),
+            "reminder_7d": (
+                "👋 Прошла неделя с вашего знакомства с Art Lift Community.\n\n"
+                "Мы всё ещё ждём вашу анкету! Если остались вопросы — нажмите «❓ Задать вопрос» в меню."
+            ),
         }
         return defaults.get(message_key, "")
 
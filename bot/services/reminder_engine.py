@@ -0,0 +1,137 @@
+"""Компактный движок напоминаний на основе хешированного колеса таймеров"""
+import time
+from array import array
+from typing import Callable, List, Optional, Tuple
+
+
+class ReminderEngine:
+    """Хешированное колесо таймеров для большого числа напоминаний.
+
+    Каждое напоминание хранится как тройка (due_tick, user_id, type_index)
+    в компактных массивах ячейки колеса — без отдельного объекта задачи,
+    триггера и текста сообщения. Текст берётся из шаблона в момент отправки.
+    """
+
+    def __init__(
+        self,
+        tick_seconds: float = 1.0,
+        wheel_size: int = 4096,
+        clock: Callable[[], float] = time.time
+    ):
+        if tick_seconds <= 0:
+            raise ValueError("tick_seconds must be positive")
+        if wheel_size <= 0:
+            raise ValueError("wheel_size must be positive")
+
+        self.tick_seconds = tick_seconds
+        self.wheel_size = wheel_size
+        self._clock = clock
+
+        self._ticks = [array("q") for _ in range(wheel_size)]
+        self._users = [array("q") for _ in range(wheel_size)]
+        self._types = [array("B") for _ in range(wheel_size)]
+
+        # Типы напоминаний хранятся в ячейках как индексы в этом списке
+        self._type_names: List[str] = []
+        self._type_ids: dict[str, int] = {}
+
+        self._current_tick = self._tick_of(clock())
+        self._size = 0
+
+    def __len__(self) -> int:
+        return self._size
+
+    @property
+    def horizon(self) -> float:
+        """Момент времени, до которого все напоминания уже извлечены"""
+        return (self._current_tick + 1) * self.tick_seconds
+
+    def clear(self):
+        """Удаление всех напоминаний"""
+        for slot in range(self.wheel_size):
+            self._compact(slot, [])
+        self._size = 0
+
+    def _tick_of(self, timestamp: float) -> int:
+        return int(timestamp // self.tick_seconds)
+
+    def _type_id(self, reminder_type: str) -> int:
+        type_id = self._type_ids.get(reminder_type)
+        if type_id is None:
+            if len(self._type_names) > 255:
+                raise ValueError("Too many reminder types")
+            type_id = len(self._type_names)
+            self._type_names.append(reminder_type)
+            self._type_ids[reminder_type] = type_id
+        return type_id
+
+    def schedule(self, user_id: int, reminder_type: str, due_ts: float):
+        """Добавление напоминания; просроченные сработают на ближайшем тике"""
+        tick = max(self._tick_of(due_ts), self._current_tick + 1)
+        slot = tick % self.wheel_size
+
+        self._ticks[slot].append(tick)
+        self._users[slot].append(user_id)
+        self._types[slot].append(self._type_id(reminder_type))
+        self._size += 1
+
+    def cancel_user(self, user_id: int) -> int:
+        """Удаление всех напоминаний пользователя, возвращает их число"""
+        removed = 0
+        for slot in range(self.wheel_size):
+            users = self._users[slot]
+            # Проверка вхождения выполняется на C-уровне и дешевле перебора
+            if user_id not in users:
+                continue
+            keep = [i for i, uid in enumerate(users) if uid != user_id]
+            removed += len(users) - len(keep)
+            self._compact(slot, keep)
+
+        self._size -= removed
+        return removed
+
+    def pop_due(self, now: Optional[float] = None) -> List[Tuple[int, str]]:
+        """Извлечение наступивших напоминаний в виде пар (user_id, reminder_type)"""
+        now_tick = self._tick_of(self._clock() if now is None else now)
+        if now_tick <= self._current_tick:
+            return []
+
+        if now_tick - self._current_tick >= self.wheel_size:
+            # Пропущен полный оборот колеса — проверяем все ячейки
+            slots = range(self.wheel_size)
+        else:
+            slots = (
+                tick % self.wheel_size
+                for tick in range(self._current_tick + 1, now_tick + 1)
+            )
+
+        fired: List[Tuple[int, str]] = []
+        for slot in slots:
+            self._collect(slot, now_tick, fired)
+
+        self._current_tick = now_tick
+        self._size -= len(fired)
+        return fired
+
+    def _collect(self, slot: int, now_tick: int, fired: List[Tuple[int, str]]):
+        ticks = self._ticks[slot]
+        if not ticks:
+            return
+
+        users, types = self._users[slot], self._types[slot]
+        keep = []
+        for i, tick in enumerate(ticks):
+            if tick <= now_tick:
+                fired.append((users[i], self._type_names[types[i]]))
+            else:
+                # Напоминание на одном из следующих оборотов колеса
+                keep.append(i)
+
+        if len(keep) != len(ticks):
+            self._compact(slot, keep)
+
+    def _compact(self, slot: int, keep: List[int]):
+        ticks, users, types = self._ticks[slot], self._users[slot], self._types[slot]
+        self._ticks[slot] = array("q", (ticks[i] for i in keep))
+        self._users[slot] = array("q", (users[i] for i in keep))
+        self._types[slot] = array("B", (types[i] for i in keep))
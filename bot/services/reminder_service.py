@@ -1,111 +1,259 @@
 """Сервис для управления напоминаниями"""
+import asyncio
 from datetime import datetime, timedelta
+from typing import Iterable, List, Optional, Tuple
 from apscheduler.schedulers.asyncio import AsyncIOScheduler
 from bot.database.models import Database
+from bot.services.message_service import MessageService
 from bot.services.notification_service import NotificationService
+from bot.services.reminder_engine import ReminderEngine
+from bot.utils.rate_limit import TokenBucket
+from bot.utils.scheduling import QuietHours, deterministic_jitter
 from config.settings import settings
 
 
+# Текст на случай, если для шага напоминания нет шаблона
+DEFAULT_REMINDER_TEXT = "⏰ Комьюнити ждёт! Вы уже заполнили анкету?"
+
+_STEP_UNITS = {"m": "minutes", "h": "hours", "d": "days"}
+
+
+def parse_reminder_steps(steps: Iterable[str]) -> List[Tuple[str, timedelta]]:
+    """Разбор шагов цепочки напоминаний вида 1d, 12h, 30m"""
+    parsed = []
+    for step in steps:
+        amount, unit = step[:-1], step[-1:]
+        if unit not in _STEP_UNITS or not amount.isdigit() or int(amount) <= 0:
+            raise ValueError(f"Invalid reminder step: {step!r}")
+        parsed.append((step, timedelta(**{_STEP_UNITS[unit]: int(amount)})))
+    return sorted(parsed, key=lambda item: item[1])
+
+
 class ReminderService:
     """Сервис управления напоминаниями"""
-    
+
     def __init__(
         self,
         scheduler: AsyncIOScheduler,
         db: Database,
-        notification_service: NotificationService
+        notification_service: NotificationService,
+        send_concurrency: int = settings.REMINDER_SEND_CONCURRENCY,
+        message_service: Optional[MessageService] = None,
+        engine: Optional[ReminderEngine] = None,
+        steps: Optional[Iterable[str]] = None,
+        jitter_seconds: float = settings.REMINDER_JITTER_SECONDS,
+        quiet_hours: str = settings.REMINDER_QUIET_HOURS,
+        timezone: str = settings.REMINDER_TIMEZONE,
+        send_rate: float = settings.REMINDER_SEND_RATE
     ):
         self.scheduler = scheduler
         self.db = db
         self.notification_service = notification_service
-    
-    def schedule_reminders(self, user_id: int):
-        """Планирование напоминаний для пользователя"""
-        # Отменяем старые напоминания если есть
-        # (через cancel_user_reminders при подтверждении)
-        
-        now = datetime.now()
-
-        reminder_time = now + timedelta(days=1)
-        reminder_message = (
-            "⏰ Привет! Прошли сутки с момента, как вы собирались заполнить анкету "
-            "в Art Lift Community.\n\n"
-            "Удалось ли уже отправить её? Если нет — самое время сделать это."
+        self.send_concurrency = max(1, send_concurrency)
+        self.message_service = (
+            message_service
+            or notification_service.message_service
+            or MessageService(db)
         )
-
-        self._schedule_single_reminder(
-            user_id,
-            "1d",
-            reminder_time,
-            reminder_message
+        # Пустой движок ложен (__len__), поэтому сравнение с None
+        self.engine = (
+            engine if engine is not None
+            else ReminderEngine(tick_seconds=settings.REMINDER_TICK_SECONDS)
         )
-    
-    def _schedule_single_reminder(
-        self,
-        user_id: int,
-        reminder_type: str,
-        scheduled_at: datetime,
-        message: str
-    ) -> str:
-        """Планирование одного напоминания"""
-        job_id = f"reminder_{user_id}_{reminder_type}_{scheduled_at.timestamp()}"
-        
-        # Сохраняем в БД
-        # await self.db.create_reminder(user_id, reminder_type, scheduled_at)
-        
-        # Планируем задачу
+        self.steps = parse_reminder_steps(
+            settings.REMINDER_STEPS if steps is None else steps
+        )
+        # Сглаживание всплесков: джиттер, тихие часы и ограничение скорости отправки
+        self.jitter_seconds = max(0.0, jitter_seconds)
+        self.quiet_hours = QuietHours.parse(quiet_hours, timezone)
+        # Запас корзины — на целый тик, иначе при REMINDER_TICK_SECONDS > 1
+        # за тик уходило бы не больше send_rate напоминаний
+        self.send_bucket = (
+            TokenBucket(send_rate, capacity=max(1.0, send_rate * self.engine.tick_seconds))
+            if send_rate > 0 else None
+        )
+        # Последний id напоминания из БД, загруженный в движок
+        self._last_synced_id = 0
+        # Тик выполняется целиком: отправка и отметка в БД не разрываются
+        self._tick_lock = asyncio.Lock()
+
+    def start(self):
+        """Регистрация тика движка напоминаний в планировщике"""
+        # Одна периодическая задача вместо отдельной задачи на каждое напоминание
         self.scheduler.add_job(
-            self._send_reminder,
-            'date',
-            run_date=scheduled_at,
-            args=[user_id, message, job_id],
-            id=job_id
+            self.process_due_reminders,
+            "interval",
+            seconds=self.engine.tick_seconds,
+            id="reminder_engine_tick",
+            replace_existing=True,
+            max_instances=1,
+            coalesce=True
         )
-        
-        return job_id
-    
-    async def _send_reminder(self, user_id: int, message: str, job_id: str):
-        """Отправка напоминания"""
-        # Проверяем, не заполнил ли пользователь анкету
-        application = await self.db.get_application(user_id)
-        if application and application.get("status") != "pending":
-            # Пользователь уже заполнил, отменяем остальные
-            return
-        
-        await self.notification_service.send_reminder(user_id, message)
-        
-        # Помечаем как отправленное
-        # await self.db.mark_reminder_sent(reminder_id)
-    
+
+    def reset(self):
+        """Сброс движка: при следующем тике напоминания заново загрузятся из БД"""
+        self.engine.clear()
+        self._last_synced_id = 0
+
+    async def schedule_reminders(self, user_id: int):
+        """Планирование цепочки напоминаний для пользователя"""
+        # Оставшиеся шаги снимаются через cancel_user_reminders при подтверждении
+        # и отсекаются при отправке, если заявка уже существует
+        now = datetime.now().astimezone()
+
+        # Источник истины — таблица reminders: её видит реплика-лидер,
+        # которая загружает новые напоминания в свой движок на каждом тике
+        await self.db.create_reminders([
+            (user_id, step, self._smooth(user_id, step, now + delay))
+            for step, delay in self.steps
+        ])
+
+    def _smooth(self, user_id: int, step: str, scheduled_at: datetime) -> datetime:
+        """Детерминированный джиттер и перенос из тихих часов"""
+        jitter = deterministic_jitter(user_id, step, self.jitter_seconds)
+        scheduled_at += timedelta(seconds=jitter)
+        if self.quiet_hours:
+            # Утренняя волна тоже растягивается на окно джиттера
+            scheduled_at = self.quiet_hours.shift(scheduled_at, jitter)
+        # В БД время хранится в локальном поясе сервера без tzinfo
+        return scheduled_at.astimezone().replace(tzinfo=None)
+
+    def _outside_quiet_hours(self, user_id: int, step: str, due_ts: float) -> float:
+        """Перенос срабатывания движка из тихих часов (отложенные и просроченные)"""
+        if not self.quiet_hours:
+            return due_ts
+        jitter = deterministic_jitter(user_id, step, self.jitter_seconds)
+        moment = datetime.fromtimestamp(due_ts).astimezone()
+        return self.quiet_hours.shift(moment, jitter).timestamp()
+
+    async def sync_from_db(self) -> int:
+        """Загрузка в движок напоминаний, появившихся в БД после прошлого тика"""
+        reminders = await self.db.get_reminders_after(self._last_synced_id)
+        for reminder in reminders:
+            scheduled_at = reminder["scheduled_at"]
+            if isinstance(scheduled_at, str):
+                scheduled_at = datetime.fromisoformat(scheduled_at)
+            # Просроченное после простоя сработает на ближайшем тике,
+            # который тоже не должен попасть в тихие часы
+            due_ts = max(scheduled_at.timestamp(), self.engine.horizon)
+            self.engine.schedule(
+                reminder["user_id"],
+                reminder["reminder_type"],
+                self._outside_quiet_hours(reminder["user_id"], reminder["reminder_type"], due_ts)
+            )
+            self._last_synced_id = reminder["id"]
+        return len(reminders)
+
+    async def drain(self, timeout: float) -> bool:
+        """Ожидание завершения текущего тика при остановке"""
+        try:
+            await asyncio.wait_for(self._tick_lock.acquire(), timeout)
+        except asyncio.TimeoutError:
+            return False
+        self._tick_lock.release()
+        return True
+
+    async def process_due_reminders(self) -> int:
+        """Отправка наступивших напоминаний из движка"""
+        async with self._tick_lock:
+            return await self._process_due_reminders()
+
+    async def _process_due_reminders(self) -> int:
+        await self.sync_from_db()
+
+        due = self.engine.pop_due()
+        if not due:
+            return 0
+
+        # Вся когорта проверяется одним запросом за тик
+        user_ids = list({user_id for user_id, _ in due})
+        with_applications = await self.db.get_users_with_applications(user_ids)
+        eligible = [
+            (user_id, reminder_type)
+            for user_id, reminder_type in due
+            if user_id not in with_applications
+        ]
+
+        # Сверх допустимой скорости напоминания переносятся на следующий тик
+        deferred = []
+        if self.send_bucket is not None:
+            allowed = self.send_bucket.take_up_to(len(eligible))
+            eligible, deferred = eligible[:allowed], eligible[allowed:]
+            for user_id, reminder_type in deferred:
+                self.engine.schedule(
+                    user_id,
+                    reminder_type,
+                    self._outside_quiet_hours(user_id, reminder_type, self.engine.horizon)
+                )
+
+        batch = await self._render_batch(eligible)
+        await self._send_batch(batch)
+
+        # Отмечаются шаги, а не пользователи: отложенный шаг пользователя
+        # не должен оставить неотмеченным отправленный в этом же тике
+        deferred_steps = set(deferred)
+        await self.db.mark_reminder_steps_sent(
+            [step for step in due if step not in deferred_steps],
+            datetime.fromtimestamp(self.engine.horizon)
+        )
+        return len(batch)
+
     async def cancel_user_reminders(self, user_id: int):
         """Отмена всех напоминаний пользователя"""
-        # Удаляем задачи из scheduler
-        jobs = self.scheduler.get_jobs()
-        for job in jobs:
-            if job.id.startswith(f"reminder_{user_id}_"):
-                self.scheduler.remove_job(job.id)
-        
+        # Удаляем напоминания из движка
+        self.engine.cancel_user(user_id)
+
         # Отменяем в БД
         await self.db.cancel_user_reminders(user_id)
-    
-    async def process_pending_reminders(self):
-        """Обработка напоминаний из БД (альтернативный подход)"""
-        reminders = await self.db.get_pending_reminders()
-        for reminder in reminders:
-            user_id = reminder["user_id"]
-            reminder_id = reminder["id"]
-            
-            # Проверяем статус заявки
-            application = await self.db.get_application(user_id)
-            if application and application.get("status") != "pending":
-                # Пользователь уже заполнил
-                await self.db.mark_reminder_sent(reminder_id)
-                continue
-            
-            # Отправляем напоминание
-            await self.notification_service.send_reminder(
-                user_id,
-                "⏰ Комьюнити ждёт! Вы уже заполнили анкету?"
-            )
-            await self.db.mark_reminder_sent(reminder_id)
 
+    async def process_pending_reminders(self) -> int:
+        """Обработка напоминаний из БД (альтернативный подход)
+
+        Напоминания выбираются одним запросом вместе со статусом последней
+        заявки, отправляются параллельно ограниченным пулом и помечаются
+        отправленными одним пакетным UPDATE. Возвращает число отправленных.
+        """
+        reminders = await self.db.get_due_reminders_with_status()
+        if not reminders:
+            return 0
+
+        # Цепочка останавливается, как только у пользователя появилась заявка
+        eligible = [
+            (reminder["user_id"], reminder["reminder_type"])
+            for reminder in reminders
+            if reminder["application_status"] is None
+        ]
+        batch = await self._render_batch(eligible)
+        await self._send_batch(batch)
+
+        await self.db.mark_reminders_sent([reminder["id"] for reminder in reminders])
+        return len(batch)
+
+    async def _render_batch(
+        self,
+        due: List[Tuple[int, str]]
+    ) -> List[Tuple[int, str]]:
+        """Подстановка текстов шаблонов reminder_<шаг> для пачки напоминаний"""
+        if not due:
+            return []
+
+        keys = sorted({f"reminder_{reminder_type}" for _, reminder_type in due})
+        texts = await self.message_service.get_messages(keys)
+        return [
+            (user_id, texts.get(f"reminder_{reminder_type}") or DEFAULT_REMINDER_TEXT)
+            for user_id, reminder_type in due
+        ]
+
+    async def _send_batch(self, batch: Iterable[Tuple[int, str]]):
+        """Параллельная отправка напоминаний ограниченным пулом"""
+        batch = list(batch)
+        if not batch:
+            return
+        pending = iter(batch)
+
+        async def _worker():
+            for user_id, message in pending:
+                await self.notification_service.send_reminder(user_id, message)
+
+        workers = min(self.send_concurrency, len(batch))
+        await asyncio.gather(*(_worker() for _ in range(workers)))
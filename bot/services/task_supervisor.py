@@ -0,0 +1,115 @@
+"""Фоновые задачи под присмотром"""
+import asyncio
+import logging
+import time
+from typing import Any, Coroutine, Dict, Optional, Set
+
+
+logger = logging.getLogger(__name__)
+
+
+class TaskSupervisor:
+    """Фоновая работа хендлеров вне пути ответа пользователю.
+
+    Хендлер передаёт корутину с именем и не ждёт её:
+
+        task_supervisor.spawn(
+            notification_service.notify_admin_new_application(...),
+            name=f"notify-admins:application:{user_id}"
+        )
+
+    Одновременно выполняется не больше limit задач, остальные ждут
+    своей очереди; сверх max_queued ожидающих новые задачи отклоняются.
+    Ошибка задачи пишется в лог с её именем и не теряется. При остановке
+    drain дожидается задач, а close отменяет оставшиеся.
+    """
+
+    def __init__(self, limit: int = 16, max_queued: int = 1000):
+        self.limit = limit
+        self.max_queued = max_queued
+        self._semaphore = asyncio.Semaphore(limit)
+        self._tasks: Set[asyncio.Task] = set()
+        self._closed = False
+        self._running = 0
+        self._queued = 0
+        self._completed = 0
+        self._failed = 0
+        self._rejected = 0
+        self._cancelled = 0
+
+    @property
+    def stats(self) -> Dict[str, int]:
+        """Выполняемые и ожидающие задачи, итоги завершённых"""
+        return {
+            "running": self._running,
+            "queued": self._queued,
+            "completed": self._completed,
+            "failed": self._failed,
+            "rejected": self._rejected,
+            "cancelled": self._cancelled,
+        }
+
+    def spawn(self, coro: Coroutine[Any, Any, Any], name: str) -> Optional[asyncio.Task]:
+        """Запуск корутины в фоне; None, если задача отклонена"""
+        if self._closed or self._queued >= self.max_queued:
+            coro.close()
+            self._rejected += 1
+            logger.warning(
+                "Фоновая задача %s отклонена: %s",
+                name, "идёт остановка" if self._closed else "очередь переполнена"
+            )
+            return None
+
+        # Задача считается ожидающей сразу, ещё до первого шага цикла событий
+        self._queued += 1
+        task = asyncio.create_task(self._run(coro, name), name=name)
+        self._tasks.add(task)
+        task.add_done_callback(self._tasks.discard)
+        return task
+
+    async def _run(self, coro: Coroutine[Any, Any, Any], name: str):
+        try:
+            await self._semaphore.acquire()
+        except asyncio.CancelledError:
+            self._queued -= 1
+            self._cancelled += 1
+            coro.close()
+            raise
+
+        self._queued -= 1
+        self._running += 1
+        try:
+            await coro
+            self._completed += 1
+        except asyncio.CancelledError:
+            self._cancelled += 1
+            raise
+        except Exception:  # noqa: BLE001
+            self._failed += 1
+            logger.exception("Фоновая задача %s завершилась с ошибкой", name)
+        finally:
+            self._running -= 1
+            self._semaphore.release()
+
+    async def drain(self, timeout: float) -> bool:
+        """Ожидание фоновых задач, включая запущенные за время ожидания"""
+        deadline = time.monotonic() + timeout
+        while self._tasks:
+            remaining = deadline - time.monotonic()
+            if remaining <= 0:
+                logger.warning("Не завершились фоновые задачи: %d", len(self._tasks))
+                return False
+            await asyncio.wait(set(self._tasks), timeout=remaining)
+        return True
+
+    async def close(self):
+        """Прекращение приёма задач и отмена незавершённых"""
+        self._closed = True
+        tasks = list(self._tasks)
+        for task in tasks:
+            task.cancel()
+        if tasks:
+            logger.warning(
+                "Отменены фоновые задачи: %s", ", ".join(task.get_name() for task in tasks)
+            )
+            await asyncio.gather(*tasks, return_exceptions=True)
@@ -0,0 +1,392 @@
+"""Распределённая обработка обновлений через Redis Streams"""
+import asyncio
+import hmac
+import json
+import logging
+import math
+import time
+from typing import Any, Dict, List, Optional
+
+from aiogram import Bot, Dispatcher
+from aiogram.types import Update
+from aiohttp import web
+from redis.asyncio import Redis
+from redis.exceptions import RedisError, ResponseError
+
+from bot.services.leader_election import LeaderElection
+
+
+logger = logging.getLogger(__name__)
+
+
+def extract_partition_key(update: Dict[str, Any]) -> int:
+    """Ключ партиции обновления: id пользователя, иначе id чата или update_id"""
+    for field, event in update.items():
+        if field == "update_id" or not isinstance(event, dict):
+            continue
+        for owner in ("from", "user", "chat"):
+            if isinstance(event.get(owner), dict) and "id" in event[owner]:
+                return int(event[owner]["id"])
+        # Для callback_query чат лежит во вложенном сообщении
+        message = event.get("message")
+        if isinstance(message, dict) and isinstance(message.get("chat"), dict):
+            return int(message["chat"]["id"])
+    return int(update.get("update_id", 0))
+
+
+class UpdateStreamProducer:
+    """Запись сырых обновлений в партиционированные потоки Redis.
+
+    Все обновления одного пользователя попадают в одну партицию,
+    поэтому порядок их обработки сохраняется.
+    """
+
+    def __init__(
+        self,
+        redis: Redis,
+        prefix: str = "artlift:updates",
+        partitions: int = 8,
+        maxlen: int = 100000
+    ):
+        if partitions <= 0:
+            raise ValueError("partitions must be positive")
+
+        self.redis = redis
+        self.prefix = prefix
+        self.partitions = partitions
+        self.maxlen = maxlen
+
+    def stream_name(self, partition: int) -> str:
+        return f"{self.prefix}:{partition}"
+
+    def partition_for(self, update: Dict[str, Any]) -> int:
+        return abs(extract_partition_key(update)) % self.partitions
+
+    async def publish(self, update: Dict[str, Any]) -> str:
+        """Добавление обновления в поток, возвращает id записи"""
+        stream = self.stream_name(self.partition_for(update))
+        entry_id = await self.redis.xadd(
+            stream,
+            {"update": json.dumps(update, ensure_ascii=False)},
+            maxlen=self.maxlen or None,
+            approximate=True
+        )
+        return entry_id.decode() if isinstance(entry_id, bytes) else entry_id
+
+
+class StreamRequestHandler:
+    """Webhook-приёмник: проверяет секрет и кладёт обновление в поток"""
+
+    def __init__(self, producer: UpdateStreamProducer, secret_token: Optional[str] = None):
+        self.producer = producer
+        self.secret_token = secret_token
+
+    def register(self, app: web.Application, path: str):
+        app.router.add_post(path, self.handle)
+
+    async def handle(self, request: web.Request) -> web.Response:
+        if self.secret_token:
+            received = request.headers.get("X-Telegram-Bot-Api-Secret-Token", "")
+            if not hmac.compare_digest(received, self.secret_token):
+                return web.Response(status=401, text="Unauthorized")
+
+        try:
+            update = await request.json()
+        except ValueError:
+            return web.Response(status=400, text="Bad Request")
+
+        await self.producer.publish(update)
+        return web.json_response({})
+
+
+class UpdateStreamConsumer:
+    """Воркер группы потребителей: обрабатывает обновления через Dispatcher.
+
+    Каждой партицией в каждый момент владеет один воркер (аренда ключа
+    в Redis, как у LeaderElection), внутри партиции записи обрабатываются
+    строго по очереди — так сохраняется порядок обновлений пользователя.
+    Воркеры отмечаются в общем реестре, и каждый держит не больше
+    ceil(partitions / живые воркеры) партиций, лишние отпускает.
+
+    Запись подтверждается XACK после обработки. Запись, которую не
+    удалось разобрать или на которой упал хендлер, сразу переносится
+    в поток <prefix>:dead и подтверждается: повтор заново выполнил бы
+    побочные эффекты хендлера (отправки, уведомления). Записи упавшего
+    воркера новый владелец партиции забирает через XAUTOCLAIM
+    и обрабатывает раньше новых; запись, выданная больше max_attempts
+    раз (воркеры падают на ней), переносится в <prefix>:dead без обработки.
+    """
+
+    def __init__(
+        self,
+        redis: Redis,
+        dispatcher: Dispatcher,
+        bot: Bot,
+        prefix: str = "artlift:updates",
+        partitions: int = 8,
+        group: str = "workers",
+        batch_size: int = 50,
+        block_ms: int = 1000,
+        claim_idle_ms: int = 60000,
+        max_partitions: int = 0,
+        max_attempts: int = 3,
+        lease_seconds: float = 15.0,
+        renew_interval: float = 5.0,
+        consumer_name: Optional[str] = None
+    ):
+        if partitions <= 0:
+            raise ValueError("partitions must be positive")
+
+        self.redis = redis
+        self.dispatcher = dispatcher
+        self.bot = bot
+        self.prefix = prefix
+        self.partitions = partitions
+        self.group = group
+        self.batch_size = batch_size
+        self.block_ms = block_ms
+        self.claim_idle_ms = claim_idle_ms
+        # Жёсткий предел партиций на воркер; 0 — только справедливая доля
+        self.max_partitions = max_partitions
+        self.max_attempts = max(1, max_attempts)
+        self.lease_seconds = lease_seconds
+        self.renew_interval = renew_interval
+        self.workers_key = f"{prefix}:workers"
+        self.dead_letter_stream = f"{prefix}:dead"
+        # Число повторных выдач записей, забранных у упавших воркеров
+        self.attempts_key = f"{prefix}:attempts"
+
+        self._elections: List[LeaderElection] = []
+        for partition in range(partitions):
+            election = LeaderElection(
+                redis,
+                key=f"{self.stream_name(partition)}:owner",
+                lease_seconds=lease_seconds,
+                renew_interval=renew_interval,
+                instance_id=consumer_name
+            )
+            # Имя потребителя совпадает с идентификатором владельца аренды
+            consumer_name = election.instance_id
+            election.on_elected(lambda p=partition: self._start_partition(p))
+            election.on_demoted(lambda p=partition: self._stop_partition(p))
+            self._elections.append(election)
+
+        self.consumer_name = consumer_name
+        self._tasks: Dict[int, asyncio.Task] = {}
+        self._closing = False
+        self._processed = 0
+        self._reclaimed = 0
+        self._retried = 0
+        self._dead_lettered = 0
+
+    def stream_name(self, partition: int) -> str:
+        return f"{self.prefix}:{partition}"
+
+    @property
+    def owned_partitions(self) -> List[int]:
+        return sorted(self._tasks)
+
+    @property
+    def stats(self) -> Dict[str, int]:
+        return {
+            "processed": self._processed,
+            "reclaimed": self._reclaimed,
+            "retried": self._retried,
+            "dead_lettered": self._dead_lettered,
+            "owned_partitions": len(self._tasks),
+        }
+
+    async def heartbeat(self) -> int:
+        """Отметка воркера в реестре, возвращает число живых воркеров"""
+        now = time.time()
+        async with self.redis.pipeline(transaction=True) as pipe:
+            pipe.zadd(self.workers_key, {self.consumer_name: now + self.lease_seconds})
+            pipe.zremrangebyscore(self.workers_key, "-inf", now)
+            pipe.zcard(self.workers_key)
+            *_, live = await pipe.execute()
+        return max(1, live)
+
+    async def fair_share(self) -> int:
+        """Сколько партиций может держать воркер при текущем числе воркеров"""
+        share = math.ceil(self.partitions / await self.heartbeat())
+        if self.max_partitions:
+            share = min(share, self.max_partitions)
+        return share
+
+    async def rebalance(self):
+        """Продление аренды своих партиций, захват свободных и отдача лишних"""
+        share = await self.fair_share()
+
+        # Сверх доли отпускаются партиции с конца, их заберут новые воркеры
+        for partition in self.owned_partitions[share:]:
+            await self._elections[partition].stop()
+
+        for election in self._elections:
+            if election.is_leader or len(self._tasks) < share:
+                await election.step()
+
+    async def run(self):
+        """Цикл владения партициями; обработка идёт в задачах партиций"""
+        try:
+            while not self._closing:
+                await self.rebalance()
+                await asyncio.sleep(self.renew_interval)
+        finally:
+            await self.stop()
+
+    async def drain(self, timeout: float) -> bool:
+        """Прекращение чтения новых записей и ожидание обработки начатых"""
+        self._closing = True
+        tasks = list(self._tasks.values())
+        if not tasks:
+            return True
+        _, pending = await asyncio.wait(tasks, timeout=timeout)
+        return not pending
+
+    async def stop(self):
+        """Освобождение партиций для быстрого переключения на другие воркеры"""
+        for election in self._elections:
+            await election.stop()
+        for partition in list(self._tasks):
+            await self._stop_partition(partition)
+        try:
+            await self.redis.zrem(self.workers_key, self.consumer_name)
+        except RedisError:
+            logger.exception("Не удалось снять воркер %s с учёта", self.consumer_name)
+
+    def _start_partition(self, partition: int):
+        if partition not in self._tasks and not self._closing:
+            self._tasks[partition] = asyncio.create_task(
+                self._consume(partition),
+                name=f"update-stream-{partition}"
+            )
+
+    async def _stop_partition(self, partition: int):
+        task = self._tasks.pop(partition, None)
+        if task is not None:
+            task.cancel()
+            try:
+                await task
+            except asyncio.CancelledError:
+                pass
+
+    async def _ensure_group(self, stream: str):
+        try:
+            await self.redis.xgroup_create(stream, self.group, id="0", mkstream=True)
+        except ResponseError as e:
+            if "BUSYGROUP" not in str(e):
+                raise
+
+    async def _consume(self, partition: int):
+        stream = self.stream_name(partition)
+        while not self._closing:
+            try:
+                await self._ensure_group(stream)
+                await self.recover(stream)
+                while not self._closing:
+                    if not await self.read_new(stream):
+                        # Отдаём управление циклу событий, даже если
+                        # клиент вернул пустой ответ без ожидания
+                        await asyncio.sleep(0)
+            except RedisError:
+                logger.exception("Ошибка Redis при чтении потока %s", stream)
+                await asyncio.sleep(1)
+
+    async def recover(self, stream: str):
+        """Обработка неподтверждённых записей до чтения новых"""
+        while not self._closing:
+            start_id = "0-0"
+            while not self._closing:
+                # Redis 7 возвращает третьим элементом удалённые id, Redis 6.2 — нет
+                start_id, entries = (await self.redis.xautoclaim(
+                    stream,
+                    self.group,
+                    self.consumer_name,
+                    min_idle_time=self.claim_idle_ms,
+                    start_id=start_id,
+                    count=self.batch_size
+                ))[:2]
+                self._reclaimed += len(entries)
+                attempts = await self._record_attempts(entries)
+                for (entry_id, fields), attempt in zip(entries, attempts):
+                    if attempt > self.max_attempts:
+                        await self._dead_letter(
+                            stream, entry_id, self._raw(fields),
+                            RuntimeError(f"delivered {attempt} times")
+                        )
+                        await self.redis.xack(stream, self.group, entry_id)
+                    else:
+                        self._retried += 1
+                        await self._handle(stream, entry_id, fields)
+                    await self.redis.hdel(self.attempts_key, entry_id)
+                if not entries or start_id in (b"0-0", "0-0"):
+                    break
+
+            pending = await self.redis.xpending(stream, self.group)
+            if not pending["pending"]:
+                return
+            # Прежний владелец мог ещё не завершить обработку: ждём, пока
+            # его записи простоят claim_idle_ms, чтобы не нарушить порядок
+            await asyncio.sleep(min(1.0, self.claim_idle_ms / 1000))
+
+    async def read_new(self, stream: str) -> int:
+        """Чтение и обработка новой пачки записей, возвращает их число"""
+        response = await self.redis.xreadgroup(
+            self.group,
+            self.consumer_name,
+            {stream: ">"},
+            count=self.batch_size,
+            block=self.block_ms
+        )
+        handled = 0
+        for _, entries in response or []:
+            for entry_id, fields in entries:
+                await self._handle(stream, entry_id, fields)
+                handled += 1
+        return handled
+
+    async def _record_attempts(self, entries: list) -> List[int]:
+        """Номер выдачи каждой забранной записи, считая первое чтение.
+
+        Счётчик ведётся только для записей упавших воркеров, обычное
+        чтение обходится без лишних обращений к Redis.
+        """
+        if not entries:
+            return []
+        async with self.redis.pipeline(transaction=False) as pipe:
+            for entry_id, _ in entries:
+                pipe.hincrby(self.attempts_key, entry_id, 1)
+            counts = await pipe.execute()
+        return [count + 1 for count in counts]
+
+    @staticmethod
+    def _raw(fields: Dict[bytes, bytes]):
+        return fields.get(b"update") or fields.get("update")
+
+    async def _handle(self, stream: str, entry_id, fields: Dict[bytes, bytes]):
+        raw = self._raw(fields)
+        try:
+            update = Update.model_validate(
+                self.bot.session.json_loads(raw),
+                context={"bot": self.bot}
+            )
+            await self.dispatcher.feed_update(self.bot, update)
+            self._processed += 1
+        except Exception as e:  # noqa: BLE001
+            # Без повтора на месте: хендлер мог упасть уже после вызовов
+            # Bot API, и повтор отправил бы сообщения ещё раз
+            logger.exception("Ошибка обработки записи %s из %s", entry_id, stream)
+            await self._dead_letter(stream, entry_id, raw, e)
+        await self.redis.xack(stream, self.group, entry_id)
+
+    async def _dead_letter(self, stream: str, entry_id, raw, error: Exception):
+        """Перенос записи в поток недоставленных, чтобы не блокировать партицию"""
+        if isinstance(entry_id, bytes):
+            entry_id = entry_id.decode()
+        await self.redis.xadd(self.dead_letter_stream, {
+            "update": raw,
+            "stream": stream,
+            "entry_id": entry_id,
+            "error": repr(error),
+        })
+        self._dead_lettered += 1
@@ -0,0 +1,100 @@
+"""Маршрутизация нажатий кнопок по таблице действий"""
+from typing import Any, Callable, Dict, List, Optional, Type, Union
+
+from aiogram import Router
+from aiogram.dispatcher.event.handler import CallbackType, HandlerObject
+from aiogram.filters.callback_data import CallbackData
+from aiogram.types import CallbackQuery
+
+
+class CallbackActionTable:
+    """Хендлеры нажатий, выбираемые по действию из callback_data.
+
+    Вместо цепочки фильтров F.data == ... / F.data.startswith(...),
+    которые aiogram проверяет по очереди, в роутер регистрируется один
+    хендлер: callback_data распаковывается и действие ищется в словаре.
+    Флаги действия (idempotent, deferred_answer) видны middleware так же,
+    как у обычного хендлера.
+
+        admin_actions = CallbackActionTable(AdminCallback, legacy_prefix="admin_")
+        admin_actions.register(router)
+
+        @admin_actions.action("approve", flags={"idempotent": True})
+        async def approve_application(callback: CallbackQuery, callback_data: AdminCallback): ...
+
+    legacy_prefix — префикс старых callback_data вида
+    "<prefix><action>_<arg>" у кнопок в уже отправленных сообщениях;
+    flags — флаги всех действий таблицы, флаги действия их дополняют.
+    """
+
+    def __init__(
+        self,
+        callback_data: Type[CallbackData],
+        legacy_prefix: Optional[str] = None,
+        flags: Optional[Dict[str, Any]] = None
+    ):
+        self.callback_data = callback_data
+        self.legacy_prefix = legacy_prefix
+        self.flags = flags or {}
+        self._packed_prefix = f"{callback_data.__prefix__}{callback_data.__separator__}"
+        self._actions: Dict[str, HandlerObject] = {}
+        # Для старых callback_data длинные действия проверяются первыми:
+        # "applications_page_10" — это applications_page, а не applications
+        self._legacy_order: List[str] = []
+
+    def __contains__(self, action: str) -> bool:
+        return action in self._actions
+
+    def action(
+        self,
+        name: str,
+        flags: Optional[Dict[str, Any]] = None
+    ) -> Callable[[CallbackType], CallbackType]:
+        """Декоратор: регистрирует хендлер действия"""
+        def decorator(callback: CallbackType) -> CallbackType:
+            if name in self._actions:
+                raise ValueError(f"Действие {name!r} уже зарегистрировано")
+            self._actions[name] = HandlerObject(
+                callback=callback, flags={**self.flags, **(flags or {})}
+            )
+            self._legacy_order = sorted(self._actions, key=len, reverse=True)
+            return callback
+        return decorator
+
+    def register(self, router: Router):
+        """Регистрирует таблицу в роутере одним хендлером"""
+        router.callback_query.register(self._dispatch, self)
+
+    def parse(self, data: str) -> Optional[CallbackData]:
+        """Распаковка callback_data; None, если это не кнопка таблицы"""
+        if data.startswith(self._packed_prefix):
+            try:
+                return self.callback_data.unpack(data)
+            except (TypeError, ValueError):
+                return None
+
+        if self.legacy_prefix and data.startswith(self.legacy_prefix):
+            rest = data[len(self.legacy_prefix):]
+            if rest in self._actions:
+                return self.callback_data(action=rest)
+            for action in self._legacy_order:
+                if rest.startswith(action) and rest[len(action):len(action) + 1] == "_":
+                    return self.callback_data(action=action, arg=rest[len(action) + 1:])
+        return None
+
+    def __call__(self, callback: CallbackQuery) -> Union[bool, Dict[str, Any]]:
+        """Фильтр: находит действие и подставляет его как хендлер события"""
+        if not callback.data:
+            return False
+        callback_data = self.parse(callback.data)
+        if callback_data is None:
+            return False
+        handler = self._actions.get(callback_data.action)
+        if handler is None:
+            return False
+        # data["handler"] читают get_flag и middleware
+        return {"callback_data": callback_data, "handler": handler}
+
+    @staticmethod
+    async def _dispatch(callback: CallbackQuery, handler: HandlerObject, **data: Any) -> Any:
+        return await handler.call(callback, **data)
@@ -0,0 +1,72 @@
+"""Изоляция обработки событий одного чата между процессами.
+
+В пределах процесса события чата упорядочивает ConcurrencyMiddleware.
+"""
+import time
+from contextlib import asynccontextmanager
+from typing import Any, AsyncGenerator, Dict, Optional
+
+from aiogram.fsm.storage.base import StorageKey
+from aiogram.fsm.storage.redis import KeyBuilder, RedisEventIsolation
+from redis.asyncio.client import Redis
+
+
+class _LockWaitStats:
+    """Учёт времени ожидания блокировок"""
+
+    # Ожидание дольше порога считается конфликтом (двойное нажатие и т. п.)
+    CONTENDED_THRESHOLD = 0.001
+
+    def _init_stats(self):
+        self._locks = 0
+        self._contended = 0
+        self._wait_total = 0.0
+        self._wait_max = 0.0
+
+    @property
+    def stats(self) -> Dict[str, float]:
+        """Число блокировок, конфликтов и время ожидания в секундах"""
+        return {
+            "locks": self._locks,
+            "contended": self._contended,
+            "wait_avg": self._wait_total / self._locks if self._locks else 0.0,
+            "wait_max": self._wait_max,
+        }
+
+    def _record_wait(self, wait: float):
+        self._locks += 1
+        self._wait_total += wait
+        self._wait_max = max(self._wait_max, wait)
+        if wait >= self.CONTENDED_THRESHOLD:
+            self._contended += 1
+
+
+class InstrumentedRedisEventIsolation(_LockWaitStats, RedisEventIsolation):
+    """Распределённая блокировка в Redis для нескольких процессов бота.
+
+    timeout — срок жизни блокировки на случай падения процесса,
+    sleep — интервал повторных попыток захвата.
+    """
+
+    def __init__(
+        self,
+        redis: Redis,
+        key_builder: Optional[KeyBuilder] = None,
+        timeout: float = 60.0,
+        sleep: float = 0.02,
+        **lock_kwargs: Any
+    ):
+        super().__init__(
+            redis,
+            key_builder=key_builder,
+            lock_kwargs={"timeout": timeout, "sleep": sleep, **lock_kwargs}
+        )
+        self._init_stats()
+
+    @asynccontextmanager
+    async def lock(self, key: StorageKey) -> AsyncGenerator[None, None]:
+        redis_key = self.key_builder.build(key, "lock")
+        started = time.perf_counter()
+        async with self.redis.lock(name=redis_key, **self.lock_kwargs):
+            self._record_wait(time.perf_counter() - started)
+            yield
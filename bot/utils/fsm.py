@@ -0,0 +1,129 @@
+"""FSM-контекст с кэшированием состояния и данных в пределах обновления"""
+from typing import Any, Dict, Optional
+
+from aiogram.fsm.context import FSMContext
+from aiogram.fsm.state import State
+from aiogram.fsm.storage.base import BaseStorage, StateType, StorageKey
+from aiogram.fsm.storage.redis import RedisStorage
+
+
+# Значение ещё не загружено из хранилища
+_UNKNOWN: Any = object()
+
+
+def _state_name(state: StateType) -> Optional[str]:
+    return state.state if isinstance(state, State) else state
+
+
+async def write_state_and_data(
+    storage: BaseStorage,
+    key: StorageKey,
+    state: StateType,
+    data: Dict[str, Any]
+):
+    """Запись состояния и данных; для Redis — одним конвейером MULTI/EXEC"""
+    if not isinstance(storage, RedisStorage):
+        await storage.set_state(key, state)
+        await storage.set_data(key, data)
+        return
+
+    # Команды повторяют RedisStorage.set_state и RedisStorage.set_data
+    state_key = storage.key_builder.build(key, "state")
+    data_key = storage.key_builder.build(key, "data")
+    async with storage.redis.pipeline(transaction=True) as pipe:
+        state = _state_name(state)
+        if state is None:
+            pipe.delete(state_key)
+        else:
+            pipe.set(state_key, state, ex=storage.state_ttl)
+        if data:
+            pipe.set(data_key, storage.json_dumps(data), ex=storage.data_ttl)
+        else:
+            pipe.delete(data_key)
+        await pipe.execute()
+
+
+class CachedFSMContext(FSMContext):
+    """FSMContext, который читает хранилище не больше одного раза за обновление.
+
+    Состояние передаётся из FSMContextMiddleware aiogram (raw_state уже
+    загружен для фильтров), данные загружаются при первом обращении.
+    Запись, не меняющая известное значение, пропускается; смена состояния
+    вместе с данными выполняется одним запросом к хранилищу.
+    """
+
+    def __init__(
+        self,
+        storage: BaseStorage,
+        key: StorageKey,
+        state: Optional[str] = _UNKNOWN,
+        stats: Optional[Dict[str, int]] = None
+    ):
+        super().__init__(storage=storage, key=key)
+        self._state = state
+        self._data: Dict[str, Any] = _UNKNOWN
+        self._stats = stats if stats is not None else {"writes": 0, "writes_skipped": 0}
+
+    async def get_state(self) -> Optional[str]:
+        if self._state is _UNKNOWN:
+            self._state = await self.storage.get_state(self.key)
+        return self._state
+
+    async def get_data(self) -> Dict[str, Any]:
+        if self._data is _UNKNOWN:
+            self._data = await self.storage.get_data(self.key)
+        return self._data.copy()
+
+    async def set_state(self, state: StateType = None) -> None:
+        await self._write(state=_state_name(state))
+
+    async def set_data(self, data: Dict[str, Any]) -> None:
+        await self._write(data=data.copy())
+
+    async def update_data(
+        self,
+        data: Optional[Dict[str, Any]] = None,
+        **kwargs: Any
+    ) -> Dict[str, Any]:
+        merged = await self.get_data()
+        merged.update(data or {}, **kwargs)
+        await self._write(data=merged)
+        return merged.copy()
+
+    async def replace_state_and_data(self, state: StateType, data: Dict[str, Any]):
+        """Переход в состояние одним запросом к хранилищу.
+
+        Данные заменяются целиком, а не объединяются, как в update_data:
+        прежние ключи теряются.
+        """
+        await self._write(state=_state_name(state), data=data.copy())
+
+    async def clear(self) -> None:
+        if self._state is None and self._data is _UNKNOWN:
+            # Данные в боте пишутся только в состоянии, а очистка состояния
+            # удаляет и их: без состояния удалять нечего (меню, /cancel)
+            self._stats["writes_skipped"] += 2
+            self._data = {}
+            return
+        await self._write(state=None, data={})
+
+    async def _write(self, state: Optional[str] = _UNKNOWN, data: Dict[str, Any] = _UNKNOWN):
+        write_state = state is not _UNKNOWN and state != self._state
+        write_data = data is not _UNKNOWN and data != self._data
+
+        if write_state and write_data:
+            await write_state_and_data(self.storage, self.key, state, data)
+        elif write_state:
+            await self.storage.set_state(self.key, state)
+        elif write_data:
+            await self.storage.set_data(self.key, data)
+
+        self._stats["writes"] += write_state + write_data
+        self._stats["writes_skipped"] += (
+            (state is not _UNKNOWN and not write_state)
+            + (data is not _UNKNOWN and not write_data)
+        )
+        if state is not _UNKNOWN:
+            self._state = state
+        if data is not _UNKNOWN:
+            self._data = data
@@ -0,0 +1,87 @@
+"""Отчёт о ключах FSM в Redis по группам состояний.
+
+Запуск из корня репозитория (Redis берётся из настроек бота):
+    python -m bot.utils.fsm_report
+"""
+import asyncio
+from typing import Any, Dict, List
+
+from redis.asyncio.client import Redis
+from redis.exceptions import RedisError
+
+from bot.utils.states import ApplicationStates, MessageEditStates, QuestionStates
+
+
+STATE_GROUPS = (ApplicationStates, MessageEditStates, QuestionStates)
+NO_STATE = "(без состояния)"
+BATCH_SIZE = 500
+
+
+async def collect_fsm_report(redis: Redis, prefix: str = "fsm") -> Dict[str, Dict[str, int]]:
+    """Число пользователей, ключей и байт в Redis для каждой группы состояний.
+
+    Ключи состояния и данных одного пользователя относятся к группе его
+    текущего состояния; данные без состояния попадают в отдельную строку.
+    Размер берётся из MEMORY USAGE, а если команда недоступна — из STRLEN.
+    """
+    report = {
+        group.__full_group_name__: {"users": 0, "keys": 0, "bytes": 0}
+        for group in STATE_GROUPS
+    }
+    keys = []
+    async for key in redis.scan_iter(match=f"{prefix}:*", count=BATCH_SIZE):
+        key = key.decode() if isinstance(key, bytes) else key
+        if key.rsplit(":", 1)[-1] in ("state", "data"):
+            keys.append(key)
+
+    # Пользователь -> [группа, ключей, байт]
+    entries: Dict[str, List[Any]] = {}
+    for start in range(0, len(keys), BATCH_SIZE):
+        batch = keys[start:start + BATCH_SIZE]
+        async with redis.pipeline(transaction=False) as pipe:
+            for key in batch:
+                pipe.memory_usage(key)
+                pipe.strlen(key)
+                # Значение нужно только у ключа состояния, данные не читаются
+                if key.endswith(":state"):
+                    pipe.get(key)
+            results = iter(await pipe.execute(raise_on_error=False))
+
+        for key in batch:
+            memory, length = next(results), next(results)
+            base, _, kind = key.rpartition(":")
+            value = next(results) if kind == "state" else None
+            entry = entries.setdefault(base, [NO_STATE, 0, 0])
+            entry[1] += 1
+            if isinstance(memory, int):
+                entry[2] += memory
+            elif isinstance(length, int):
+                entry[2] += len(key) + length
+            if kind == "state" and value is not None and not isinstance(value, RedisError):
+                value = value.decode() if isinstance(value, bytes) else value
+                entry[0] = value.split(":", 1)[0]
+
+    for group, key_count, size in entries.values():
+        row = report.setdefault(group, {"users": 0, "keys": 0, "bytes": 0})
+        row["users"] += 1
+        row["keys"] += key_count
+        row["bytes"] += size
+    return report
+
+
+async def _main():
+    from config.settings import settings
+
+    redis = Redis.from_url(settings.redis_url)
+    try:
+        report = await collect_fsm_report(redis)
+    finally:
+        await redis.aclose()
+
+    print(f"{'группа':<22}{'польз.':>8}{'ключей':>8}{'байт':>12}")
+    for group, row in report.items():
+        print(f"{group:<22}{row['users']:>8}{row['keys']:>8}{row['bytes']:>12}")
+
+
+if __name__ == "__main__":
+    asyncio.run(_main())
@@ -0,0 +1,206 @@
+"""Хранилища FSM"""
+import asyncio
+import json
+import logging
+from typing import Any, Callable, Dict, Optional, Set, Tuple
+
+from aiogram.fsm.state import State
+from aiogram.fsm.storage.base import BaseStorage, StateType, StorageKey
+from aiogram.fsm.storage.redis import KeyBuilder, RedisStorage
+from redis.asyncio.client import Redis
+
+from bot.database.models import Database
+
+
+logger = logging.getLogger(__name__)
+
+
+def get_data_codec() -> Tuple[str, Callable[[Dict[str, Any]], bytes], Callable[[bytes], Any]]:
+    """Кодек данных FSM: (имя, dumps, loads) — msgpack или компактный JSON"""
+    try:
+        import msgpack
+    except ImportError:
+        def dumps(data: Dict[str, Any]) -> bytes:
+            return json.dumps(data, ensure_ascii=False, separators=(",", ":")).encode()
+
+        return "json", dumps, json.loads
+
+    return "msgpack", msgpack.packb, msgpack.unpackb
+
+
+class CompactRedisStorage(RedisStorage):
+    """RedisStorage с компактной сериализацией данных.
+
+    Данные кодируются msgpack (если установлен) или JSON без пробелов и
+    \\u-экранирования кириллицы. Записи в формате JSON, оставшиеся от
+    RedisStorage, читаются как раньше: значение msgpack-словаря никогда
+    не начинается с «{». Сроки жизни состояния и данных задаются
+    state_ttl и data_ttl — брошенные сценарии не остаются в Redis навсегда.
+    """
+
+    def __init__(
+        self,
+        redis: Redis,
+        key_builder: Optional[KeyBuilder] = None,
+        state_ttl: Optional[int] = None,
+        data_ttl: Optional[int] = None
+    ):
+        self.codec, dumps, self._loads = get_data_codec()
+        super().__init__(
+            redis,
+            key_builder=key_builder,
+            state_ttl=state_ttl or None,
+            data_ttl=data_ttl or None,
+            json_dumps=dumps
+        )
+
+    async def get_data(self, key: StorageKey) -> Dict[str, Any]:
+        redis_key = self.key_builder.build(key, "data")
+        value = await self.redis.get(redis_key)
+        if value is None:
+            return {}
+        return self.decode_data(value)
+
+    def decode_data(self, value: Any) -> Dict[str, Any]:
+        """Разбор сохранённых данных любого из поддерживаемых форматов"""
+        if isinstance(value, str):
+            value = value.encode()
+        if value[:1] == b"{":
+            return json.loads(value)
+        return self._loads(value)
+
+
+class SQLiteStorage(BaseStorage):
+    """Хранилище FSM в памяти процесса с отложенной записью в SQLite.
+
+    Чтение и запись состояния не обращаются к диску: изменённые ключи
+    копятся и раз в flush_interval секунд записываются в таблицу
+    fsm_storage одной транзакцией. При запуске (load) состояния
+    восстанавливаются из таблицы, записи старше ttl удаляются.
+    При штатной остановке flush вызывается на фазе сброса буферов;
+    при аварийном завершении теряются изменения последнего интервала.
+
+    Подходит для одного процесса: реплики не видят состояний друг друга.
+    """
+
+    def __init__(
+        self,
+        db: Database,
+        flush_interval: float = 1.0,
+        ttl: Optional[float] = None
+    ):
+        self._db = db
+        self.flush_interval = flush_interval
+        self.ttl = ttl
+        self._states: Dict[StorageKey, str] = {}
+        self._data: Dict[StorageKey, Dict[str, Any]] = {}
+        self._dirty: Set[StorageKey] = set()
+        self._flush_lock = asyncio.Lock()
+        self._task: Optional[asyncio.Task] = None
+        self._flushes = 0
+        self._flushed_records = 0
+
+    @property
+    def stats(self) -> Dict[str, int]:
+        """Число ключей в памяти, ожидающих записи и записанных"""
+        return {
+            "states": len(self._states),
+            "data": len(self._data),
+            "dirty": len(self._dirty),
+            "flushes": self._flushes,
+            "flushed_records": self._flushed_records,
+        }
+
+    async def load(self) -> int:
+        """Восстановление состояний из SQLite, возвращает число записей"""
+        records = await self._db.load_fsm_records(self.ttl)
+        for record in records:
+            key = StorageKey(
+                bot_id=record["bot_id"],
+                chat_id=record["chat_id"],
+                user_id=record["user_id"],
+                thread_id=record["thread_id"] or None,
+                business_connection_id=record["business_connection_id"] or None,
+                destiny=record["destiny"],
+            )
+            if record["state"] is not None:
+                self._states[key] = record["state"]
+            if record["data"]:
+                self._data[key] = json.loads(record["data"])
+        return len(records)
+
+    def start(self):
+        """Запуск фоновой записи изменений"""
+        if self._task is None:
+            self._task = asyncio.create_task(self._flush_loop())
+
+    async def set_state(self, key: StorageKey, state: StateType = None) -> None:
+        state = state.state if isinstance(state, State) else state
+        if state is None:
+            self._states.pop(key, None)
+        else:
+            self._states[key] = state
+        self._dirty.add(key)
+
+    async def get_state(self, key: StorageKey) -> Optional[str]:
+        return self._states.get(key)
+
+    async def set_data(self, key: StorageKey, data: Dict[str, Any]) -> None:
+        if data:
+            self._data[key] = data.copy()
+        else:
+            self._data.pop(key, None)
+        self._dirty.add(key)
+
+    async def get_data(self, key: StorageKey) -> Dict[str, Any]:
+        return self._data.get(key, {}).copy()
+
+    async def flush(self) -> int:
+        """Запись накопленных изменений, возвращает число записей"""
+        async with self._flush_lock:
+            if not self._dirty:
+                return 0
+
+            dirty, self._dirty = self._dirty, set()
+            upserts, deletes = [], []
+            for key in dirty:
+                record = (
+                    key.bot_id,
+                    key.chat_id,
+                    key.user_id,
+                    key.thread_id or 0,
+                    key.business_connection_id or "",
+                    key.destiny,
+                )
+                state = self._states.get(key)
+                data = self._data.get(key)
+                if state is None and not data:
+                    deletes.append(record)
+                else:
+                    data = json.dumps(data, ensure_ascii=False) if data else None
+                    upserts.append((*record, state, data))
+
+            try:
+                written = await self._db.save_fsm_records(upserts, deletes)
+            except Exception:
+                # Ключи вернутся в следующую запись
+                self._dirty |= dirty
+                raise
+            self._flushes += 1
+            self._flushed_records += written
+            return written
+
+    async def close(self) -> None:
+        if self._task is not None:
+            self._task.cancel()
+            await asyncio.gather(self._task, return_exceptions=True)
+            self._task = None
+        await self.flush()
+
+    async def _flush_loop(self):
+        while True:
+            await asyncio.sleep(self.flush_interval)
+            try:
+                await self.flush()
+            except Exception:  # noqa: BLE001
+                logger.exception("Ошибка записи состояний FSM в SQLite")
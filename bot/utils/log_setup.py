@@ -0,0 +1,123 @@
+"""Настройка логирования: очередь, JSON, выборка и скрытие текста"""
+import json
+import logging
+import queue
+import random
+import sys
+from datetime import datetime, timezone
+from logging.handlers import QueueHandler, QueueListener
+from typing import Dict, Optional
+
+
+TEXT_FORMAT = "%(asctime)s - %(name)s - %(levelname)s - %(message)s"
+
+# Атрибуты LogRecord, не относящиеся к extra
+_RECORD_ATTRS = set(vars(logging.makeLogRecord({}))) | {"message", "asctime", "taskName"}
+
+
+class UserText:
+    """Текст пользователя в записи лога.
+
+    Строка получается только при форматировании записи, то есть в потоке
+    логирования; при redact вместо текста пишется его длина.
+    """
+
+    __slots__ = ("text",)
+
+    redact = False
+
+    def __init__(self, text: Optional[str]):
+        self.text = text
+
+    def __str__(self) -> str:
+        if self.text is None:
+            return ""
+        if UserText.redact:
+            return f"<скрыто, {len(self.text)} симв.>"
+        return self.text
+
+    __repr__ = __str__
+
+
+class JsonFormatter(logging.Formatter):
+    """Запись лога одной строкой JSON; поля из extra добавляются как есть"""
+
+    def format(self, record: logging.LogRecord) -> str:
+        payload = {
+            "ts": datetime.fromtimestamp(record.created, timezone.utc).isoformat(timespec="milliseconds"),
+            "level": record.levelname,
+            "logger": record.name,
+            "message": record.getMessage(),
+        }
+        for key, value in record.__dict__.items():
+            if key not in _RECORD_ATTRS and not key.startswith("_"):
+                payload[key] = value
+        if record.exc_info:
+            payload["exc"] = self.formatException(record.exc_info)
+        return json.dumps(payload, ensure_ascii=False, default=str)
+
+
+class SamplingFilter(logging.Filter):
+    """Выборка записей о событиях по типу (extra event_type).
+
+    rates — доля записываемых записей, например {"callback_query": 0.1}.
+    Записи без event_type и записи уровня WARNING и выше не отбрасываются.
+    """
+
+    def __init__(self, rates: Dict[str, float]):
+        super().__init__()
+        self.rates = rates
+
+    def filter(self, record: logging.LogRecord) -> bool:
+        if record.levelno >= logging.WARNING:
+            return True
+        rate = self.rates.get(getattr(record, "event_type", None), 1.0)
+        return rate >= 1.0 or random.random() < rate
+
+
+class _LazyQueueHandler(QueueHandler):
+    """Передаёт запись в очередь без форматирования.
+
+    Стандартный QueueHandler форматирует запись в вызывающем потоке,
+    чтобы её можно было передать в другой процесс; очередь здесь
+    внутри процесса, поэтому форматирование остаётся потоку логирования.
+    """
+
+    def prepare(self, record: logging.LogRecord) -> logging.LogRecord:
+        return record
+
+
+def setup_logging(
+    level: str = "INFO",
+    fmt: str = "text",
+    sample_rates: Optional[Dict[str, float]] = None,
+    redact_text: bool = False,
+    stream=None
+) -> QueueListener:
+    """Логирование через очередь: цикл событий только кладёт запись
+    в очередь, форматирование и запись выполняет отдельный поток.
+
+    Возвращает запущенный QueueListener; его stop() дописывает
+    оставшиеся записи и должен вызываться при завершении процесса.
+    """
+    if fmt not in ("text", "json"):
+        raise ValueError("LOG_FORMAT должен быть text или json")
+
+    output = logging.StreamHandler(stream or sys.stderr)
+    output.setFormatter(JsonFormatter() if fmt == "json" else logging.Formatter(TEXT_FORMAT))
+
+    records: "queue.SimpleQueue[logging.LogRecord]" = queue.SimpleQueue()
+    handler = _LazyQueueHandler(records)
+    if sample_rates:
+        handler.addFilter(SamplingFilter(sample_rates))
+
+    root = logging.getLogger()
+    for existing in root.handlers[:]:
+        root.removeHandler(existing)
+    root.addHandler(handler)
+    root.setLevel(level.upper())
+    UserText.redact = redact_text
+
+    listener = QueueListener(records, output)
+    listener.start()
+    return listener
@@ -0,0 +1,265 @@
+"""Метрики бота в текстовом формате Prometheus"""
+import bisect
+import logging
+import math
+import re
+from typing import Any, Callable, Dict, Iterable, List, Optional, Sequence, Set, Tuple
+
+from aiohttp import web
+
+
+logger = logging.getLogger(__name__)
+
+# Границы корзин гистограмм по умолчанию, в секундах
+DEFAULT_BUCKETS = (0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+
+_NAME_UNSAFE = re.compile(r"[^a-zA-Z0-9_]")
+
+
+def _format_value(value: float) -> str:
+    if value == math.inf:
+        return "+Inf"
+    if isinstance(value, float) and value.is_integer():
+        return str(int(value))
+    return repr(value) if isinstance(value, float) else str(value)
+
+
+def _format_labels(labels: Dict[str, str]) -> str:
+    if not labels:
+        return ""
+    pairs = (
+        '{}="{}"'.format(
+            name, str(value).replace("\\", r"\\").replace("\n", r"\n").replace('"', r"\"")
+        )
+        for name, value in labels.items()
+    )
+    return "{" + ",".join(pairs) + "}"
+
+
+class _Metric:
+    """Метрика с метками; значения по наборам меток хранятся в _values"""
+
+    type_name = ""
+
+    def __init__(self, name: str, documentation: str, labelnames: Sequence[str] = ()):
+        self.name = name
+        self.documentation = documentation
+        self.labelnames = tuple(labelnames)
+        self._values: Dict[Tuple[str, ...], Any] = {}
+
+    def _key(self, labels: Dict[str, Any]) -> Tuple[str, ...]:
+        if len(labels) != len(self.labelnames):
+            raise ValueError(f"Метрика {self.name} ожидает метки {self.labelnames}")
+        return tuple(str(labels[name]) for name in self.labelnames)
+
+    def _labels(self, key: Tuple[str, ...]) -> Dict[str, str]:
+        return dict(zip(self.labelnames, key))
+
+    def samples(self) -> Iterable[Tuple[str, Dict[str, str], float]]:
+        for key, value in self._values.items():
+            yield self.name, self._labels(key), value
+
+
+class Counter(_Metric):
+    """Монотонно растущий счётчик"""
+
+    type_name = "counter"
+
+    def inc(self, amount: float = 1, **labels: Any):
+        key = self._key(labels)
+        self._values[key] = self._values.get(key, 0) + amount
+
+    def value(self, **labels: Any) -> float:
+        return self._values.get(self._key(labels), 0)
+
+
+class Gauge(_Metric):
+    """Текущее значение, которое может расти и убывать"""
+
+    type_name = "gauge"
+
+    def set(self, value: float, **labels: Any):
+        self._values[self._key(labels)] = value
+
+    def inc(self, amount: float = 1, **labels: Any):
+        key = self._key(labels)
+        self._values[key] = self._values.get(key, 0) + amount
+
+    def dec(self, amount: float = 1, **labels: Any):
+        self.inc(-amount, **labels)
+
+    def value(self, **labels: Any) -> float:
+        return self._values.get(self._key(labels), 0)
+
+
+class Histogram(_Metric):
+    """Распределение значений по корзинам с суммой и числом наблюдений"""
+
+    type_name = "histogram"
+
+    def __init__(
+        self,
+        name: str,
+        documentation: str,
+        labelnames: Sequence[str] = (),
+        buckets: Sequence[float] = DEFAULT_BUCKETS
+    ):
+        super().__init__(name, documentation, labelnames)
+        self.buckets = tuple(sorted(buckets))
+
+    def observe(self, value: float, **labels: Any):
+        key = self._key(labels)
+        state = self._values.get(key)
+        if state is None:
+            # [счётчики корзин без накопления, сумма, число]
+            state = self._values[key] = [[0] * (len(self.buckets) + 1), 0.0, 0]
+        state[0][bisect.bisect_left(self.buckets, value)] += 1
+        state[1] += value
+        state[2] += 1
+
+    def count(self, **labels: Any) -> int:
+        state = self._values.get(self._key(labels))
+        return state[2] if state else 0
+
+    def samples(self) -> Iterable[Tuple[str, Dict[str, str], float]]:
+        for key, (counts, total, count) in self._values.items():
+            labels = self._labels(key)
+            cumulative = 0
+            for bound, bucket_count in zip((*self.buckets, math.inf), counts):
+                cumulative += bucket_count
+                yield f"{self.name}_bucket", {**labels, "le": _format_value(float(bound))}, cumulative
+            yield f"{self.name}_sum", labels, total
+            yield f"{self.name}_count", labels, count
+
+
+class MetricsRegistry:
+    """Набор метрик и источников stats для выдачи в формате Prometheus.
+
+    Кроме собственных метрик, registry собирает при каждом запросе
+    словари stats компонентов (add_stats): числовые значения становятся
+    gauge с именем <prefix>_<ключ>, вложенные словари чисел — gauge
+    с меткой key.
+    """
+
+    def __init__(self, namespace: str = "artlift"):
+        self.namespace = namespace
+        self._metrics: Dict[str, _Metric] = {}
+        self._stats: List[Tuple[str, Callable[[], Dict[str, Any]]]] = []
+
+    def _add(self, metric: _Metric) -> Any:
+        if metric.name in self._metrics:
+            raise ValueError(f"Метрика {metric.name} уже зарегистрирована")
+        self._metrics[metric.name] = metric
+        return metric
+
+    def counter(self, name: str, documentation: str, labelnames: Sequence[str] = ()) -> Counter:
+        return self._add(Counter(f"{self.namespace}_{name}", documentation, labelnames))
+
+    def gauge(self, name: str, documentation: str, labelnames: Sequence[str] = ()) -> Gauge:
+        return self._add(Gauge(f"{self.namespace}_{name}", documentation, labelnames))
+
+    def histogram(
+        self,
+        name: str,
+        documentation: str,
+        labelnames: Sequence[str] = (),
+        buckets: Sequence[float] = DEFAULT_BUCKETS
+    ) -> Histogram:
+        return self._add(Histogram(f"{self.namespace}_{name}", documentation, labelnames, buckets))
+
+    def add_stats(self, prefix: str, source: Callable[[], Dict[str, Any]]):
+        """Источник stats компонента, например lambda: concurrency.stats"""
+        self._stats.append((f"{self.namespace}_{prefix}", source))
+
+    def clear_stats(self):
+        self._stats.clear()
+
+    def render(self) -> str:
+        """Все метрики в текстовом формате Prometheus 0.0.4"""
+        lines: List[str] = []
+        typed: Set[str] = set()
+        for metric in self._metrics.values():
+            typed.add(metric.name)
+            lines.append(f"# HELP {metric.name} {metric.documentation}")
+            lines.append(f"# TYPE {metric.name} {metric.type_name}")
+            for name, labels, value in metric.samples():
+                lines.append(f"{name}{_format_labels(labels)} {_format_value(value)}")
+
+        for prefix, source in self._stats:
+            try:
+                stats = source()
+            except Exception:  # noqa: BLE001
+                logger.exception("Не удалось собрать stats для %s", prefix)
+                continue
+            for name, labels, value in self._stats_samples(prefix, stats):
+                if name not in typed:
+                    typed.add(name)
+                    lines.append(f"# TYPE {name} gauge")
+                lines.append(f"{name}{_format_labels(labels)} {_format_value(value)}")
+        return "\n".join(lines) + "\n"
+
+    @staticmethod
+    def _stats_samples(prefix: str, stats: Dict[str, Any]):
+        for key, value in stats.items():
+            name = _NAME_UNSAFE.sub("_", f"{prefix}_{key}")
+            if isinstance(value, (int, float)):
+                yield name, {}, float(value)
+            elif isinstance(value, dict):
+                for label, nested in value.items():
+                    if isinstance(nested, (int, float)):
+                        yield name, {"key": label}, float(nested)
+
+
+registry = MetricsRegistry()
+
+UPDATE_DURATION = registry.histogram(
+    "update_duration_seconds", "Время обработки обновления", ["event_type"]
+)
+UPDATES = registry.counter(
+    "updates_total", "Обработанные обновления", ["event_type", "status"]
+)
+DB_QUERY_DURATION = registry.histogram(
+    "db_query_duration_seconds", "Время запроса к базе данных", ["query"]
+)
+DB_QUERY_ERRORS = registry.counter(
+    "db_query_errors_total", "Запросы к базе данных, завершившиеся ошибкой", ["query"]
+)
+TELEGRAM_CALL_DURATION = registry.histogram(
+    "telegram_call_duration_seconds", "Время одного запроса к Bot API", ["method"]
+)
+TELEGRAM_CALLS = registry.counter(
+    "telegram_calls_total", "Запросы к Bot API", ["method", "status"]
+)
+TELEGRAM_RETRIES = registry.counter(
+    "telegram_retries_total", "Повторы вызовов Bot API после ошибок", ["method"]
+)
+
+
+async def start_metrics_server(
+    host: str,
+    port: int,
+    metrics: Optional[MetricsRegistry] = None
+) -> Optional[web.AppRunner]:
+    """HTTP-сервер с GET /metrics; None, если порт занят"""
+    metrics = metrics or registry
+
+    async def _handle(request: web.Request) -> web.Response:
+        return web.Response(
+            text=metrics.render(),
+            content_type="text/plain",
+            headers={"Cache-Control": "no-store"}
+        )
+
+    app = web.Application()
+    app.router.add_get("/metrics", _handle)
+    runner = web.AppRunner(app, handle_signals=False, access_log=None)
+    await runner.setup()
+    try:
+        await web.TCPSite(runner, host, port).start()
+    except OSError as exc:
+        # Например, второй процесс на той же машине: бот работает без метрик
+        logger.warning("Метрики недоступны на %s:%s: %s", host, port, exc)
+        await runner.cleanup()
+        return None
+    logger.info("Метрики доступны на http://%s:%s/metrics", host, port)
+    return runner
@@ -0,0 +1,116 @@
+"""Ограничение частоты событий алгоритмом token bucket"""
+import time
+from typing import Callable, Dict
+
+from redis.asyncio.client import Redis
+
+
+class TokenBucket:
+    """Корзина токенов: rate токенов в секунду, не больше capacity про запас"""
+
+    def __init__(
+        self,
+        rate: float,
+        capacity: float | None = None,
+        clock: Callable[[], float] = time.monotonic
+    ):
+        if rate <= 0:
+            raise ValueError("rate must be positive")
+
+        self.rate = rate
+        self.capacity = capacity if capacity is not None else max(1.0, rate)
+        self._clock = clock
+        self._tokens = self.capacity
+        self._updated_at = clock()
+
+    def _refill(self):
+        now = self._clock()
+        elapsed = now - self._updated_at
+        if elapsed > 0:
+            self._tokens = min(self.capacity, self._tokens + elapsed * self.rate)
+        self._updated_at = now
+
+    def take(self, amount: float = 1.0) -> bool:
+        """Списание токенов, если их достаточно"""
+        self._refill()
+        if self._tokens >= amount:
+            self._tokens -= amount
+            return True
+        return False
+
+    def take_up_to(self, amount: int) -> int:
+        """Списание не больше amount целых токенов, возвращает списанное число"""
+        self._refill()
+        granted = min(amount, int(self._tokens))
+        self._tokens -= granted
+        return granted
+
+
+class MemoryBucketStore:
+    """Корзины токенов по ключам в памяти процесса.
+
+    Корзина, простоявшая дольше времени полного восполнения, ничем не
+    отличается от новой, поэтому такие корзины периодически удаляются.
+    """
+
+    CLEANUP_EVERY = 1000
+
+    def __init__(self, clock: Callable[[], float] = time.monotonic):
+        self._clock = clock
+        self._buckets: Dict[str, TokenBucket] = {}
+        self._calls = 0
+
+    def __len__(self) -> int:
+        return len(self._buckets)
+
+    async def take(self, key: str, rate: float, capacity: float) -> bool:
+        self._calls += 1
+        if self._calls % self.CLEANUP_EVERY == 0:
+            self._cleanup()
+
+        bucket = self._buckets.get(key)
+        if bucket is None:
+            bucket = self._buckets[key] = TokenBucket(rate, capacity, clock=self._clock)
+        return bucket.take()
+
+    def _cleanup(self):
+        now = self._clock()
+        self._buckets = {
+            key: bucket for key, bucket in self._buckets.items()
+            if now - bucket._updated_at < bucket.capacity / bucket.rate
+        }
+
+
+# Корзина в хэше {tokens, ts}; время берётся с сервера Redis, чтобы
+# расхождение часов воркеров не влияло на лимит
+_TAKE_SCRIPT = """
+local rate = tonumber(ARGV[1])
+local capacity = tonumber(ARGV[2])
+local time = redis.call('TIME')
+local now = tonumber(time[1]) + tonumber(time[2]) / 1000000
+local state = redis.call('HMGET', KEYS[1], 'tokens', 'ts')
+local tokens = tonumber(state[1]) or capacity
+local ts = tonumber(state[2]) or now
+tokens = math.min(capacity, tokens + math.max(0, now - ts) * rate)
+local allowed = 0
+if tokens >= 1 then
+    tokens = tokens - 1
+    allowed = 1
+end
+redis.call('HSET', KEYS[1], 'tokens', tostring(tokens), 'ts', tostring(now))
+redis.call('PEXPIRE', KEYS[1], math.ceil(capacity / rate * 1000))
+return allowed
+"""
+
+
+class RedisBucketStore:
+    """Корзины токенов в Redis, общие для всех процессов бота"""
+
+    def __init__(self, redis: Redis, prefix: str = "artlift:throttle"):
+        self.redis = redis
+        self.prefix = prefix
+        self._take = redis.register_script(_TAKE_SCRIPT)
+
+    async def take(self, key: str, rate: float, capacity: float) -> bool:
+        allowed = await self._take(keys=[f"{self.prefix}:{key}"], args=[rate, capacity])
+        return bool(allowed)
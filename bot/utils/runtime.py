@@ -0,0 +1,48 @@
+"""Быстрый режим выполнения: uvloop и orjson, если они установлены"""
+import asyncio
+import json
+import logging
+from typing import Any, Callable, Tuple
+
+from bot.utils.session import TunedAiohttpSession
+
+
+logger = logging.getLogger(__name__)
+
+
+def install_uvloop() -> bool:
+    """Установка политики цикла событий uvloop; вызывается до asyncio.run"""
+    try:
+        import uvloop
+    except ImportError:
+        logger.warning("FAST_RUNTIME: uvloop не установлен, используется стандартный цикл")
+        return False
+
+    asyncio.set_event_loop_policy(uvloop.EventLoopPolicy())
+    return True
+
+
+def get_json_codec(fast: bool = True) -> Tuple[Callable[..., Any], Callable[..., str]]:
+    """Пара (loads, dumps) для сессии бота: orjson или стандартный json"""
+    if fast:
+        try:
+            import orjson
+        except ImportError:
+            logger.warning("FAST_RUNTIME: orjson не установлен, используется json")
+        else:
+            def dumps(obj: Any) -> str:
+                # aiogram ожидает строку: JSON вложенных объектов уходит полем формы
+                return orjson.dumps(obj).decode()
+
+            return orjson.loads, dumps
+
+    return json.loads, json.dumps
+
+
+def create_session(fast: bool = False, **kwargs: Any) -> TunedAiohttpSession:
+    """Сессия Bot API; в быстром режиме — с кодеком orjson.
+
+    Остальные аргументы (настройки пула, таймауты) передаются в TunedAiohttpSession.
+    """
+    json_loads, json_dumps = get_json_codec(fast)
+    return TunedAiohttpSession(json_loads=json_loads, json_dumps=json_dumps, **kwargs)
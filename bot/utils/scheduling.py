@@ -0,0 +1,69 @@
+"""Сглаживание времени отправки: детерминированный джиттер и тихие часы"""
+import logging
+import zlib
+from datetime import datetime, time, timedelta, timezone, tzinfo
+from typing import Optional
+from zoneinfo import ZoneInfo, ZoneInfoNotFoundError
+
+
+logger = logging.getLogger(__name__)
+
+
+def deterministic_jitter(user_id: int, salt: str, window_seconds: float) -> float:
+    """Смещение в [0, window_seconds), одинаковое для пары (user_id, salt)"""
+    if window_seconds <= 0:
+        return 0.0
+    digest = zlib.crc32(f"{user_id}:{salt}".encode())
+    return digest / 2**32 * window_seconds
+
+
+def get_timezone(name: str) -> tzinfo:
+    """Часовой пояс по имени IANA с откатом на UTC"""
+    try:
+        return ZoneInfo(name)
+    except (ZoneInfoNotFoundError, ValueError):
+        logger.warning("Неизвестный часовой пояс %r, используется UTC", name)
+        return timezone.utc
+
+
+class QuietHours:
+    """Интервал тихих часов в локальном времени, например 22-9 (через полночь)"""
+
+    def __init__(self, start_hour: int, end_hour: int, tz: tzinfo):
+        if not (0 <= start_hour < 24 and 0 <= end_hour < 24) or start_hour == end_hour:
+            raise ValueError("Invalid quiet hours")
+        self.start = time(start_hour)
+        self.end = time(end_hour)
+        self.tz = tz
+
+    @classmethod
+    def parse(cls, value: str, timezone_name: str) -> Optional["QuietHours"]:
+        """Разбор строки вида "22-9"; пустая строка отключает тихие часы"""
+        value = value.strip()
+        if not value:
+            return None
+        start, _, end = value.partition("-")
+        if not start.strip().isdigit() or not end.strip().isdigit():
+            raise ValueError(f"Invalid quiet hours: {value!r}")
+        return cls(int(start), int(end), get_timezone(timezone_name))
+
+    def contains(self, moment: datetime) -> bool:
+        """Попадает ли момент в тихие часы"""
+        local = moment.astimezone(self.tz).time()
+        if self.start < self.end:
+            return self.start <= local < self.end
+        return local >= self.start or local < self.end
+
+    def next_end(self, moment: datetime) -> datetime:
+        """Ближайший конец тихих часов после момента, который в них попадает"""
+        local = moment.astimezone(self.tz)
+        end = datetime.combine(local.date(), self.end, tzinfo=self.tz)
+        if end <= local:
+            end += timedelta(days=1)
+        return end
+
+    def shift(self, moment: datetime, offset: float = 0.0) -> datetime:
+        """Перенос момента из тихих часов на их конец плюс offset секунд"""
+        if not self.contains(moment):
+            return moment
+        return self.next_end(moment) + timedelta(seconds=offset)
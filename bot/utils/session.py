@@ -0,0 +1,97 @@
+"""Сессия Bot API с настраиваемым пулом соединений и таймаутами"""
+from typing import Any, Dict, Optional
+
+from aiogram import __version__
+from aiogram.client.bot import Bot
+from aiogram.client.session.aiohttp import AiohttpSession
+from aiogram.methods import TelegramMethod
+from aiogram.methods.base import TelegramType
+from aiohttp import ClientSession, TraceConfig
+from aiohttp.hdrs import USER_AGENT
+from aiohttp.http import SERVER_SOFTWARE
+
+
+class TunedAiohttpSession(AiohttpSession):
+    """AiohttpSession с настройками пула и статистикой переиспользования.
+
+    Параметры пула передаются в TCPConnector: общий лимит соединений,
+    лимит на хост (все запросы идут на api.telegram.org, поэтому он
+    фактически ограничивает параллельные запросы), время жизни
+    простаивающего keep-alive соединения и TTL кэша DNS.
+    method_timeouts задаёт таймауты отдельных методов Bot API
+    ("sendMessage", "answerCallbackQuery", ...); явный request_timeout
+    вызова (например, у getUpdates) имеет приоритет.
+    """
+
+    def __init__(
+        self,
+        limit: int = 100,
+        limit_per_host: int = 0,
+        keepalive_timeout: float = 15.0,
+        ttl_dns_cache: Optional[int] = 3600,
+        method_timeouts: Optional[Dict[str, float]] = None,
+        **kwargs: Any
+    ):
+        super().__init__(limit=limit, **kwargs)
+        self._connector_init.update(
+            limit_per_host=limit_per_host,
+            keepalive_timeout=keepalive_timeout,
+            ttl_dns_cache=ttl_dns_cache,
+        )
+        self.method_timeouts = method_timeouts or {}
+
+        self._stats = {
+            "requests": 0,
+            "request_errors": 0,
+            "connections_created": 0,
+            "connections_reused": 0,
+            "dns_cache_hits": 0,
+            "dns_cache_misses": 0,
+        }
+        self._trace_config = TraceConfig()
+        self._trace_config.on_request_end.append(self._count("requests"))
+        self._trace_config.on_request_exception.append(self._count("request_errors"))
+        self._trace_config.on_connection_create_end.append(self._count("connections_created"))
+        self._trace_config.on_connection_reuseconn.append(self._count("connections_reused"))
+        self._trace_config.on_dns_cache_hit.append(self._count("dns_cache_hits"))
+        self._trace_config.on_dns_cache_miss.append(self._count("dns_cache_misses"))
+
+    @property
+    def stats(self) -> Dict[str, float]:
+        """Счётчики запросов и доля запросов на уже открытых соединениях"""
+        stats = dict(self._stats)
+        connections = stats["connections_created"] + stats["connections_reused"]
+        stats["reuse_ratio"] = stats["connections_reused"] / connections if connections else 0.0
+        return stats
+
+    def _count(self, name: str):
+        async def _on_event(session, context, params):
+            self._stats[name] += 1
+        return _on_event
+
+    async def create_session(self) -> ClientSession:
+        # Повторяет AiohttpSession.create_session, добавляя трассировку
+        if self._should_reset_connector:
+            await self.close()
+
+        if self._session is None or self._session.closed:
+            self._session = ClientSession(
+                connector=self._connector_type(**self._connector_init),
+                headers={
+                    USER_AGENT: f"{SERVER_SOFTWARE} aiogram/{__version__}",
+                },
+                trace_configs=[self._trace_config],
+            )
+            self._should_reset_connector = False
+
+        return self._session
+
+    async def make_request(
+        self,
+        bot: Bot,
+        method: TelegramMethod[TelegramType],
+        timeout: Optional[int] = None
+    ) -> TelegramType:
+        if timeout is None:
+            timeout = self.method_timeouts.get(method.__api_method__)
+        return await super().make_request(bot, method, timeout=timeout)
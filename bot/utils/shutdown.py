@@ -0,0 +1,150 @@
+"""Координированная остановка бота"""
+import asyncio
+import inspect
+import logging
+import signal
+import time
+from typing import Any, Callable, Dict, Iterable, List, Optional
+
+
+logger = logging.getLogger(__name__)
+
+
+class ShutdownCoordinator:
+    """Остановка бота по фазам с общим дедлайном.
+
+    1. stop — прекращение приёма новых обновлений;
+    2. drain — ожидание обработчиков в работе и исходящих отправок,
+       каждый получает оставшееся до дедлайна время;
+    3. flush — сброс отложенных записей в SQLite;
+    4. close — закрытие соединений и планировщика.
+
+    Фазы выполняются строго по порядку; ошибка одного обработчика
+    логируется и не мешает остальным.
+    """
+
+    PHASES = ("stop", "drain", "flush", "close")
+
+    def __init__(self, timeout: float = 20.0):
+        self.timeout = timeout
+        self.timings: Dict[str, float] = {}
+        self._callbacks: Dict[str, List[Callable[..., Any]]] = {
+            phase: [] for phase in self.PHASES
+        }
+        self._stop_requested = asyncio.Event()
+        self._signals: List[int] = []
+        self._done = False
+
+    @property
+    def stopping(self) -> bool:
+        """Запрошена ли остановка"""
+        return self._stop_requested.is_set()
+
+    def on_stop(self, callback: Callable[[], Any]):
+        """Регистрация обработчика прекращения приёма обновлений"""
+        self._callbacks["stop"].append(callback)
+
+    def on_drain(self, callback: Callable[[float], Any]):
+        """Регистрация ожидания незавершённой работы; получает таймаут в секундах"""
+        self._callbacks["drain"].append(callback)
+
+    def on_flush(self, callback: Callable[[], Any]):
+        """Регистрация сброса отложенных записей"""
+        self._callbacks["flush"].append(callback)
+
+    def on_close(self, callback: Callable[[], Any]):
+        """Регистрация закрытия ресурсов"""
+        self._callbacks["close"].append(callback)
+
+    def request_stop(self, signum: Optional[int] = None):
+        """Запрос остановки (вызывается и из обработчика сигнала)"""
+        if not self.stopping:
+            logger.info(
+                "Получен %s, начинаем остановку",
+                signal.Signals(signum).name if signum else "запрос остановки"
+            )
+        self._stop_requested.set()
+
+    def install_signal_handlers(
+        self,
+        signals: Iterable[int] = (signal.SIGTERM, signal.SIGINT)
+    ):
+        """Перехват сигналов остановки в цикле событий"""
+        loop = asyncio.get_running_loop()
+        for signum in signals:
+            try:
+                loop.add_signal_handler(signum, self.request_stop, signum)
+            except NotImplementedError:  # pragma: no cover - Windows
+                continue
+            self._signals.append(signum)
+
+    def remove_signal_handlers(self):
+        loop = asyncio.get_running_loop()
+        for signum in self._signals:
+            loop.remove_signal_handler(signum)
+        self._signals.clear()
+
+    async def wait(self, *tasks: asyncio.Task):
+        """Ожидание запроса остановки или завершения любой из задач приёма"""
+        stop_waiter = asyncio.create_task(self._stop_requested.wait())
+        try:
+            done, _ = await asyncio.wait(
+                [stop_waiter, *tasks],
+                return_when=asyncio.FIRST_COMPLETED
+            )
+        finally:
+            stop_waiter.cancel()
+
+        for task in tasks:
+            if task in done and not task.cancelled() and task.exception():
+                # Упавший приём обновлений — тоже повод остановиться
+                logger.error("Приём обновлений завершился с ошибкой", exc_info=task.exception())
+        self._stop_requested.set()
+
+    async def shutdown(self) -> bool:
+        """Выполнение всех фаз, возвращает True, если работа завершилась в срок"""
+        if self._done:
+            return True
+        self._done = True
+        self._stop_requested.set()
+
+        deadline = time.monotonic() + self.timeout
+        drained = True
+        for phase in self.PHASES:
+            started = time.monotonic()
+            if phase == "drain":
+                drained = await self._drain(deadline)
+            else:
+                for callback in self._callbacks[phase]:
+                    await self._call(phase, callback)
+            self.timings[phase] = time.monotonic() - started
+
+        logger.info(
+            "Остановка завершена: %s",
+            ", ".join(f"{phase}={elapsed:.2f}s" for phase, elapsed in self.timings.items())
+        )
+        if not drained:
+            logger.warning("Не вся работа завершилась за %.1f с", self.timeout)
+        return drained
+
+    async def _drain(self, deadline: float) -> bool:
+        callbacks = self._callbacks["drain"]
+        if not callbacks:
+            return True
+
+        remaining = max(0.0, deadline - time.monotonic())
+        results = await asyncio.gather(
+            *(self._call("drain", callback, remaining) for callback in callbacks)
+        )
+        # None — обработчик не сообщает результат, считаем его успешным
+        return all(result is not False for result in results)
+
+    async def _call(self, phase: str, callback: Callable[..., Any], *args) -> Any:
+        try:
+            result = callback(*args)
+            if inspect.isawaitable(result):
+                result = await result
+            return result
+        except Exception:  # noqa: BLE001
+            logger.exception("Ошибка на фазе остановки %s", phase)
+            return False
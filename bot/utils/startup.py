@@ -0,0 +1,58 @@
+"""Профилирование запуска бота"""
+import asyncio
+import logging
+import time
+from contextlib import contextmanager
+from typing import Any, Awaitable, Dict
+
+
+logger = logging.getLogger(__name__)
+
+
+class StartupProfiler:
+    """Замер длительности фаз запуска.
+
+    Фазы можно замерять последовательно (phase) или запускать
+    независимые фазы одновременно (gather) — тогда общая длительность
+    определяется самой долгой из них, а не суммой.
+    """
+
+    def __init__(self):
+        self.timings: Dict[str, float] = {}
+        self._started = time.perf_counter()
+
+    @contextmanager
+    def phase(self, name: str):
+        """Замер синхронного участка запуска"""
+        started = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.timings[name] = time.perf_counter() - started
+
+    async def measure(self, name: str, awaitable: Awaitable[Any]) -> Any:
+        """Ожидание корутины с записью её длительности"""
+        started = time.perf_counter()
+        try:
+            return await awaitable
+        finally:
+            self.timings[name] = time.perf_counter() - started
+
+    async def gather(self, **phases: Awaitable[Any]) -> Dict[str, Any]:
+        """Одновременное выполнение независимых фаз, возвращает их результаты"""
+        results = await asyncio.gather(
+            *(self.measure(name, awaitable) for name, awaitable in phases.items())
+        )
+        return dict(zip(phases, results))
+
+    @property
+    def total(self) -> float:
+        """Время с момента создания профилировщика"""
+        return time.perf_counter() - self._started
+
+    def log_report(self):
+        logger.info(
+            "Запуск за %.2f с: %s",
+            self.total,
+            ", ".join(f"{name}={elapsed:.3f}s" for name, elapsed in self.timings.items())
+        )
@@ -2,15 +2,20 @@
 
 import asyncio
 import logging
-from typing import Callable, Iterable, Tuple
+from collections import OrderedDict
+from datetime import datetime
+from typing import Callable, Dict, Iterable, Optional, Tuple
 
 from aiohttp import ClientError
 from aiogram.exceptions import (
+    TelegramBadRequest,
     TelegramNetworkError,
     TelegramRetryAfter,
     TelegramServerError,
 )
 
+from bot.utils.metrics import TELEGRAM_RETRIES
+
 
 logger = logging.getLogger(__name__)
 
@@ -24,6 +29,15 @@ DEFAULT_RETRY_EXCEPTIONS: Tuple[type, ...] = (
 )
 
 
+def _method_name(exc: BaseException, send_callable: Callable) -> str:
+    """Класс метода Bot API из ошибки, как в метриках сессии"""
+    method = getattr(exc, "method", None)
+    if method is not None:
+        return type(method).__name__
+    # Сетевая ошибка aiohttp или таймаут: метода в исключении нет
+    return getattr(send_callable, "__name__", "call")
+
+
 async def send_with_retry(
     send_callable: Callable,
     *args,
@@ -74,6 +88,8 @@ async def send_with_retry(
                     retries,
                 )
 
+            # Время и исход самих запросов учитывает ApiMetricsMiddleware сессии
+            TELEGRAM_RETRIES.inc(method=_method_name(exc, send_callable))
             await asyncio.sleep(delay)
 
 
@@ -87,14 +103,102 @@ async def answer_with_retry(message, *args, **kwargs):
     )
 
 
+class EditCache:
+    """Последнее отправленное содержимое сообщений для пропуска повторных правок.
+
+    Для (chat_id, message_id) хранится хэш текста с параметрами правки
+    и edit_date, которую вернул Telegram. Правка пропускается, только если
+    хэш совпал и у сообщения та же edit_date: если сообщение изменили в
+    обход кэша (другой процесс, другой метод), правка отправляется.
+    Размер ограничен maxsize, вытесняются давно не используемые записи.
+    """
+
+    def __init__(self, maxsize: int = 10000):
+        self.maxsize = maxsize
+        self._entries: "OrderedDict[Tuple[int, int], Tuple[int, Optional[datetime]]]" = OrderedDict()
+        self._edits = 0
+        self._skipped = 0
+        self._not_modified = 0
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    @property
+    def stats(self) -> Dict[str, int]:
+        """Отправленные правки, пропущенные по кэшу и отклонённые Telegram как повтор"""
+        return {
+            "edits": self._edits,
+            "skipped": self._skipped,
+            "not_modified": self._not_modified,
+        }
+
+    def is_current(self, message, content_hash: int) -> bool:
+        """Совпадает ли правка с тем, что уже показано в сообщении"""
+        key = (message.chat.id, message.message_id)
+        if self._entries.get(key) != (content_hash, message.edit_date):
+            return False
+        self._entries.move_to_end(key)
+        self._skipped += 1
+        return True
+
+    def remember(
+        self,
+        message,
+        content_hash: int,
+        edit_date: Optional[datetime],
+        not_modified: bool = False
+    ):
+        """Запоминает содержимое после правки или ответа «message is not modified»"""
+        if not_modified:
+            self._not_modified += 1
+        else:
+            self._edits += 1
+        key = (message.chat.id, message.message_id)
+        self._entries[key] = (content_hash, edit_date)
+        self._entries.move_to_end(key)
+        if len(self._entries) > self.maxsize:
+            self._entries.popitem(last=False)
+
+    def clear(self):
+        self._entries.clear()
+
+
+edit_cache = EditCache()
+
+
+def _content_hash(args: tuple, kwargs: dict) -> int:
+    # repr моделей aiogram (клавиатуры, entities) детерминирован
+    return hash((repr(args), repr(sorted(kwargs.items()))))
+
+
 async def edit_text_with_retry(message, *args, **kwargs):
-    """Обертка для message.edit_text с повторными попытками."""
-    return await send_with_retry(
-        message.edit_text,
-        *args,
-        log_context=f"chat_id={message.chat.id}",
-        **kwargs,
-    )
+    """Обертка для message.edit_text с повторными попытками.
+
+    Правка с тем же текстом и клавиатурой, что уже отправлены в это
+    сообщение, пропускается без запроса к Telegram (см. EditCache).
+    """
+    content_hash = _content_hash(args, kwargs)
+    if edit_cache.is_current(message, content_hash):
+        return message
+
+    try:
+        result = await send_with_retry(
+            message.edit_text,
+            *args,
+            log_context=f"chat_id={message.chat.id}",
+            **kwargs,
+        )
+    except TelegramBadRequest as exc:
+        if "message is not modified" not in exc.message:
+            raise
+        # Содержимое уже такое же — для пользователя это не ошибка
+        edit_cache.remember(message, content_hash, message.edit_date, not_modified=True)
+        return message
+
+    # Правка inline-сообщения возвращает True, а не Message
+    if hasattr(result, "edit_date"):
+        edit_cache.remember(message, content_hash, result.edit_date)
+    return result
 
 
 async def bot_send_with_retry(bot_send_callable: Callable, chat_id: int | str, *args, **kwargs):
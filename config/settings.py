@@ -1,6 +1,6 @@
 """Конфигурация бота"""
 import os
-from typing import List
+from typing import Dict, List, Tuple
 from dotenv import load_dotenv
 
 load_dotenv()
@@ -12,10 +12,116 @@ class Settings:
     # Telegram Bot
     BOT_TOKEN: str = os.getenv("BOT_TOKEN", "")
     
+    # Режим получения обновлений: polling, webhook,
+    # stream_receiver (webhook -> Redis Stream) или stream_worker
+    BOT_MODE: str = os.getenv("BOT_MODE", "polling").strip().lower()
+    
+    # Webhook
+    WEBHOOK_BASE_URL: str = os.getenv("WEBHOOK_BASE_URL", "").strip().rstrip("/")
+    WEBHOOK_PATH: str = os.getenv("WEBHOOK_PATH", "/webhook")
+    WEBHOOK_SECRET: str = os.getenv("WEBHOOK_SECRET", "")
+    WEBAPP_HOST: str = os.getenv("WEBAPP_HOST", "0.0.0.0")
+    WEBAPP_PORT: int = int(os.getenv("WEBAPP_PORT", "8080"))
+    
+    # Параллельная обработка обновлений разных чатов; 0 — без общего лимита
+    # (обновления одного чата обрабатываются по очереди в любом случае)
+    UPDATE_CONCURRENCY: int = int(os.getenv("UPDATE_CONCURRENCY", "32"))
+    
+    # Фоновые задачи хендлеров (уведомления админам): сколько выполняется
+    # одновременно и сколько может ждать очереди
+    BACKGROUND_TASK_LIMIT: int = int(os.getenv("BACKGROUND_TASK_LIMIT", "16"))
+    BACKGROUND_TASK_QUEUE: int = int(os.getenv("BACKGROUND_TASK_QUEUE", "1000"))
+    
+    # Сколько секунд при остановке ждать завершения начатой работы
+    SHUTDOWN_TIMEOUT: float = float(os.getenv("SHUTDOWN_TIMEOUT", "20"))
+    
+    # Быстрый режим: цикл событий uvloop и JSON через orjson (если установлены)
+    FAST_RUNTIME: bool = os.getenv("FAST_RUNTIME", "false").lower() in ("1", "true", "yes")
+    
+    # Telegram Bot API: пул соединений и таймауты запросов
+    TELEGRAM_POOL_SIZE: int = int(os.getenv("TELEGRAM_POOL_SIZE", "100"))
+    # 0 — без отдельного лимита на хост
+    TELEGRAM_POOL_PER_HOST: int = int(os.getenv("TELEGRAM_POOL_PER_HOST", "0"))
+    TELEGRAM_KEEPALIVE_TIMEOUT: float = float(os.getenv("TELEGRAM_KEEPALIVE_TIMEOUT", "30"))
+    TELEGRAM_DNS_CACHE_TTL: int = int(os.getenv("TELEGRAM_DNS_CACHE_TTL", "3600"))
+    TELEGRAM_REQUEST_TIMEOUT: float = float(os.getenv("TELEGRAM_REQUEST_TIMEOUT", "60"))
+    # Таймауты отдельных методов: "метод=секунды" через запятую
+    TELEGRAM_METHOD_TIMEOUTS: Dict[str, float] = {
+        method.strip(): float(seconds)
+        for method, _, seconds in (
+            item.partition("=")
+            for item in os.getenv(
+                "TELEGRAM_METHOD_TIMEOUTS",
+                "answerCallbackQuery=5,sendMessage=20,editMessageText=20"
+            ).split(",")
+        )
+        if method.strip() and seconds.strip()
+    }
+    
+    # Логирование: уровень, формат (text или json), доля записываемых
+    # записей о событиях по типу ("callback_query=0.1,message=0.5")
+    # и скрытие текста сообщений пользователей
+    LOG_LEVEL: str = os.getenv("LOG_LEVEL", "INFO")
+    LOG_FORMAT: str = os.getenv("LOG_FORMAT", "text")
+    LOG_SAMPLE_RATES: Dict[str, float] = {
+        event_type.strip(): float(rate)
+        for event_type, _, rate in (
+            item.partition("=") for item in os.getenv("LOG_SAMPLE_RATES", "").split(",")
+        )
+        if event_type.strip() and rate.strip()
+    }
+    LOG_REDACT_TEXT: bool = os.getenv("LOG_REDACT_TEXT", "false").lower() in ("1", "true", "yes")
+
+    # Метрики в формате Prometheus на http://METRICS_HOST:METRICS_PORT/metrics
+    # (0 — не запускать)
+    METRICS_HOST: str = os.getenv("METRICS_HOST", "127.0.0.1")
+    METRICS_PORT: int = int(os.getenv("METRICS_PORT", "9108"))
+    
     # Redis
     REDIS_HOST: str = os.getenv("REDIS_HOST", "redis")
     REDIS_PORT: int = int(os.getenv("REDIS_PORT", "6379"))
     
+    # Срок жизни состояния и данных FSM в секундах (0 — без срока):
+    # брошенные сценарии (вопрос без текста, черновик сообщения) удаляются
+    FSM_STATE_TTL: int = int(os.getenv("FSM_STATE_TTL", "172800"))
+    FSM_DATA_TTL: int = int(os.getenv("FSM_DATA_TTL", "172800"))
+    
+    # Хранилище FSM: redis или sqlite (в памяти с отложенной записью в БД;
+    # только для одного процесса). FSM_FLUSH_INTERVAL — период записи, секунды
+    FSM_STORAGE: str = os.getenv("FSM_STORAGE", "redis").strip().lower()
+    FSM_FLUSH_INTERVAL: float = float(os.getenv("FSM_FLUSH_INTERVAL", "1"))
+    
+    # Последовательная обработка событий одного чата: memory (один процесс,
+    # блокировка чата в ConcurrencyMiddleware), redis (несколько процессов),
+    # none или auto — redis при нескольких репликах или воркерах, иначе memory
+    EVENT_ISOLATION: str = os.getenv("EVENT_ISOLATION", "auto").strip().lower()
+    # Срок жизни блокировки в Redis на случай падения процесса, секунды
+    EVENT_LOCK_TIMEOUT: float = float(os.getenv("EVENT_LOCK_TIMEOUT", "60"))
+    
+    # Сколько секунд повторное нажатие той же кнопки игнорируется
+    IDEMPOTENCY_TTL: float = float(os.getenv("IDEMPOTENCY_TTL", "10"))
+    
+    # Через сколько секунд на нажатие кнопки отвечается пустым ответом,
+    # если хендлер ещё не ответил сам (0 — сразу)
+    CALLBACK_ANSWER_DEADLINE: float = float(os.getenv("CALLBACK_ANSWER_DEADLINE", "0.3"))
+    
+    # Ограничение частоты обновлений от пользователя (0 — выключено):
+    # THROTTLE_RATE в секунду с запасом THROTTLE_BURST
+    THROTTLE_RATE: float = float(os.getenv("THROTTLE_RATE", "2"))
+    THROTTLE_BURST: float = float(os.getenv("THROTTLE_BURST", "5"))
+    # Лимиты команд: "команда=раз/секунд" через запятую
+    THROTTLE_COMMAND_LIMITS: Dict[str, Tuple[float, float]] = {
+        command.strip().lstrip("/").lower(): (
+            float(limit.partition("/")[0]),
+            float(limit.partition("/")[2] or 1)
+        )
+        for command, _, limit in (
+            item.partition("=")
+            for item in os.getenv("THROTTLE_COMMAND_LIMITS", "start=3/60").split(",")
+        )
+        if command.strip() and limit.strip()
+    }
+    
     # Database
     DATABASE_PATH: str = os.getenv("DATABASE_PATH", "/app/data/bot.db")
     
@@ -50,12 +156,52 @@ class Settings:
     )
     CHANNEL_USERNAME: str = os.getenv("CHANNEL_USERNAME", "").strip()
     CHANNEL_SUBSCRIBE_URL: str = os.getenv("CHANNEL_SUBSCRIBE_URL", "").strip()
+
+    # Reminders
+    REMINDER_SEND_CONCURRENCY: int = int(os.getenv("REMINDER_SEND_CONCURRENCY", "10"))
+    REMINDER_TICK_SECONDS: float = float(os.getenv("REMINDER_TICK_SECONDS", "1"))
+    # Шаги цепочки напоминаний: число и единица (m, h, d), например "1d,3d,7d"
+    REMINDER_STEPS: List[str] = [
+        step.strip()
+        for step in os.getenv("REMINDER_STEPS", "1d").split(",")
+        if step.strip()
+    ]
+    
+    # Сглаживание всплесков напоминаний
+    REMINDER_JITTER_SECONDS: float = float(os.getenv("REMINDER_JITTER_SECONDS", "3600"))
+    REMINDER_QUIET_HOURS: str = os.getenv("REMINDER_QUIET_HOURS", "")
+    REMINDER_TIMEZONE: str = os.getenv("REMINDER_TIMEZONE", "Europe/Moscow")
+    REMINDER_SEND_RATE: float = float(os.getenv("REMINDER_SEND_RATE", "20"))
+    
+    # Leader election: запланированные задачи выполняет только одна реплика
+    LEADER_ELECTION_ENABLED: bool = os.getenv("LEADER_ELECTION_ENABLED", "false").lower() in ("1", "true", "yes")
+    LEADER_LOCK_KEY: str = os.getenv("LEADER_LOCK_KEY", "artlift:scheduler:leader")
+    LEADER_LEASE_SECONDS: float = float(os.getenv("LEADER_LEASE_SECONDS", "15"))
+    LEADER_RENEW_INTERVAL: float = float(os.getenv("LEADER_RENEW_INTERVAL", "5"))
+    
+    # Redis Streams: приёмник обновлений и воркеры группы потребителей
+    UPDATE_STREAM_PREFIX: str = os.getenv("UPDATE_STREAM_PREFIX", "artlift:updates")
+    UPDATE_STREAM_PARTITIONS: int = int(os.getenv("UPDATE_STREAM_PARTITIONS", "8"))
+    UPDATE_STREAM_GROUP: str = os.getenv("UPDATE_STREAM_GROUP", "workers")
+    UPDATE_STREAM_MAXLEN: int = int(os.getenv("UPDATE_STREAM_MAXLEN", "100000"))
+    UPDATE_STREAM_BATCH_SIZE: int = int(os.getenv("UPDATE_STREAM_BATCH_SIZE", "50"))
+    UPDATE_STREAM_CLAIM_IDLE_MS: int = int(os.getenv("UPDATE_STREAM_CLAIM_IDLE_MS", "60000"))
+    # Партиции делятся между живыми воркерами поровну; MAX_PARTITIONS
+    # дополнительно ограничивает долю одного воркера (0 — без ограничения)
+    UPDATE_STREAM_MAX_PARTITIONS: int = int(os.getenv("UPDATE_STREAM_MAX_PARTITIONS", "0"))
+    # Выдач записи (с учётом падений воркеров) до переноса в поток <prefix>:dead
+    UPDATE_STREAM_MAX_ATTEMPTS: int = int(os.getenv("UPDATE_STREAM_MAX_ATTEMPTS", "3"))
     
     @property
     def redis_url(self) -> str:
         """URL для подключения к Redis"""
         return f"redis://{self.REDIS_HOST}:{self.REDIS_PORT}"
 
+    @property
+    def webhook_url(self) -> str:
+        """Публичный URL webhook для Telegram"""
+        return f"{self.WEBHOOK_BASE_URL}{self.WEBHOOK_PATH}"
+
     @property
     def channel_target(self) -> str | int | None:
         """Идентификатор канала для отправки сообщений (ID или username)."""
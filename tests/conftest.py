@@ -9,7 +9,9 @@ from bot.database.models import Database
 from bot.services.user_service import UserService
 from bot.services.application_service import ApplicationService
 from bot.services.notification_service import NotificationService
+from bot.services.reminder_service import ReminderService
 from unittest.mock import AsyncMock, MagicMock
+from aiogram.client.session.base import BaseSession
 
 
 @pytest.fixture(scope="session")
@@ -56,8 +58,46 @@ def mock_bot():
     return bot
 
 
+class RecordingSession(BaseSession):
+    """Сессия Bot API без сети: запоминает вызванные методы"""
+
+    def __init__(self):
+        super().__init__()
+        self.methods = []
+        self.requests = []
+
+    async def make_request(self, bot, method, timeout=None):
+        self.methods.append(type(method).__name__)
+        self.requests.append(method)
+        return True
+
+    async def stream_content(self, *args, **kwargs):  # pragma: no cover
+        yield b""
+
+    async def close(self):
+        pass
+
+
+@pytest.fixture
+def recording_session():
+    """Сессия, записывающая вызовы Bot API вместо отправки"""
+    return RecordingSession()
+
+
 @pytest.fixture
 async def notification_service(mock_bot, temp_db):
     """Сервис уведомлений с мок-ботом"""
     yield NotificationService(mock_bot, temp_db)
 
+
+@pytest.fixture
+async def reminder_service(notification_service, temp_db):
+    """Сервис напоминаний с мок-планировщиком"""
+    yield ReminderService(
+        MagicMock(),
+        temp_db,
+        notification_service,
+        jitter_seconds=0,
+        quiet_hours="",
+        send_rate=0,
+    )
@@ -96,3 +96,20 @@ async def test_count_pending_applications(application_service, user_service):
     
     assert count == 4
 
+
+
+@pytest.mark.asyncio
+async def test_repeated_actions_do_not_change_anything(application_service, user_service):
+    """Тест: повторная подача и повторное решение по заявке ничего не меняют"""
+    await user_service.register_user(123456, "test_user", "Test User")
+    
+    assert await application_service.create_application(123456) is not None
+    assert await application_service.create_application(123456) is None
+    
+    assert await application_service.approve_application(123456, 999999) is True
+    assert await application_service.approve_application(123456, 999999) is False
+    assert await application_service.reject_application(123456, 888888) is False
+    
+    application = await application_service.get_application(123456)
+    assert application["status"] == "approved"
+    assert application["admin_id"] == 999999
@@ -0,0 +1,140 @@
+"""Тесты для раннего ответа на нажатия кнопок"""
+import asyncio
+
+import pytest
+from aiogram import Bot, Dispatcher, F
+from aiogram.types import CallbackQuery, Update
+
+from bot.middlewares.callback_answer_middleware import CallbackAnswerMiddleware
+
+
+def make_callback(update_id: int, data: str) -> Update:
+    return Update.model_validate({
+        "update_id": update_id,
+        "callback_query": {
+            "id": str(update_id),
+            "from": {"id": 1, "is_bot": False, "first_name": "Test"},
+            "chat_instance": "x",
+            "data": data,
+        },
+    })
+
+
+def make_dispatcher(middleware: CallbackAnswerMiddleware, session, answered_at: dict):
+    dp = Dispatcher()
+    dp.callback_query.middleware(middleware)
+    session.middleware(middleware.guard)
+
+    @dp.callback_query(F.data == "slow")
+    async def _slow(callback: CallbackQuery):
+        await asyncio.sleep(0.05)
+        answered_at["handler"] = len(session.methods)
+        # Срок уже прошёл: этот ответ не должен уйти в Telegram
+        await callback.answer("Готово")
+
+    @dp.callback_query(F.data == "fast")
+    async def _fast(callback: CallbackQuery):
+        await callback.answer("Готово")
+
+    @dp.callback_query(F.data == "alert", flags={"deferred_answer": True})
+    async def _alert(callback: CallbackQuery):
+        await asyncio.sleep(0.05)
+        await callback.answer("Заявка одобрена", show_alert=True)
+
+    @dp.callback_query(F.data == "late_alert")
+    async def _late_alert(callback: CallbackQuery):
+        await asyncio.sleep(0.05)
+        await callback.answer("Заявка не найдена", show_alert=True)
+
+    @dp.callback_query(F.data == "silent")
+    async def _silent(callback: CallbackQuery):
+        pass
+
+    @dp.callback_query(F.data == "boom")
+    async def _boom(callback: CallbackQuery):
+        raise RuntimeError("boom")
+
+    return dp
+
+
+@pytest.mark.asyncio
+async def test_slow_handler_is_answered_by_deadline(recording_session):
+    """Тест: медленный хендлер получает ответ по сроку, его ответ не дублируется"""
+    middleware = CallbackAnswerMiddleware(deadline=0.01)
+    answered_at = {}
+    dp = make_dispatcher(middleware, recording_session, answered_at)
+    bot = Bot("42:TEST", session=recording_session)
+
+    await dp.feed_update(bot, make_callback(1, "slow"))
+
+    assert recording_session.methods == ["AnswerCallbackQuery"]
+    # Пустой ответ ушёл, пока хендлер ещё работал
+    assert answered_at["handler"] == 1
+    assert recording_session.requests[0].text is None
+    assert middleware.stats == {
+        "answered_early": 1,
+        "answered_by_handler": 0,
+        "answered_after_handler": 0,
+        "alerts_dropped": 0,
+    }
+
+
+@pytest.mark.asyncio
+async def test_handler_answer_before_deadline_is_kept(recording_session):
+    """Тест: ответ хендлера до срока доходит до пользователя с текстом"""
+    middleware = CallbackAnswerMiddleware(deadline=1)
+    dp = make_dispatcher(middleware, recording_session, {})
+    bot = Bot("42:TEST", session=recording_session)
+
+    await dp.feed_update(bot, make_callback(1, "fast"))
+
+    assert [request.text for request in recording_session.requests] == ["Готово"]
+    assert middleware.stats["answered_by_handler"] == 1
+
+
+@pytest.mark.asyncio
+async def test_deferred_answer_keeps_alert(recording_session):
+    """Тест: хендлер с флагом deferred_answer сам показывает всплывающее сообщение"""
+    middleware = CallbackAnswerMiddleware(deadline=0.01)
+    dp = make_dispatcher(middleware, recording_session, {})
+    bot = Bot("42:TEST", session=recording_session)
+
+    await dp.feed_update(bot, make_callback(1, "alert"))
+
+    assert len(recording_session.requests) == 1
+    assert recording_session.requests[0].text == "Заявка одобрена"
+    assert recording_session.requests[0].show_alert
+
+
+@pytest.mark.asyncio
+async def test_late_alert_without_flag_is_reported(recording_session, caplog):
+    """Тест: опоздавшее всплывающее сообщение хендлера без флага видно в логе и stats"""
+    middleware = CallbackAnswerMiddleware(deadline=0.01)
+    dp = make_dispatcher(middleware, recording_session, {})
+    bot = Bot("42:TEST", session=recording_session)
+
+    await dp.feed_update(bot, make_callback(1, "late_alert"))
+
+    assert [request.text for request in recording_session.requests] == [None]
+    assert middleware.stats["alerts_dropped"] == 1
+    assert "Заявка не найдена" in caplog.text
+
+
+@pytest.mark.asyncio
+async def test_unanswered_callback_is_answered_after_handler(recording_session):
+    """Тест: без ответа хендлера (в том числе при ошибке) ответ отправляется после него"""
+    middleware = CallbackAnswerMiddleware(deadline=0)
+    dp = make_dispatcher(middleware, recording_session, {})
+    bot = Bot("42:TEST", session=recording_session)
+
+    await dp.feed_update(bot, make_callback(1, "silent"))
+    assert middleware.stats["answered_early"] == 1
+
+    middleware.deadline = 10
+    with pytest.raises(RuntimeError):
+        await dp.feed_update(bot, make_callback(2, "boom"))
+
+    assert recording_session.methods == ["AnswerCallbackQuery", "AnswerCallbackQuery"]
+    assert middleware.stats["answered_after_handler"] == 1
+    # Завершённые callback не накапливаются
+    assert middleware.guard._tracked == {}
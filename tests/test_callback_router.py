@@ -0,0 +1,152 @@
+"""Тесты для маршрутизации нажатий по таблице действий"""
+import pytest
+from aiogram import Bot, Dispatcher, Router, F
+from aiogram.dispatcher.flags import get_flag
+from aiogram.types import CallbackQuery, Update
+
+from bot.handlers.admin_handlers import admin_actions
+from bot.keyboards import admin_keyboards
+from bot.keyboards.callback_data import AdminCallback, admin_cb
+from bot.utils.callback_router import CallbackActionTable
+
+
+def make_callback(update_id: int, data: str) -> Update:
+    return Update.model_validate({
+        "update_id": update_id,
+        "callback_query": {
+            "id": str(update_id),
+            "from": {"id": 1, "is_bot": False, "first_name": "Test"},
+            "chat_instance": "x",
+            "data": data,
+        },
+    })
+
+
+def make_dispatcher(calls: list) -> Dispatcher:
+    table = CallbackActionTable(AdminCallback, legacy_prefix="admin_")
+    router = Router()
+    table.register(router)
+
+    @table.action("applications")
+    async def _applications(callback: CallbackQuery, callback_data: AdminCallback):
+        calls.append(("applications", callback_data.arg))
+
+    @table.action("applications_page")
+    async def _page(callback: CallbackQuery, callback_data: AdminCallback):
+        calls.append(("applications_page", callback_data.int_arg))
+
+    @table.action("approve", flags={"idempotent": True})
+    async def _approve(callback: CallbackQuery, callback_data: AdminCallback):
+        calls.append(("approve", callback_data.int_arg))
+
+    fallback = Router()
+
+    @fallback.callback_query(F.data)
+    async def _fallback(callback: CallbackQuery):
+        calls.append(("fallback", callback.data))
+
+    dp = Dispatcher()
+
+    @dp.callback_query.middleware()
+    async def _flags(handler, event, data):
+        calls.append(("idempotent", bool(get_flag(data, "idempotent"))))
+        return await handler(event, data)
+
+    dp.include_routers(router, fallback)
+    return dp
+
+
+@pytest.mark.asyncio
+async def test_actions_are_routed_with_flags(recording_session):
+    """Тест: действие находится по callback_data, его флаги видны middleware"""
+    calls = []
+    dp = make_dispatcher(calls)
+    bot = Bot("42:TEST", session=recording_session)
+
+    await dp.feed_update(bot, make_callback(1, admin_cb("approve", 42)))
+    await dp.feed_update(bot, make_callback(2, admin_cb("applications")))
+
+    assert calls == [
+        ("idempotent", True), ("approve", 42),
+        ("idempotent", False), ("applications", None),
+    ]
+
+
+@pytest.mark.asyncio
+async def test_legacy_callback_data_is_supported(recording_session):
+    """Тест: кнопки старого формата в отправленных сообщениях продолжают работать"""
+    calls = []
+    dp = make_dispatcher(calls)
+    bot = Bot("42:TEST", session=recording_session)
+
+    await dp.feed_update(bot, make_callback(1, "admin_applications_page_10"))
+    await dp.feed_update(bot, make_callback(2, "admin_approve_42"))
+
+    assert ("applications_page", 10) in calls
+    assert ("approve", 42) in calls
+
+
+@pytest.mark.asyncio
+async def test_unknown_action_falls_through(recording_session):
+    """Тест: неизвестное действие достаётся следующему роутеру"""
+    calls = []
+    dp = make_dispatcher(calls)
+    bot = Bot("42:TEST", session=recording_session)
+
+    for update_id, data in enumerate(["adm:unknown:", "admin_unknown_1", "faq"], start=1):
+        await dp.feed_update(bot, make_callback(update_id, data))
+
+    assert [call for call in calls if call[0] == "fallback"] == [
+        ("fallback", "adm:unknown:"),
+        ("fallback", "admin_unknown_1"),
+        ("fallback", "faq"),
+    ]
+
+
+def test_duplicate_action_is_rejected():
+    """Тест: одно действие нельзя зарегистрировать дважды"""
+    table = CallbackActionTable(AdminCallback)
+    table.action("stats")(lambda callback: None)
+
+    with pytest.raises(ValueError):
+        table.action("stats")(lambda callback: None)
+
+
+def test_admin_keyboards_use_registered_actions():
+    """Тест: все кнопки админ-клавиатур ведут на зарегистрированные действия"""
+    keyboards = [
+        admin_keyboards.get_admin_panel_keyboard(),
+        admin_keyboards.get_applications_list_keyboard([{"user_id": 1}], offset=10, limit=1)[0],
+        admin_keyboards.get_application_action_keyboard(1),
+        admin_keyboards.get_messages_list_keyboard([{"message_key": "welcome"}]),
+        admin_keyboards.get_message_edit_keyboard("welcome"),
+        admin_keyboards.get_message_edit_cancel_keyboard("welcome"),
+        admin_keyboards.get_message_edit_confirm_keyboard("welcome"),
+        admin_keyboards.get_message_history_keyboard("welcome", [{"id": 1, "content": "x"}]),
+        admin_keyboards.get_history_item_keyboard("welcome", 1),
+        admin_keyboards.get_questions_list_keyboard([{"id": 1}], offset=10, limit=1),
+        admin_keyboards.get_question_action_keyboard(1),
+    ]
+
+    for keyboard in keyboards:
+        for row in keyboard.inline_keyboard:
+            for button in row:
+                if button.callback_data == "main_menu":
+                    continue
+                assert admin_actions.parse(button.callback_data).action in admin_actions
+
+
+def test_table_flags_apply_to_every_action():
+    """Тест: флаги таблицы есть у всех действий, флаги действия их дополняют"""
+    table = CallbackActionTable(AdminCallback, flags={"deferred_answer": True})
+
+    @table.action("panel")
+    async def _panel(callback: CallbackQuery):
+        pass
+
+    @table.action("approve", flags={"idempotent": True})
+    async def _approve(callback: CallbackQuery):
+        pass
+
+    assert table._actions["panel"].flags == {"deferred_answer": True}
+    assert table._actions["approve"].flags == {"deferred_answer": True, "idempotent": True}
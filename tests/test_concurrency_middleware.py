@@ -0,0 +1,92 @@
+"""Тесты для middleware параллельной обработки обновлений"""
+import asyncio
+
+import pytest
+from aiogram import Bot, Dispatcher
+from aiogram.types import Message, Update
+
+from bot.middlewares.concurrency_middleware import ConcurrencyMiddleware
+
+
+def make_update(update_id: int, chat_id: int) -> Update:
+    """Текстовое сообщение; в тексте — номер обновления"""
+    return Update.model_validate({
+        "update_id": update_id,
+        "message": {
+            "message_id": update_id,
+            "date": 0,
+            "chat": {"id": chat_id, "type": "private"},
+            "from": {"id": chat_id, "is_bot": False, "first_name": "Test"},
+            "text": str(update_id),
+        },
+    })
+
+
+def make_dispatcher(middleware: ConcurrencyMiddleware, events: list, delay: float = 0.05):
+    """Диспетчер, хендлер которого отмечает начало и конец обработки"""
+    dp = Dispatcher()
+    dp.update.outer_middleware(middleware)
+
+    @dp.message()
+    async def _handler(message: Message):
+        events.append(("start", message.chat.id, int(message.text)))
+        await asyncio.sleep(delay)
+        events.append(("end", message.chat.id, int(message.text)))
+
+    return dp
+
+
+@pytest.mark.asyncio
+async def test_same_chat_is_serialized():
+    """Тест: обновления одного чата выполняются по очереди и по порядку"""
+    events = []
+    middleware = ConcurrencyMiddleware(max_concurrency=10)
+    dp = make_dispatcher(middleware, events)
+    bot = Bot("42:TEST")
+
+    await asyncio.gather(*(dp.feed_update(bot, make_update(i, 1)) for i in range(1, 4)))
+
+    assert events == [
+        ("start", 1, 1), ("end", 1, 1),
+        ("start", 1, 2), ("end", 1, 2),
+        ("start", 1, 3), ("end", 1, 3),
+    ]
+    assert middleware.stats["max_in_flight"] == 1
+    assert middleware.stats["queue_wait_max"] > 0
+
+
+@pytest.mark.asyncio
+async def test_different_chats_run_in_parallel_up_to_limit():
+    """Тест: разные чаты обрабатываются параллельно, но не больше лимита"""
+    events = []
+    middleware = ConcurrencyMiddleware(max_concurrency=2)
+    dp = make_dispatcher(middleware, events)
+    bot = Bot("42:TEST")
+
+    updates = [make_update(i, 100 + i) for i in range(1, 5)]
+    await asyncio.gather(*(dp.feed_update(bot, update) for update in updates))
+
+    in_flight = peak = 0
+    for kind, _, _ in events:
+        in_flight += 1 if kind == "start" else -1
+        peak = max(peak, in_flight)
+    assert peak == 2
+    assert middleware.stats["processed"] == 4
+    assert middleware.stats["in_flight"] == 0
+
+
+@pytest.mark.asyncio
+async def test_wait_idle_waits_for_in_flight_updates():
+    """Тест ожидания завершения обновлений в обработке"""
+    events = []
+    middleware = ConcurrencyMiddleware(max_concurrency=2)
+    dp = make_dispatcher(middleware, events, delay=0.1)
+    bot = Bot("42:TEST")
+
+    task = asyncio.create_task(dp.feed_update(bot, make_update(1, 1)))
+    await asyncio.sleep(0.01)
+
+    assert await middleware.wait_idle(timeout=0.01) is False
+    assert await middleware.wait_idle(timeout=1) is True
+    assert events[-1] == ("end", 1, 1)
+    await task
@@ -125,3 +125,30 @@ async def test_cancel_user_reminders(temp_db):
     result = await temp_db.cancel_user_reminders(123456)
     assert result is True
 
+
+
+@pytest.mark.asyncio
+async def test_init_db_skips_current_schema(temp_db):
+    """Тест: повторная инициализация не пересоздаёт схему и шаблоны"""
+    import aiosqlite
+    from bot.database.models import SCHEMA_VERSION
+    
+    async with aiosqlite.connect(temp_db.db_path) as db:
+        async with db.execute("PRAGMA user_version") as cursor:
+            assert (await cursor.fetchone())[0] == SCHEMA_VERSION
+        # Отредактированный шаблон не должен перезаписываться при рестарте
+        await db.execute("DELETE FROM bot_messages WHERE message_key = 'faq'")
+        await db.commit()
+    
+    assert await temp_db.init_db() is False
+    
+    async with aiosqlite.connect(temp_db.db_path) as db:
+        async with db.execute(
+            "SELECT COUNT(*) FROM bot_messages WHERE message_key = 'faq'"
+        ) as cursor:
+            assert (await cursor.fetchone())[0] == 0
+        # Старая база без версии схемы обновляется при следующем запуске
+        await db.execute("PRAGMA user_version = 0")
+        await db.commit()
+    
+    assert await temp_db.init_db() is True
@@ -0,0 +1,86 @@
+"""Тесты для изоляции событий одного чата"""
+import asyncio
+
+import fakeredis
+import pytest
+from aiogram import Bot, Dispatcher
+from aiogram.fsm.storage.base import StorageKey
+from aiogram.fsm.storage.memory import DisabledEventIsolation, MemoryStorage
+from aiogram.types import CallbackQuery, Update
+
+from bot.middlewares.concurrency_middleware import ConcurrencyMiddleware
+from bot.utils.event_isolation import InstrumentedRedisEventIsolation
+
+
+KEY = StorageKey(bot_id=42, chat_id=1, user_id=1)
+
+
+def make_callback(update_id: int, data: str) -> Update:
+    return Update.model_validate({
+        "update_id": update_id,
+        "callback_query": {
+            "id": str(update_id),
+            "from": {"id": 1, "is_bot": False, "first_name": "Test"},
+            "chat_instance": "x",
+            "data": data,
+            "message": {
+                "message_id": 10,
+                "date": 0,
+                "chat": {"id": 1, "type": "private"},
+                "text": "menu",
+            },
+        },
+    })
+
+
+@pytest.mark.asyncio
+async def test_double_tap_is_serialized():
+    """Тест: в одном процессе двойное нажатие упорядочивает одна блокировка чата"""
+    concurrency = ConcurrencyMiddleware(8)
+    # Как в main при EVENT_ISOLATION=memory: FSM не берёт вторую блокировку
+    dp = Dispatcher(storage=MemoryStorage(), events_isolation=DisabledEventIsolation())
+    dp.update.outer_middleware.unregister(dp.fsm)
+    dp.update.outer_middleware(concurrency)
+    dp.update.outer_middleware(dp.fsm)
+    events = []
+
+    @dp.callback_query()
+    async def _handler(callback: CallbackQuery):
+        events.append(("start", callback.id))
+        await asyncio.sleep(0.02)
+        events.append(("end", callback.id))
+
+    bot = Bot("42:TEST")
+    await asyncio.gather(
+        dp.feed_update(bot, make_callback(1, "application_filled")),
+        dp.feed_update(bot, make_callback(2, "application_filled")),
+    )
+
+    assert events == [("start", "1"), ("end", "1"), ("start", "2"), ("end", "2")]
+    assert concurrency.stats["queue_wait_max"] >= 0.01
+    # Освобождённые блокировки не накапливаются
+    assert concurrency._chat_locks == {}
+
+
+@pytest.mark.asyncio
+async def test_redis_lock_is_shared_between_processes():
+    """Тест: блокировка в Redis упорядочивает обработку в разных процессах"""
+    server = fakeredis.FakeServer()
+    first = InstrumentedRedisEventIsolation(fakeredis.FakeAsyncRedis(server=server), sleep=0.005)
+    second = InstrumentedRedisEventIsolation(fakeredis.FakeAsyncRedis(server=server), sleep=0.005)
+    events = []
+
+    async def _handle(isolation, name: str):
+        async with isolation.lock(KEY):
+            events.append(("start", name))
+            await asyncio.sleep(0.03)
+            events.append(("end", name))
+
+    first_task = asyncio.create_task(_handle(first, "first"))
+    await asyncio.sleep(0.005)
+    await _handle(second, "second")
+    await first_task
+
+    assert events == [("start", "first"), ("end", "first"), ("start", "second"), ("end", "second")]
+    assert second.stats["contended"] == 1
+    assert second.stats["wait_max"] >= 0.01
@@ -0,0 +1,130 @@
+"""Тесты для кэширующего FSM-контекста"""
+import fakeredis
+import pytest
+from aiogram import Bot, Dispatcher
+from aiogram.fsm.context import FSMContext
+from aiogram.fsm.state import State, StatesGroup
+from aiogram.fsm.storage.base import StorageKey
+from aiogram.fsm.storage.redis import RedisStorage
+from aiogram.types import Message, Update
+
+from bot.middlewares.fsm_cache_middleware import FSMCacheMiddleware
+from bot.utils.fsm import CachedFSMContext
+
+
+class DemoStates(StatesGroup):
+    waiting = State()
+
+
+class CountingRedisStorage(RedisStorage):
+    """RedisStorage, считающий обращения к хранилищу"""
+
+    def __init__(self):
+        super().__init__(fakeredis.FakeAsyncRedis())
+        self.calls = []
+
+    async def get_state(self, key):
+        self.calls.append("get_state")
+        return await super().get_state(key)
+
+    async def set_state(self, key, state=None):
+        self.calls.append("set_state")
+        await super().set_state(key, state)
+
+    async def get_data(self, key):
+        self.calls.append("get_data")
+        return await super().get_data(key)
+
+    async def set_data(self, key, data):
+        self.calls.append("set_data")
+        await super().set_data(key, data)
+
+
+KEY = StorageKey(bot_id=42, chat_id=1, user_id=1)
+
+
+def make_update(update_id: int, text: str) -> Update:
+    return Update.model_validate({
+        "update_id": update_id,
+        "message": {
+            "message_id": update_id,
+            "date": 0,
+            "chat": {"id": 1, "type": "private"},
+            "from": {"id": 1, "is_bot": False, "first_name": "Test"},
+            "text": text,
+        },
+    })
+
+
+@pytest.mark.asyncio
+async def test_state_is_read_once_per_update():
+    """Тест: хендлер получает состояние без повторного чтения, пустая очистка не пишет состояние"""
+    storage = CountingRedisStorage()
+    dp = Dispatcher(storage=storage)
+    middleware = FSMCacheMiddleware()
+    dp.update.outer_middleware(middleware)
+    seen = []
+
+    @dp.message()
+    async def _handler(message: Message, state: FSMContext):
+        seen.append(type(state))
+        # Как в cmd_cancel и main_menu
+        await state.get_state()
+        await state.get_state()
+        await state.clear()
+
+    await dp.feed_update(Bot("42:TEST"), make_update(1, "menu"))
+
+    assert seen == [CachedFSMContext]
+    # Одно чтение — в FSMContextMiddleware aiogram; без состояния очищать нечего
+    assert storage.calls == ["get_state"]
+    assert middleware.stats == {"contexts": 1, "writes": 0, "writes_skipped": 2}
+
+
+@pytest.mark.asyncio
+async def test_unchanged_writes_are_skipped():
+    """Тест: повторная запись тех же значений не доходит до хранилища"""
+    storage = CountingRedisStorage()
+    state = CachedFSMContext(storage, KEY)
+
+    await state.update_data(question_id=1)
+    await state.update_data(question_id=1)
+    await state.set_state(DemoStates.waiting)
+    await state.set_state(DemoStates.waiting)
+
+    assert storage.calls == ["get_data", "set_data", "set_state"]
+    assert await state.get_data() == {"question_id": 1}
+    assert await state.get_state() == DemoStates.waiting.state
+
+
+@pytest.mark.asyncio
+async def test_replace_state_and_data_is_single_pipeline():
+    """Тест: состояние и данные записываются одним конвейером и читаются обычным контекстом"""
+    storage = CountingRedisStorage()
+    state = CachedFSMContext(storage, KEY)
+
+    await state.replace_state_and_data(DemoStates.waiting, {"message_key": "faq"})
+    assert storage.calls == []
+
+    plain = FSMContext(storage, KEY)
+    assert await plain.get_state() == DemoStates.waiting.state
+    assert await plain.get_data() == {"message_key": "faq"}
+
+    await state.clear()
+    assert await plain.get_state() is None
+    assert await plain.get_data() == {}
+
+
+@pytest.mark.asyncio
+async def test_clear_without_state_removes_loaded_data():
+    """Тест: данные, прочитанные без состояния, очистка всё же удаляет"""
+    storage = CountingRedisStorage()
+    await FSMContext(storage, KEY).set_data({"draft": "текст"})
+    storage.calls.clear()
+    state = CachedFSMContext(storage, KEY, state=None)
+
+    assert await state.get_data() == {"draft": "текст"}
+    await state.clear()
+
+    assert storage.calls == ["get_data", "set_data"]
+    assert await FSMContext(storage, KEY).get_data() == {}
@@ -0,0 +1,119 @@
+"""Тесты для хранилищ FSM"""
+import aiosqlite
+import fakeredis
+import pytest
+from aiogram.fsm.storage.base import StorageKey
+from aiogram.fsm.storage.redis import RedisStorage
+
+from bot.utils.fsm import CachedFSMContext
+from bot.utils.fsm_report import NO_STATE, collect_fsm_report
+from bot.utils.fsm_storage import CompactRedisStorage, SQLiteStorage
+from bot.utils.states import MessageEditStates, QuestionStates
+
+
+DRAFT = {"message_key": "welcome", "new_content": "Привет! 👋 Добро пожаловать в Art Lift Community" * 20}
+
+
+def make_key(user_id: int) -> StorageKey:
+    return StorageKey(bot_id=42, chat_id=user_id, user_id=user_id)
+
+
+@pytest.mark.asyncio
+async def test_compact_data_roundtrip_and_ttl():
+    """Тест: данные читаются обратно, у ключей есть срок жизни, запись компактнее JSON"""
+    redis = fakeredis.FakeAsyncRedis()
+    storage = CompactRedisStorage(redis, state_ttl=60, data_ttl=120)
+    plain = RedisStorage(redis)
+
+    await storage.set_state(make_key(1), MessageEditStates.waiting_for_new_content)
+    await storage.set_data(make_key(1), DRAFT)
+    await plain.set_data(make_key(2), DRAFT)
+
+    assert await storage.get_data(make_key(1)) == DRAFT
+    assert 0 < await redis.ttl("fsm:1:1:state") <= 60
+    assert 60 < await redis.ttl("fsm:1:1:data") <= 120
+    assert await redis.strlen("fsm:1:1:data") < await redis.strlen("fsm:2:2:data")
+
+
+@pytest.mark.asyncio
+async def test_reads_data_written_by_redis_storage():
+    """Тест: данные в формате RedisStorage читаются после переключения хранилища"""
+    redis = fakeredis.FakeAsyncRedis()
+    await RedisStorage(redis).set_data(make_key(1), DRAFT)
+
+    assert await CompactRedisStorage(redis).get_data(make_key(1)) == DRAFT
+
+
+@pytest.mark.asyncio
+async def test_pipelined_write_uses_compact_codec():
+    """Тест: конвейерная запись состояния и данных читается компактным хранилищем"""
+    storage = CompactRedisStorage(fakeredis.FakeAsyncRedis(), data_ttl=60)
+    state = CachedFSMContext(storage, make_key(1))
+
+    await state.replace_state_and_data(QuestionStates.waiting_for_answer, {"question_id": 7})
+
+    assert await storage.get_data(make_key(1)) == {"question_id": 7}
+    assert await storage.get_state(make_key(1)) == QuestionStates.waiting_for_answer.state
+    assert await storage.redis.ttl("fsm:1:1:data") > 0
+
+
+@pytest.mark.asyncio
+async def test_report_groups_keys_by_state_group():
+    """Тест отчёта: ключи и память по группам состояний"""
+    redis = fakeredis.FakeAsyncRedis()
+    storage = CompactRedisStorage(redis)
+    await storage.set_state(make_key(1), QuestionStates.waiting_for_question)
+    await storage.set_state(make_key(2), QuestionStates.waiting_for_answer)
+    await storage.set_data(make_key(2), {"question_id": 1})
+    await storage.set_state(make_key(3), MessageEditStates.waiting_for_new_content)
+    await storage.set_data(make_key(3), DRAFT)
+    await storage.set_data(make_key(4), {"orphan": True})
+
+    report = await collect_fsm_report(redis)
+
+    assert report["QuestionStates"]["users"] == 2
+    assert report["QuestionStates"]["keys"] == 3
+    assert report["MessageEditStates"]["keys"] == 2
+    assert report["MessageEditStates"]["bytes"] > report["QuestionStates"]["bytes"]
+    assert report["ApplicationStates"] == {"users": 0, "keys": 0, "bytes": 0}
+    assert report[NO_STATE]["keys"] == 1
+
+
+@pytest.mark.asyncio
+async def test_sqlite_storage_restores_after_restart(temp_db):
+    """Тест: состояния записываются в SQLite и восстанавливаются новым процессом"""
+    storage = SQLiteStorage(temp_db)
+    await storage.set_state(make_key(1), MessageEditStates.waiting_for_new_content)
+    await storage.set_data(make_key(1), DRAFT)
+    await storage.set_state(make_key(2), QuestionStates.waiting_for_question)
+    # Изменения не пишутся на диск до сброса
+    assert await temp_db.load_fsm_records() == []
+
+    assert await storage.flush() == 2
+    assert await storage.flush() == 0
+
+    # Завершённый сценарий удаляется из таблицы при следующем сбросе
+    await storage.set_state(make_key(2), None)
+    await storage.close()
+
+    restored = SQLiteStorage(temp_db)
+    assert await restored.load() == 1
+    assert await restored.get_state(make_key(1)) == MessageEditStates.waiting_for_new_content.state
+    assert await restored.get_data(make_key(1)) == DRAFT
+    assert await restored.get_state(make_key(2)) is None
+    assert restored.stats["states"] == 1
+
+
+@pytest.mark.asyncio
+async def test_sqlite_storage_drops_expired_records(temp_db):
+    """Тест: записи старше ttl не восстанавливаются"""
+    storage = SQLiteStorage(temp_db)
+    await storage.set_state(make_key(1), QuestionStates.waiting_for_question)
+    await storage.flush()
+    async with aiosqlite.connect(temp_db.db_path) as db:
+        await db.execute("UPDATE fsm_storage SET updated_at = '2000-01-01 00:00:00'")
+        await db.commit()
+
+    restored = SQLiteStorage(temp_db, ttl=3600)
+    assert await restored.load() == 0
+    assert await temp_db.load_fsm_records() == []
@@ -0,0 +1,96 @@
+"""Тесты для защиты от повторных нажатий"""
+import fakeredis
+import pytest
+from aiogram import Bot, Dispatcher, F
+from aiogram.types import CallbackQuery, Update
+
+from bot.middlewares.idempotency_middleware import IdempotencyMiddleware
+
+
+def make_callback(update_id: int, data: str, message_id: int = 10) -> Update:
+    return Update.model_validate({
+        "update_id": update_id,
+        "callback_query": {
+            "id": str(update_id),
+            "from": {"id": 1, "is_bot": False, "first_name": "Test"},
+            "chat_instance": "x",
+            "data": data,
+            "message": {
+                "message_id": message_id,
+                "date": 0,
+                "chat": {"id": 1, "type": "private"},
+                "text": "menu",
+            },
+        },
+    })
+
+
+def make_dispatcher(middleware: IdempotencyMiddleware, calls: list, fail: bool = False):
+    dp = Dispatcher()
+    dp.callback_query.middleware(middleware)
+
+    @dp.callback_query(F.data == "application_filled", flags={"idempotent": True})
+    async def _filled(callback: CallbackQuery):
+        calls.append(callback.data)
+        if fail:
+            raise RuntimeError("boom")
+
+    @dp.callback_query(F.data == "main_menu")
+    async def _menu(callback: CallbackQuery):
+        calls.append(callback.data)
+
+    return dp
+
+
+@pytest.mark.asyncio
+@pytest.mark.parametrize("use_redis", [False, True])
+async def test_repeated_click_is_handled_once(use_redis, recording_session):
+    """Тест: повторное нажатие той же кнопки не доходит до хендлера"""
+    calls = []
+    middleware = IdempotencyMiddleware(
+        ttl=10,
+        redis=fakeredis.FakeAsyncRedis() if use_redis else None
+    )
+    dp = make_dispatcher(middleware, calls)
+    session = recording_session
+    bot = Bot("42:TEST", session=session)
+
+    await dp.feed_update(bot, make_callback(1, "application_filled"))
+    await dp.feed_update(bot, make_callback(2, "application_filled"))
+    # Та же кнопка на другом сообщении — другое нажатие
+    await dp.feed_update(bot, make_callback(3, "application_filled", message_id=11))
+    # Хендлеры без флага не ограничиваются
+    await dp.feed_update(bot, make_callback(4, "main_menu"))
+    await dp.feed_update(bot, make_callback(5, "main_menu"))
+
+    assert calls == ["application_filled", "application_filled", "main_menu", "main_menu"]
+    # Повтору отвечаем, чтобы у пользователя не крутилась кнопка
+    assert session.methods == ["AnswerCallbackQuery"]
+    assert middleware.stats == {"checked": 3, "duplicates": 1}
+
+
+@pytest.mark.asyncio
+async def test_failed_handler_can_be_retried(recording_session):
+    """Тест: после ошибки хендлера нажатие можно повторить"""
+    calls = []
+    dp = make_dispatcher(IdempotencyMiddleware(ttl=10), calls, fail=True)
+    bot = Bot("42:TEST", session=recording_session)
+
+    for update_id in (1, 2):
+        with pytest.raises(RuntimeError):
+            await dp.feed_update(bot, make_callback(update_id, "application_filled"))
+
+    assert calls == ["application_filled", "application_filled"]
+
+
+@pytest.mark.asyncio
+async def test_click_is_accepted_again_after_ttl(recording_session):
+    """Тест: по истечении ttl нажатие снова обрабатывается"""
+    calls = []
+    dp = make_dispatcher(IdempotencyMiddleware(ttl=0), calls)
+    bot = Bot("42:TEST", session=recording_session)
+
+    await dp.feed_update(bot, make_callback(1, "application_filled"))
+    await dp.feed_update(bot, make_callback(2, "application_filled"))
+
+    assert calls == ["application_filled", "application_filled"]
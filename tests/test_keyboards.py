@@ -5,6 +5,7 @@ from bot.keyboards.user_keyboards import (
     get_after_form_keyboard,
     get_main_menu_keyboard
 )
+from bot.keyboards.callback_data import AdminCallback
 from bot.keyboards.admin_keyboards import (
     get_admin_panel_keyboard,
     get_applications_list_keyboard,
@@ -27,7 +28,7 @@ def test_get_start_keyboard_with_admin():
     assert keyboard is not None
     # Должна быть кнопка админ-панели
     admin_button = any(
-        button.callback_data == "admin_panel"
+        button.callback_data == AdminCallback(action="panel").pack()
         for row in keyboard.inline_keyboard
         for button in row
     )
@@ -72,17 +73,14 @@ def test_get_application_action_keyboard():
     assert len(keyboard.inline_keyboard) > 0
     
     # Проверяем наличие кнопок одобрения и отклонения
-    has_approve = any(
-        "admin_approve_123456" in button.callback_data
+    actions = {
+        (callback_data.action, callback_data.int_arg)
         for row in keyboard.inline_keyboard
         for button in row
-    )
-    has_reject = any(
-        "admin_reject_123456" in button.callback_data
-        for row in keyboard.inline_keyboard
-        for button in row
-    )
+        for callback_data in [AdminCallback.unpack(button.callback_data)]
+        if callback_data.arg
+    }
     
-    assert has_approve is True
-    assert has_reject is True
+    assert ("approve", 123456) in actions
+    assert ("reject", 123456) in actions
 
@@ -0,0 +1,127 @@
+"""Тесты для выбора лидера среди реплик"""
+import asyncio
+
+import fakeredis
+import pytest
+
+from bot.services.leader_election import LeaderElection
+
+
+@pytest.fixture
+def redis_server():
+    """Общий in-memory сервер Redis для нескольких реплик"""
+    return fakeredis.FakeServer()
+
+
+def make_replica(redis_server, name: str, lease_seconds: float = 15.0) -> LeaderElection:
+    """Создание реплики со своим подключением к общему Redis"""
+    return LeaderElection(
+        fakeredis.FakeAsyncRedis(server=redis_server),
+        key="test:leader",
+        lease_seconds=lease_seconds,
+        renew_interval=lease_seconds / 3,
+        instance_id=name,
+    )
+
+
+@pytest.mark.asyncio
+async def test_single_leader(redis_server):
+    """Тест: лидером становится только одна реплика"""
+    first = make_replica(redis_server, "first")
+    second = make_replica(redis_server, "second")
+    
+    assert await first.step() is True
+    assert await second.step() is False
+    
+    # Продление аренды не меняет лидера
+    assert await first.step() is True
+    assert await second.step() is False
+
+
+@pytest.mark.asyncio
+async def test_failover_on_stop(redis_server):
+    """Тест быстрого переключения при штатной остановке лидера"""
+    first = make_replica(redis_server, "first")
+    second = make_replica(redis_server, "second")
+    events = []
+    first.on_demoted(lambda: events.append("first demoted"))
+    second.on_elected(lambda: events.append("second elected"))
+    
+    await first.step()
+    await second.step()
+    await first.stop()
+    
+    assert first.is_leader is False
+    assert await second.step() is True
+    assert events == ["first demoted", "second elected"]
+
+
+@pytest.mark.asyncio
+async def test_failover_on_lease_expiry(redis_server):
+    """Тест переключения после истечения аренды упавшего лидера"""
+    first = make_replica(redis_server, "first", lease_seconds=0.1)
+    second = make_replica(redis_server, "second", lease_seconds=0.1)
+    
+    assert await first.step() is True
+    await asyncio.sleep(0.15)
+    
+    assert await second.step() is True
+    # Старый лидер не может продлить чужую аренду и теряет лидерство
+    assert await first.step() is False
+    assert second.is_leader is True
+
+
+@pytest.mark.asyncio
+async def test_async_callbacks_and_background_loop(redis_server):
+    """Тест фонового цикла и асинхронных обработчиков"""
+    replica = make_replica(redis_server, "only", lease_seconds=0.3)
+    elected = asyncio.Event()
+    
+    async def on_elected():
+        elected.set()
+    
+    replica.on_elected(on_elected)
+    replica.start()
+    await asyncio.wait_for(elected.wait(), timeout=1)
+    
+    assert replica.is_leader is True
+    await replica.stop()
+    assert await fakeredis.FakeAsyncRedis(server=redis_server).get("test:leader") is None
+
+
+@pytest.mark.asyncio
+async def test_demoted_locally_when_renewal_is_late(redis_server):
+    """Тест: опоздавшее продление снимает лидерство до истечения ключа"""
+    now = [0.0]
+    replica = LeaderElection(
+        fakeredis.FakeAsyncRedis(server=redis_server),
+        key="test:leader",
+        lease_seconds=15,
+        renew_interval=5,
+        instance_id="slow",
+        clock=lambda: now[0],
+    )
+    demoted = []
+    replica.on_demoted(lambda: demoted.append(True))
+    
+    assert await replica.step() is True
+    assert replica.lease_valid is True
+    
+    # Цикл событий «завис» дольше срока аренды
+    now[0] = 14.5
+    assert replica.lease_valid is False
+    assert await replica.step() is False
+    assert demoted == [True]
+
+
+@pytest.mark.asyncio
+async def test_stalled_redis_call_demotes_leader(redis_server):
+    """Тест: зависший запрос к Redis прерывается и снимает лидерство"""
+    replica = make_replica(redis_server, "stalled", lease_seconds=0.3)
+    assert await replica.step() is True
+    
+    async def _hang(*args, **kwargs):
+        await asyncio.sleep(10)
+    
+    replica.redis.eval = _hang
+    assert await asyncio.wait_for(replica.step(), timeout=1) is False
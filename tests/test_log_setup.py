@@ -0,0 +1,91 @@
+"""Тесты для настройки логирования"""
+import io
+import json
+import logging
+import threading
+
+import pytest
+
+from bot.utils.log_setup import UserText, setup_logging
+
+
+@pytest.fixture
+def log_output():
+    """Логирование через очередь в буфер; исходная настройка восстанавливается"""
+    root = logging.getLogger()
+    handlers, level = root.handlers[:], root.level
+    stream = io.StringIO()
+    listeners = []
+
+    def _setup(**kwargs):
+        listeners.append(setup_logging(stream=stream, **kwargs))
+        return listeners[-1]
+
+    yield stream, _setup
+
+    for listener in listeners:
+        # Тест мог уже остановить поток, чтобы дождаться записи
+        if listener._thread is not None:
+            listener.stop()
+    root.handlers[:] = handlers
+    root.setLevel(level)
+    UserText.redact = False
+
+
+def test_records_are_formatted_in_listener_thread(log_output):
+    """Тест: запись форматируется в потоке логирования, а не в вызывающем"""
+    stream, setup = log_output
+    listener = setup(fmt="json")
+    formatted_in = []
+
+    class _Probe:
+        def __str__(self):
+            formatted_in.append(threading.current_thread())
+            return "probe"
+
+    logging.getLogger("bot.test").info(
+        "Callback from user %s: %s", 1, _Probe(), extra={"event_type": "callback_query", "user_id": 1}
+    )
+    listener.stop()
+
+    assert formatted_in and formatted_in[0] is not threading.current_thread()
+    record = json.loads(stream.getvalue())
+    assert record["message"] == "Callback from user 1: probe"
+    assert record["level"] == "INFO"
+    assert record["logger"] == "bot.test"
+    assert record["event_type"] == "callback_query"
+    assert record["user_id"] == 1
+
+
+def test_events_are_sampled_by_type(log_output):
+    """Тест: записи о событиях отбираются по типу, предупреждения и прочие не теряются"""
+    stream, setup = log_output
+    listener = setup(sample_rates={"callback_query": 0.0})
+    log = logging.getLogger("bot.test")
+
+    log.info("callback", extra={"event_type": "callback_query"})
+    log.info("message", extra={"event_type": "message"})
+    log.info("startup")
+    log.warning("slow callback", extra={"event_type": "callback_query"})
+    listener.stop()
+
+    lines = [line.rsplit(" - ", 1)[-1] for line in stream.getvalue().splitlines()]
+    assert lines == ["message", "startup", "slow callback"]
+
+
+def test_user_text_is_redacted(log_output):
+    """Тест: при redact_text текст пользователя заменяется длиной"""
+    stream, setup = log_output
+    listener = setup(redact_text=True)
+
+    logging.getLogger("bot.test").info("Message: %s", UserText("мой номер карты"))
+    listener.stop()
+
+    assert "карты" not in stream.getvalue()
+    assert "<скрыто, 15 симв.>" in stream.getvalue()
+
+
+def test_unknown_format_is_rejected(log_output):
+    _, setup = log_output
+    with pytest.raises(ValueError):
+        setup(fmt="xml")
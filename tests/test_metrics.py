@@ -0,0 +1,168 @@
+"""Тесты для метрик в формате Prometheus"""
+import aiohttp
+import pytest
+from aiogram import Bot, Dispatcher
+from aiogram.exceptions import TelegramNetworkError
+from aiogram.types import Message, Update
+
+from bot.middlewares.api_metrics_middleware import ApiMetricsMiddleware
+from bot.middlewares.update_context_middleware import UpdateContextMiddleware
+from bot.services.container import ServiceContainer
+from bot.utils.metrics import (
+    DB_QUERY_DURATION,
+    TELEGRAM_CALL_DURATION,
+    TELEGRAM_CALLS,
+    TELEGRAM_RETRIES,
+    UPDATES,
+    MetricsRegistry,
+    registry,
+    start_metrics_server,
+)
+from bot.utils.telegram_utils import send_with_retry
+
+
+def test_render_uses_prometheus_text_format():
+    """Тест: HELP/TYPE, накопительные корзины с +Inf и экранирование меток"""
+    metrics = MetricsRegistry(namespace="test")
+    requests = metrics.counter("requests_total", "Запросы", ["path"])
+    latency = metrics.histogram("latency_seconds", "Задержка", buckets=(0.1, 1.0))
+    requests.inc(path='/a"b')
+    requests.inc(2, path='/a"b')
+    latency.observe(0.05)
+    latency.observe(0.5)
+    latency.observe(3)
+    metrics.add_stats("queue", lambda: {"depth": 4, "avg": 0.25, "by_scope": {"start": 2}, "nested": {"x": {}}})
+
+    lines = metrics.render().splitlines()
+
+    assert "# HELP test_requests_total Запросы" in lines
+    assert "# TYPE test_requests_total counter" in lines
+    assert 'test_requests_total{path="/a\\"b"} 3' in lines
+    assert "# TYPE test_latency_seconds histogram" in lines
+    assert 'test_latency_seconds_bucket{le="0.1"} 1' in lines
+    assert 'test_latency_seconds_bucket{le="1"} 2' in lines
+    assert 'test_latency_seconds_bucket{le="+Inf"} 3' in lines
+    assert "test_latency_seconds_sum 3.55" in lines
+    assert "test_latency_seconds_count 3" in lines
+    assert "test_queue_depth 4" in lines
+    assert "test_queue_avg 0.25" in lines
+    assert 'test_queue_by_scope{key="start"} 2' in lines
+    assert not any(line.startswith("test_queue_nested") for line in lines)
+
+
+def test_labels_must_match_declaration():
+    """Тест: набор меток проверяется, имя метрики уникально"""
+    metrics = MetricsRegistry(namespace="test")
+    counter = metrics.counter("calls_total", "Вызовы", ["method"])
+
+    with pytest.raises(ValueError):
+        counter.inc()
+    with pytest.raises(ValueError):
+        metrics.gauge("calls_total", "Повтор")
+
+
+@pytest.mark.asyncio
+async def test_endpoint_serves_update_db_and_api_metrics(recording_session, temp_db):
+    """Тест: обновление, запрос к БД и вызов Bot API видны в ответе /metrics"""
+    dp = Dispatcher()
+    dp.update.outer_middleware(UpdateContextMiddleware(ServiceContainer()))
+
+    @dp.message()
+    async def _message(message: Message):
+        await temp_db.get_user(message.from_user.id)
+        await message.answer("ответ")
+
+    updates_before = UPDATES.value(event_type="message", status="ok")
+    queries_before = DB_QUERY_DURATION.count(query="get_user")
+    calls_before = TELEGRAM_CALLS.value(method="SendMessage", status="ok")
+
+    recording_session.middleware(ApiMetricsMiddleware())
+    bot = Bot("42:TEST", session=recording_session)
+    await dp.feed_update(bot, Update.model_validate({
+        "update_id": 1,
+        "message": {
+            "message_id": 1,
+            "date": 0,
+            "chat": {"id": 1, "type": "private"},
+            "from": {"id": 1, "is_bot": False, "first_name": "Test"},
+            "text": "привет",
+        },
+    }))
+
+    registry.add_stats("test_component", lambda: {"handled": 7})
+    runner = await start_metrics_server("127.0.0.1", 0)
+    try:
+        port = runner.addresses[0][1]
+        async with aiohttp.ClientSession() as session:
+            async with session.get(f"http://127.0.0.1:{port}/metrics") as response:
+                assert response.status == 200
+                assert response.content_type == "text/plain"
+                body = await response.text()
+    finally:
+        await runner.cleanup()
+        registry.clear_stats()
+
+    lines = body.splitlines()
+    assert f'artlift_updates_total{{event_type="message",status="ok"}} {int(updates_before) + 1}' in lines
+    assert 'artlift_update_duration_seconds_bucket{event_type="message",le="+Inf"}' in body
+    assert f'artlift_db_query_duration_seconds_count{{query="get_user"}} {queries_before + 1}' in lines
+    assert f'artlift_telegram_calls_total{{method="SendMessage",status="ok"}} {int(calls_before) + 1}' in lines
+    assert 'artlift_telegram_call_duration_seconds_bucket{method="SendMessage",le="+Inf"}' in body
+    assert "artlift_test_component_handled 7" in lines
+
+
+@pytest.mark.asyncio
+async def test_api_calls_are_timed_per_attempt(recording_session, monkeypatch):
+    """Тест: каждая попытка — отдельный запрос, паузы между попытками не учитываются"""
+    failures = []
+    sleeps = []
+
+    async def make_request(bot, method, timeout=None):
+        if not failures:
+            failures.append(method)
+            raise TelegramNetworkError(method, "timeout")
+        return True
+
+    async def sleep(delay):
+        sleeps.append(delay)
+
+    monkeypatch.setattr(recording_session, "make_request", make_request)
+    monkeypatch.setattr("bot.utils.telegram_utils.asyncio.sleep", sleep)
+    recording_session.middleware(ApiMetricsMiddleware())
+    bot = Bot("42:TEST", session=recording_session)
+
+    ok_before = TELEGRAM_CALLS.value(method="SendMessage", status="ok")
+    errors_before = TELEGRAM_CALLS.value(method="SendMessage", status="error")
+    timed_before = TELEGRAM_CALL_DURATION.count(method="SendMessage")
+    retries_before = TELEGRAM_RETRIES.value(method="SendMessage")
+
+    await send_with_retry(bot.send_message, 1, "привет", base_delay=30)
+
+    assert sleeps == [30]
+    assert TELEGRAM_CALLS.value(method="SendMessage", status="ok") == ok_before + 1
+    assert TELEGRAM_CALLS.value(method="SendMessage", status="error") == errors_before + 1
+    assert TELEGRAM_CALL_DURATION.count(method="SendMessage") == timed_before + 2
+    # Повтор помечен классом метода, а не именем вызванной функции
+    assert TELEGRAM_RETRIES.value(method="SendMessage") == retries_before + 1
+
+
+def test_stats_gauge_type_is_written_once():
+    """Тест: строка TYPE gauge на имя выводится один раз"""
+    metrics = MetricsRegistry(namespace="test")
+    metrics.add_stats("queue", lambda: {"by_scope": {"a": 1, "b": 2}})
+
+    lines = metrics.render().splitlines()
+
+    assert lines.count("# TYPE test_queue_by_scope gauge") == 1
+    assert 'test_queue_by_scope{key="b"} 2' in lines
+
+
+@pytest.mark.asyncio
+async def test_busy_port_disables_endpoint():
+    """Тест: занятый порт не мешает запуску, сервер просто не поднимается"""
+    runner = await start_metrics_server("127.0.0.1", 0)
+    try:
+        port = runner.addresses[0][1]
+        assert await start_metrics_server("127.0.0.1", port) is None
+    finally:
+        await runner.cleanup()
@@ -0,0 +1,269 @@
+"""Тесты для сервиса напоминаний"""
+import time
+from datetime import datetime, timedelta, timezone
+
+import pytest
+
+from bot.services.reminder_engine import ReminderEngine
+from bot.services.reminder_service import parse_reminder_steps
+from bot.utils.rate_limit import TokenBucket
+from bot.utils.scheduling import QuietHours, deterministic_jitter
+
+
+@pytest.mark.asyncio
+async def test_process_pending_reminders(reminder_service, temp_db):
+    """Тест пакетной обработки просроченных напоминаний"""
+    past = datetime.now() - timedelta(minutes=5)
+    for user_id in (111, 222, 333):
+        await temp_db.create_user(user_id, f"user{user_id}", f"User {user_id}")
+        await temp_db.create_reminder(user_id, "1d", past)
+    
+    # Заявка пользователя 222 уже одобрена — напоминание ему не нужно
+    await temp_db.create_application(222)
+    await temp_db.update_application_status(222, "approved", 999999)
+    
+    sent = await reminder_service.process_pending_reminders()
+    
+    assert sent == 2
+    bot = reminder_service.notification_service.bot
+    recipients = {call.args[0] for call in bot.send_message.call_args_list}
+    assert recipients == {111, 333}
+    
+    # Все напоминания помечены отправленными одним проходом
+    assert await temp_db.get_pending_reminders() == []
+    assert await reminder_service.process_pending_reminders() == 0
+
+
+@pytest.mark.asyncio
+async def test_due_reminders_include_latest_status(temp_db):
+    """Тест выборки напоминаний со статусом последней заявки"""
+    await temp_db.create_user(123456, "test_user", "Test User")
+    await temp_db.create_reminder(123456, "1d", datetime.now() - timedelta(minutes=1))
+    await temp_db.create_reminder(123456, "3d", datetime.now() + timedelta(days=3))
+    await temp_db.create_application(123456)
+    
+    reminders = await temp_db.get_due_reminders_with_status()
+    
+    assert len(reminders) == 1
+    assert reminders[0]["reminder_type"] == "1d"
+    assert reminders[0]["application_status"] == "pending"
+    
+    updated = await temp_db.mark_reminders_sent([reminders[0]["id"]])
+    assert updated == 1
+    assert await temp_db.get_due_reminders_with_status() == []
+
+
+def test_reminder_engine_fires_in_order():
+    """Тест срабатывания напоминаний в колесе таймеров"""
+    engine = ReminderEngine(tick_seconds=1.0, wheel_size=8, clock=lambda: 1000.0)
+    
+    engine.schedule(1, "1d", 1003.0)
+    engine.schedule(2, "1d", 1020.0)  # через несколько оборотов колеса
+    engine.schedule(3, "3d", 900.0)   # просроченное — на ближайшем тике
+    
+    assert len(engine) == 3
+    assert engine.pop_due(1001.0) == [(3, "3d")]
+    assert engine.pop_due(1010.0) == [(1, "1d")]
+    assert engine.pop_due(1019.0) == []
+    assert engine.pop_due(1020.0) == [(2, "1d")]
+    assert len(engine) == 0
+
+
+def test_reminder_engine_cancel_user():
+    """Тест отмены напоминаний пользователя в колесе таймеров"""
+    engine = ReminderEngine(tick_seconds=1.0, wheel_size=8, clock=lambda: 0.0)
+    engine.schedule(1, "1d", 5.0)
+    engine.schedule(2, "1d", 5.0)
+    engine.schedule(1, "3d", 50.0)
+    
+    assert engine.cancel_user(1) == 2
+    assert len(engine) == 1
+    assert engine.pop_due(100.0) == [(2, "1d")]
+
+
+@pytest.mark.asyncio
+async def test_process_due_reminders_uses_template(reminder_service, temp_db):
+    """Тест отправки напоминаний из движка с текстом из шаблона"""
+    await temp_db.create_user(111, "user111", "User 111")
+    await temp_db.create_user(222, "user222", "User 222")
+    await temp_db.create_application(222)
+    await temp_db.update_application_status(222, "approved", 999999)
+    
+    clock = [1000.0]
+    reminder_service.engine = ReminderEngine(clock=lambda: clock[0])
+    reminder_service.engine.schedule(111, "1d", 1001.0)
+    reminder_service.engine.schedule(222, "1d", 1001.0)
+    clock[0] = 1002.0
+    
+    sent = await reminder_service.process_due_reminders()
+    
+    assert sent == 1
+    call_args = reminder_service.notification_service.bot.send_message.call_args
+    assert call_args.args[0] == 111
+    assert call_args.args[1] == await reminder_service.message_service.get_message("reminder_1d")
+
+
+def test_parse_reminder_steps():
+    """Тест разбора шагов цепочки напоминаний"""
+    steps = parse_reminder_steps(["7d", "1d", "12h"])
+    
+    assert [step for step, _ in steps] == ["12h", "1d", "7d"]
+    assert steps[2][1] == timedelta(days=7)
+    
+    with pytest.raises(ValueError):
+        parse_reminder_steps(["1w"])
+
+
+@pytest.mark.asyncio
+async def test_repeated_start_does_not_duplicate_campaign(reminder_service, temp_db):
+    """Тест: повторный /start не создаёт вторую цепочку напоминаний"""
+    reminder_service.steps = parse_reminder_steps(["1d", "3d", "7d"])
+    await temp_db.create_user(333, "user333", "User 333")
+    
+    for _ in range(5):
+        await reminder_service.schedule_reminders(333)
+    
+    assert len(await temp_db.get_reminders_after(0)) == 3
+
+
+@pytest.mark.asyncio
+async def test_reminder_campaign_stops_after_application(reminder_service, temp_db):
+    """Тест цепочки напоминаний, которая прекращается после подачи заявки"""
+    clock = [time.time()]
+    reminder_service.engine = ReminderEngine(clock=lambda: clock[0])
+    reminder_service.steps = parse_reminder_steps(["1d", "3d", "7d"])
+    
+    for user_id in (111, 222):
+        await temp_db.create_user(user_id, f"user{user_id}", f"User {user_id}")
+        await reminder_service.schedule_reminders(user_id)
+    
+    # Напоминания попадают в движок из БД на тике
+    assert await reminder_service.sync_from_db() == 6
+    assert len(reminder_service.engine) == 6
+    
+    bot = reminder_service.notification_service.bot
+    texts = await reminder_service.message_service.get_messages(
+        ["reminder_1d", "reminder_3d"]
+    )
+    
+    clock[0] += timedelta(days=1, minutes=1).total_seconds()
+    assert await reminder_service.process_due_reminders() == 2
+    assert {call.args[1] for call in bot.send_message.call_args_list} == {texts["reminder_1d"]}
+    
+    # Заявка в статусе pending тоже останавливает цепочку
+    await temp_db.create_application(222)
+    bot.send_message.reset_mock()
+    
+    clock[0] += timedelta(days=2).total_seconds()
+    assert await reminder_service.process_due_reminders() == 1
+    assert bot.send_message.call_args.args[:2] == (111, texts["reminder_3d"])
+    
+    # Отправленные и пропущенные напоминания отмечены в БД
+    pending = await temp_db.get_reminders_after(0)
+    assert sorted(reminder["reminder_type"] for reminder in pending) == ["7d", "7d"]
+    
+    # После смены лидера движок загружает из БД только оставшиеся шаги
+    reminder_service.reset()
+    assert await reminder_service.sync_from_db() == 2
+
+
+def test_deterministic_jitter_spreads_users():
+    """Тест детерминированного джиттера в пределах окна"""
+    offsets = [deterministic_jitter(user_id, "1d", 3600) for user_id in range(2000)]
+    
+    assert offsets == [deterministic_jitter(user_id, "1d", 3600) for user_id in range(2000)]
+    assert all(0 <= offset < 3600 for offset in offsets)
+    # Всплеск равномерно распределяется по окну: в каждой четверти есть отправки
+    quarters = {int(offset // 900) for offset in offsets}
+    assert quarters == {0, 1, 2, 3}
+
+
+def test_quiet_hours_shift():
+    """Тест переноса времени из тихих часов через полночь"""
+    tz = timezone(timedelta(hours=3))
+    quiet = QuietHours(22, 9, tz)
+    
+    evening = datetime(2026, 1, 10, 23, 30, tzinfo=tz)
+    night = datetime(2026, 1, 11, 3, 0, tzinfo=tz)
+    day = datetime(2026, 1, 11, 12, 0, tzinfo=tz)
+    
+    assert quiet.shift(evening) == datetime(2026, 1, 11, 9, 0, tzinfo=tz)
+    assert quiet.shift(night, 60) == datetime(2026, 1, 11, 9, 1, tzinfo=tz)
+    assert quiet.shift(day) == day
+    assert QuietHours.parse("", "Europe/Moscow") is None
+
+
+@pytest.mark.asyncio
+async def test_send_rate_defers_excess(reminder_service, temp_db):
+    """Тест ограничения скорости: лишние напоминания уходят на следующие тики"""
+    clock = [1000.0]
+    reminder_service.engine = ReminderEngine(clock=lambda: clock[0])
+    reminder_service.send_bucket = TokenBucket(2, clock=lambda: clock[0])
+    for user_id in range(1, 6):
+        reminder_service.engine.schedule(user_id, "1d", 1000.5)
+    
+    sent = []
+    for _ in range(3):
+        clock[0] += 1
+        sent.append(await reminder_service.process_due_reminders())
+    
+    assert sent == [2, 2, 1]
+    assert len(reminder_service.engine) == 0
+
+
+@pytest.mark.asyncio
+async def test_deferred_step_does_not_unmark_sent_step(reminder_service, temp_db):
+    """Тест: отправленный шаг отмечается, даже если другой шаг того же пользователя отложен"""
+    await temp_db.create_user(111, "user111", "User 111")
+    past = datetime.now() - timedelta(minutes=5)
+    await temp_db.create_reminder(111, "1d", past)
+    await temp_db.create_reminder(111, "3d", past)
+    
+    clock = [time.time()]
+    reminder_service.engine = ReminderEngine(clock=lambda: clock[0])
+    reminder_service.send_bucket = TokenBucket(1, clock=lambda: clock[0])
+    clock[0] += 1
+    
+    assert await reminder_service.process_due_reminders() == 1
+    
+    pending = await temp_db.get_reminders_after(0)
+    assert len(pending) == 1
+    assert len(reminder_service.engine) == 1
+    clock[0] += 1
+    assert await reminder_service.process_due_reminders() == 1
+    assert await temp_db.get_reminders_after(0) == []
+
+
+def test_send_bucket_holds_a_whole_tick(notification_service, temp_db):
+    """Тест: при тике в несколько секунд за тик уходит rate * tick напоминаний"""
+    from unittest.mock import MagicMock
+    from bot.services.reminder_service import ReminderService
+    
+    service = ReminderService(
+        MagicMock(),
+        temp_db,
+        notification_service,
+        engine=ReminderEngine(tick_seconds=5),
+        quiet_hours="",
+        send_rate=10,
+    )
+    
+    assert service.send_bucket.take_up_to(100) == 50
+
+
+@pytest.mark.asyncio
+async def test_overdue_reminders_respect_quiet_hours(reminder_service, temp_db):
+    """Тест: просроченное после простоя напоминание не срабатывает в тихие часы"""
+    tz = timezone(timedelta(hours=3))
+    night = datetime(2026, 1, 11, 3, 0, tzinfo=tz)
+    reminder_service.quiet_hours = QuietHours(22, 9, tz)
+    reminder_service.engine = ReminderEngine(clock=lambda: night.timestamp())
+    await temp_db.create_user(111, "user111", "User 111")
+    await temp_db.create_reminder(
+        111, "1d", (night - timedelta(hours=6)).astimezone().replace(tzinfo=None)
+    )
+    
+    assert await reminder_service.sync_from_db() == 1
+    assert reminder_service.engine.pop_due(night.timestamp() + 60) == []
+    morning = datetime(2026, 1, 11, 9, 0, tzinfo=tz).timestamp()
+    assert reminder_service.engine.pop_due(morning + 1) == [(111, "1d")]
@@ -0,0 +1,92 @@
+"""Тесты для координированной остановки бота"""
+import asyncio
+import os
+import signal
+
+import pytest
+from aiogram import Bot, Dispatcher
+from aiogram.types import Message, Update
+
+from bot.middlewares.concurrency_middleware import ConcurrencyMiddleware
+from bot.utils.shutdown import ShutdownCoordinator
+
+
+def make_update(update_id: int) -> Update:
+    """Сообщение от отдельного пользователя на каждое обновление"""
+    return Update.model_validate({
+        "update_id": update_id,
+        "message": {
+            "message_id": update_id,
+            "date": 0,
+            "chat": {"id": update_id, "type": "private"},
+            "from": {"id": update_id, "is_bot": False, "first_name": "Test"},
+            "text": str(update_id),
+        },
+    })
+
+
+def make_dispatcher(middleware: ConcurrencyMiddleware, finished: list, delay: float):
+    dp = Dispatcher()
+    dp.update.outer_middleware(middleware)
+
+    @dp.message()
+    async def _handler(message: Message):
+        await asyncio.sleep(delay)
+        finished.append(int(message.text))
+
+    return dp
+
+
+@pytest.mark.asyncio
+async def test_sigterm_during_burst_drains_in_flight_updates():
+    """Тест: SIGTERM посреди всплеска — начатые обновления дорабатывают до конца"""
+    finished, phases = [], []
+    middleware = ConcurrencyMiddleware(max_concurrency=4)
+    dp = make_dispatcher(middleware, finished, delay=0.05)
+    bot = Bot("42:TEST")
+
+    coordinator = ShutdownCoordinator(timeout=2)
+    coordinator.install_signal_handlers()
+    coordinator.on_stop(lambda: phases.append("stop"))
+    coordinator.on_drain(middleware.wait_idle)
+    coordinator.on_flush(lambda: phases.append(("flush", len(finished))))
+    coordinator.on_close(lambda: phases.append("close"))
+
+    try:
+        burst = [
+            asyncio.create_task(dp.feed_update(bot, make_update(i)))
+            for i in range(1, 13)
+        ]
+        await asyncio.sleep(0.01)
+        os.kill(os.getpid(), signal.SIGTERM)
+
+        await asyncio.wait_for(coordinator.wait(), timeout=1)
+        assert coordinator.stopping is True
+        # Обработка ещё идёт: лимит 4, всплеск из 12 обновлений
+        assert len(finished) < 12
+
+        assert await coordinator.shutdown() is True
+    finally:
+        coordinator.remove_signal_handlers()
+
+    assert sorted(finished) == list(range(1, 13))
+    # Сброс буферов выполняется только после дренажа всех обновлений
+    assert phases == ["stop", ("flush", 12), "close"]
+    assert all(task.done() for task in burst)
+
+
+@pytest.mark.asyncio
+async def test_shutdown_reports_missed_deadline():
+    """Тест: обработчик дольше дедлайна не задерживает остановку"""
+    finished = []
+    middleware = ConcurrencyMiddleware(max_concurrency=1)
+    dp = make_dispatcher(middleware, finished, delay=1)
+    coordinator = ShutdownCoordinator(timeout=0.05)
+    coordinator.on_drain(middleware.wait_idle)
+
+    task = asyncio.create_task(dp.feed_update(Bot("42:TEST"), make_update(1)))
+    await asyncio.sleep(0.01)
+
+    assert await coordinator.shutdown() is False
+    assert coordinator.timings["drain"] < 0.5
+    task.cancel()
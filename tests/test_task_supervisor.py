@@ -0,0 +1,87 @@
+"""Тесты для фоновых задач под присмотром"""
+import asyncio
+import logging
+
+import pytest
+
+from bot.services.task_supervisor import TaskSupervisor
+
+
+@pytest.mark.asyncio
+async def test_concurrency_is_bounded():
+    """Тест: одновременно выполняется не больше limit задач, остальные ждут"""
+    supervisor = TaskSupervisor(limit=2)
+    release = asyncio.Event()
+    peak = []
+
+    async def _job():
+        peak.append(supervisor.stats["running"])
+        await release.wait()
+
+    for index in range(5):
+        supervisor.spawn(_job(), name=f"job-{index}")
+    await asyncio.sleep(0.01)
+
+    assert supervisor.stats["running"] == 2
+    assert supervisor.stats["queued"] == 3
+
+    release.set()
+    assert await supervisor.drain(timeout=1)
+    assert max(peak) <= 2
+    assert supervisor.stats == {
+        "running": 0, "queued": 0, "completed": 5,
+        "failed": 0, "rejected": 0, "cancelled": 0,
+    }
+
+
+@pytest.mark.asyncio
+async def test_failure_is_logged_with_task_name(caplog):
+    """Тест: ошибка фоновой задачи пишется в лог и считается"""
+    supervisor = TaskSupervisor()
+
+    async def _boom():
+        raise RuntimeError("telegram down")
+
+    with caplog.at_level(logging.ERROR):
+        supervisor.spawn(_boom(), name="notify-admins:application:1")
+        assert await supervisor.drain(timeout=1)
+
+    assert "notify-admins:application:1" in caplog.text
+    assert "telegram down" in caplog.text
+    assert supervisor.stats["failed"] == 1
+
+
+@pytest.mark.asyncio
+async def test_queue_overflow_is_rejected():
+    """Тест: сверх max_queued ожидающих задачи отклоняются"""
+    supervisor = TaskSupervisor(limit=1, max_queued=2)
+    release = asyncio.Event()
+
+    supervisor.spawn(release.wait(), name="running")
+    await asyncio.sleep(0)
+    tasks = [supervisor.spawn(release.wait(), name=f"job-{index}") for index in range(3)]
+
+    assert tasks[1] is not None
+    assert tasks[2] is None
+    assert supervisor.stats["rejected"] == 1
+
+    release.set()
+    assert await supervisor.drain(timeout=1)
+
+
+@pytest.mark.asyncio
+async def test_close_cancels_unfinished_tasks(recwarn):
+    """Тест: при остановке незавершённые задачи отменяются, новые не принимаются"""
+    supervisor = TaskSupervisor(limit=1)
+    supervisor.spawn(asyncio.sleep(10), name="running")
+    supervisor.spawn(asyncio.sleep(10), name="queued")
+    await asyncio.sleep(0.01)
+
+    assert not await supervisor.drain(timeout=0.01)
+    await supervisor.close()
+
+    assert supervisor.stats["cancelled"] == 2
+    assert supervisor.stats["running"] == supervisor.stats["queued"] == 0
+    assert supervisor.spawn(asyncio.sleep(0), name="late") is None
+    # Ожидавшие корутины закрыты, а не брошены
+    assert not [w for w in recwarn if "never awaited" in str(w.message)]
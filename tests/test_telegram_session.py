@@ -0,0 +1,60 @@
+"""Тесты для настроенной сессии Bot API"""
+import asyncio
+
+import pytest
+from aiogram import Bot
+from aiogram.client.telegram import TelegramAPIServer
+from aiogram.exceptions import TelegramNetworkError
+from aiohttp import web
+from aiohttp.test_utils import TestServer
+
+from bot.utils.session import TunedAiohttpSession
+
+
+@pytest.fixture
+async def fake_api():
+    """Фейковый Bot API: getMe отвечает сразу, sendMessage — с задержкой"""
+    async def handle(request: web.Request) -> web.Response:
+        if request.match_info["method"] == "sendMessage":
+            await asyncio.sleep(1)
+        result = {"id": 42, "is_bot": True, "first_name": "Test"}
+        return web.json_response({"ok": True, "result": result})
+
+    app = web.Application()
+    app.router.add_post("/bot{token}/{method}", handle)
+    server = TestServer(app)
+    await server.start_server()
+    yield f"http://{server.host}:{server.port}"
+    await server.close()
+
+
+@pytest.mark.asyncio
+async def test_connections_are_reused(fake_api):
+    """Тест: последовательные запросы идут через одно keep-alive соединение"""
+    session = TunedAiohttpSession(api=TelegramAPIServer.from_base(fake_api))
+    bot = Bot("42:TEST", session=session)
+
+    for _ in range(3):
+        await bot.get_me()
+    await session.close()
+
+    assert session.stats["requests"] == 3
+    assert session.stats["connections_created"] == 1
+    assert session.stats["connections_reused"] == 2
+    assert session.stats["reuse_ratio"] == pytest.approx(2 / 3)
+
+
+@pytest.mark.asyncio
+async def test_method_timeout_is_applied(fake_api):
+    """Тест: таймаут метода срабатывает раньше общего таймаута сессии"""
+    session = TunedAiohttpSession(
+        api=TelegramAPIServer.from_base(fake_api),
+        method_timeouts={"sendMessage": 0.1}
+    )
+    bot = Bot("42:TEST", session=session)
+
+    with pytest.raises(TelegramNetworkError):
+        await asyncio.wait_for(bot.send_message(1, "test"), timeout=0.5)
+    # Для остальных методов действует общий таймаут
+    assert (await bot.get_me()).id == 42
+    await session.close()
@@ -0,0 +1,93 @@
+"""Тесты для утилит отправки сообщений"""
+from datetime import datetime, timezone
+from types import SimpleNamespace
+from unittest.mock import AsyncMock
+
+import pytest
+from aiogram.exceptions import TelegramBadRequest
+from aiogram.methods import EditMessageText
+
+from bot.keyboards.user_keyboards import get_main_menu_keyboard
+from bot.utils.telegram_utils import EditCache, edit_text_with_retry
+
+
+EDITED_AT = datetime(2024, 1, 1, tzinfo=timezone.utc)
+
+
+def make_message(message_id: int = 10, edit_date=None):
+    message = SimpleNamespace(
+        chat=SimpleNamespace(id=1),
+        message_id=message_id,
+        edit_date=edit_date,
+    )
+    message.edit_text = AsyncMock(
+        return_value=SimpleNamespace(chat=message.chat, message_id=message_id, edit_date=EDITED_AT)
+    )
+    return message
+
+
+@pytest.fixture(autouse=True)
+def edit_cache(monkeypatch):
+    cache = EditCache(maxsize=2)
+    monkeypatch.setattr("bot.utils.telegram_utils.edit_cache", cache)
+    return cache
+
+
+@pytest.mark.asyncio
+async def test_repeated_edit_is_skipped(edit_cache):
+    """Тест: повторная правка тем же текстом и клавиатурой не отправляется"""
+    keyboard = get_main_menu_keyboard()
+    await edit_text_with_retry(make_message(), "Меню", reply_markup=keyboard, parse_mode="HTML")
+
+    # Следующее нажатие приходит с сообщением, отредактированным ботом
+    message = make_message(edit_date=EDITED_AT)
+    await edit_text_with_retry(message, "Меню", reply_markup=get_main_menu_keyboard(), parse_mode="HTML")
+    message.edit_text.assert_not_awaited()
+
+    # Другая клавиатура — уже другое содержимое
+    await edit_text_with_retry(
+        message, "Меню", reply_markup=get_main_menu_keyboard(include_admin_panel=True), parse_mode="HTML"
+    )
+    message.edit_text.assert_awaited_once()
+    assert edit_cache.stats == {"edits": 2, "skipped": 1, "not_modified": 0}
+
+
+@pytest.mark.asyncio
+async def test_edit_is_sent_if_message_changed_elsewhere(edit_cache):
+    """Тест: если сообщение изменили в обход кэша, правка отправляется"""
+    await edit_text_with_retry(make_message(), "Меню")
+
+    message = make_message(edit_date=datetime(2024, 1, 2, tzinfo=timezone.utc))
+    await edit_text_with_retry(message, "Меню")
+
+    message.edit_text.assert_awaited_once()
+    assert edit_cache.stats["skipped"] == 0
+
+
+@pytest.mark.asyncio
+async def test_not_modified_error_is_swallowed(edit_cache):
+    """Тест: ответ «message is not modified» не считается ошибкой и запоминается"""
+    message = make_message(edit_date=EDITED_AT)
+    message.edit_text.side_effect = TelegramBadRequest(
+        EditMessageText(text="Меню"),
+        "Bad Request: message is not modified: specified new message content "
+        "and reply markup are exactly the same"
+    )
+
+    assert await edit_text_with_retry(message, "Меню") is message
+    assert await edit_text_with_retry(message, "Меню") is message
+    message.edit_text.assert_awaited_once()
+    assert edit_cache.stats == {"edits": 0, "skipped": 1, "not_modified": 1}
+
+    message.edit_text.side_effect = TelegramBadRequest(EditMessageText(text="x"), "Bad Request: chat not found")
+    with pytest.raises(TelegramBadRequest):
+        await edit_text_with_retry(message, "x")
+
+
+@pytest.mark.asyncio
+async def test_cache_is_bounded(edit_cache):
+    """Тест: кэш не растёт больше maxsize"""
+    for message_id in range(5):
+        await edit_text_with_retry(make_message(message_id), "Меню")
+
+    assert len(edit_cache) == 2
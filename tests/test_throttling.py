@@ -0,0 +1,130 @@
+"""Тесты для ограничения частоты обновлений"""
+import fakeredis
+import pytest
+from aiogram import Bot, Dispatcher
+from aiogram.filters import CommandStart
+from aiogram.types import CallbackQuery, Message, Update
+
+from bot.middlewares.throttling_middleware import ThrottlingMiddleware
+from bot.utils.rate_limit import MemoryBucketStore, RedisBucketStore
+from config.settings import settings
+
+
+def make_message(update_id: int, text: str, user_id: int = 1) -> Update:
+    return Update.model_validate({
+        "update_id": update_id,
+        "message": {
+            "message_id": update_id,
+            "date": 0,
+            "chat": {"id": user_id, "type": "private"},
+            "from": {"id": user_id, "is_bot": False, "first_name": "Test"},
+            "text": text,
+        },
+    })
+
+
+def make_callback(update_id: int, data: str, user_id: int = 1) -> Update:
+    return Update.model_validate({
+        "update_id": update_id,
+        "callback_query": {
+            "id": str(update_id),
+            "from": {"id": user_id, "is_bot": False, "first_name": "Test"},
+            "chat_instance": "x",
+            "data": data,
+        },
+    })
+
+
+def make_dispatcher(middleware: ThrottlingMiddleware, calls: list) -> Dispatcher:
+    dp = Dispatcher()
+    dp.update.outer_middleware(middleware)
+
+    @dp.message(CommandStart())
+    async def _start(message: Message):
+        calls.append(message.text)
+
+    @dp.callback_query()
+    async def _callback(callback: CallbackQuery):
+        calls.append(callback.data)
+
+    return dp
+
+
+@pytest.mark.asyncio
+@pytest.mark.parametrize("use_redis", [False, True])
+async def test_start_spam_is_limited(use_redis, recording_session):
+    """Тест: /start сверх лимита команды отбрасывается молча"""
+    store = RedisBucketStore(fakeredis.FakeAsyncRedis()) if use_redis else MemoryBucketStore()
+    middleware = ThrottlingMiddleware(
+        store, rate=100, burst=100, command_limits={"start": (3, 60)}
+    )
+    calls = []
+    dp = make_dispatcher(middleware, calls)
+    bot = Bot("42:TEST", session=recording_session)
+
+    for update_id in range(1, 6):
+        await dp.feed_update(bot, make_message(update_id, "/start"))
+    # Лимит считается на пользователя
+    await dp.feed_update(bot, make_message(6, "/start", user_id=2))
+
+    assert calls == ["/start"] * 4
+    assert recording_session.methods == []
+    assert middleware.stats == {
+        "passed": 4,
+        "throttled": 2,
+        "throttled_by_scope": {"command:start": 2},
+    }
+
+
+def test_command_is_parsed_with_mention():
+    """Тест: команда с упоминанием бота попадает в ту же корзину"""
+    assert ThrottlingMiddleware._command(make_message(1, "/Start@artlift_bot ref")) == "start"
+    assert ThrottlingMiddleware._command(make_message(1, "привет")) is None
+
+
+@pytest.mark.asyncio
+async def test_throttled_callback_is_answered(recording_session):
+    """Тест: лишнее нажатие кнопки получает ответ, а не зависает"""
+    middleware = ThrottlingMiddleware(MemoryBucketStore(), rate=0.01, burst=2)
+    calls = []
+    dp = make_dispatcher(middleware, calls)
+    bot = Bot("42:TEST", session=recording_session)
+
+    for update_id in range(1, 4):
+        await dp.feed_update(bot, make_callback(update_id, "main_menu"))
+
+    assert calls == ["main_menu", "main_menu"]
+    assert recording_session.methods == ["AnswerCallbackQuery"]
+    assert middleware.stats["throttled_by_scope"] == {"user": 1}
+
+
+@pytest.mark.asyncio
+async def test_admins_are_not_throttled(recording_session, monkeypatch):
+    """Тест: администраторы не ограничиваются"""
+    monkeypatch.setattr(settings, "ADMIN_IDS", [1])
+    middleware = ThrottlingMiddleware(MemoryBucketStore(), rate=0.01, burst=1)
+    calls = []
+    dp = make_dispatcher(middleware, calls)
+    bot = Bot("42:TEST", session=recording_session)
+
+    for update_id in range(1, 4):
+        await dp.feed_update(bot, make_callback(update_id, "admin_panel"))
+
+    assert len(calls) == 3
+    assert middleware.stats["throttled"] == 0
+
+
+@pytest.mark.asyncio
+async def test_memory_bucket_refills_and_is_cleaned_up():
+    """Тест: корзина восполняется со временем, простаивающие удаляются"""
+    now = [0.0]
+    store = MemoryBucketStore(clock=lambda: now[0])
+
+    assert await store.take("1:user", 1, 1)
+    assert not await store.take("1:user", 1, 1)
+    now[0] += 1
+    assert await store.take("1:user", 1, 1)
+
+    now[0] += 10
+    store._cleanup()
+    assert len(store) == 0
@@ -0,0 +1,123 @@
+"""Тесты для контейнера сервисов и общего middleware обновлений"""
+import logging
+
+import pytest
+from aiogram import Bot, Dispatcher, Router
+from aiogram.types import CallbackQuery, Message, Update
+
+from bot.keyboards.callback_data import AdminCallback, admin_cb
+from bot.middlewares.update_context_middleware import UpdateContextMiddleware
+from bot.services.container import ServiceContainer
+from bot.utils.callback_router import CallbackActionTable
+
+
+def make_message(update_id: int, text: str) -> Update:
+    return Update.model_validate({
+        "update_id": update_id,
+        "message": {
+            "message_id": update_id,
+            "date": 0,
+            "chat": {"id": 1, "type": "private"},
+            "from": {"id": 1, "is_bot": False, "first_name": "Test", "username": "tester"},
+            "text": text,
+        },
+    })
+
+
+def make_callback(update_id: int, data: str) -> Update:
+    return Update.model_validate({
+        "update_id": update_id,
+        "callback_query": {
+            "id": str(update_id),
+            "from": {"id": 1, "is_bot": False, "first_name": "Test"},
+            "chat_instance": "x",
+            "data": data,
+        },
+    })
+
+
+def test_factories_are_resolved_once_on_demand():
+    """Тест: сервис-фабрика создаётся при первом обращении и один раз"""
+    created = []
+    services = ServiceContainer()
+    services.register("user_service", lambda: created.append(1) or "users")
+    services.add("message_service", "messages")
+
+    assert created == []
+    assert services.user_service == "users"
+    assert services.get("user_service") == "users"
+    assert created == [1]
+    assert "user_service" in services
+    with pytest.raises(AttributeError):
+        services.question_service
+
+
+@pytest.mark.asyncio
+async def test_services_are_injected_and_updates_timed(recording_session, caplog):
+    """Тест: хендлеры получают сервисы по имени, обновления логируются и замеряются"""
+    services = ServiceContainer()
+    services.add("user_service", "users")
+    services.register("question_service", lambda: "questions")
+    middleware = UpdateContextMiddleware(services)
+    dp = Dispatcher()
+    dp.update.outer_middleware(middleware)
+    dp.message.middleware(middleware.injector)
+    dp.callback_query.middleware(middleware.injector)
+    calls = []
+
+    @dp.message()
+    async def _message(message: Message, user_service, services: ServiceContainer):
+        calls.append((user_service, services.question_service))
+
+    @dp.callback_query()
+    async def _callback(callback: CallbackQuery, question_service):
+        calls.append(question_service)
+
+    bot = Bot("42:TEST", session=recording_session)
+    with caplog.at_level(logging.INFO):
+        await dp.feed_update(bot, make_message(1, "привет"))
+        await dp.feed_update(bot, make_callback(2, "faq"))
+        await dp.feed_update(bot, make_callback(3, "faq"))
+
+    assert calls == [("users", "questions"), "questions", "questions"]
+    assert "Message from user 1 (@tester): привет" in caplog.text
+    assert "Callback from user 1 (@None): faq" in caplog.text
+    stats = middleware.stats
+    assert stats["message"]["count"] == 1
+    assert stats["callback_query"]["count"] == 2
+    assert stats["callback_query"]["max"] >= stats["callback_query"]["avg"] > 0
+
+
+@pytest.mark.asyncio
+async def test_only_handler_services_are_resolved(recording_session):
+    """Тест: в data попадают только сервисы хендлера, фабрики остальных не вызываются"""
+    created = []
+    services = ServiceContainer()
+    services.register("user_service", lambda: created.append("user") or "users")
+    services.register("question_service", lambda: created.append("question") or "questions")
+    middleware = UpdateContextMiddleware(services)
+    dp = Dispatcher()
+    dp.update.outer_middleware(middleware)
+    dp.message.middleware(middleware.injector)
+    dp.callback_query.middleware(middleware.injector)
+    table = CallbackActionTable(AdminCallback)
+    router = Router()
+    table.register(router)
+    dp.include_router(router)
+    seen = []
+
+    @table.action("panel")
+    async def _panel(callback: CallbackQuery, question_service, **data):
+        seen.append((question_service, "user_service" in data))
+
+    @dp.message()
+    async def _message(message: Message, services: ServiceContainer):
+        seen.append(services)
+
+    bot = Bot("42:TEST", session=recording_session)
+    await dp.feed_update(bot, make_message(1, "привет"))
+    assert created == []
+
+    await dp.feed_update(bot, make_callback(2, admin_cb("panel")))
+    assert seen == [services, ("questions", False)]
+    assert created == ["question"]
@@ -0,0 +1,270 @@
+"""Тесты для обработки обновлений через Redis Streams"""
+import asyncio
+
+import fakeredis
+import pytest
+from aiogram import Bot, Dispatcher
+from aiogram.types import Message
+from aiohttp import web
+from aiohttp.test_utils import TestClient, TestServer
+
+from bot.services.update_stream import (
+    StreamRequestHandler,
+    UpdateStreamConsumer,
+    UpdateStreamProducer,
+)
+
+
+PARTITIONS = 4
+
+
+def make_update(update_id: int, user_id: int) -> dict:
+    """Текстовое сообщение пользователя; в тексте — номер обновления"""
+    return {
+        "update_id": update_id,
+        "message": {
+            "message_id": update_id,
+            "date": 0,
+            "chat": {"id": user_id, "type": "private"},
+            "from": {"id": user_id, "is_bot": False, "first_name": "Test"},
+            "text": str(update_id),
+        },
+    }
+
+
+@pytest.fixture
+def redis_server():
+    """Общий in-memory сервер Redis для приёмника и воркеров"""
+    return fakeredis.FakeServer()
+
+
+@pytest.fixture
+def producer(redis_server):
+    return UpdateStreamProducer(
+        fakeredis.FakeAsyncRedis(server=redis_server),
+        prefix="test:updates",
+        partitions=PARTITIONS
+    )
+
+
+@pytest.fixture
+def handled():
+    """Обработанные обновления в порядке вызова хендлера"""
+    return []
+
+
+def make_worker(redis_server, handled, name: str, **kwargs) -> UpdateStreamConsumer:
+    """Создание воркера с диспетчером, записывающим (user_id, update_id)"""
+    dp = Dispatcher()
+
+    @dp.message()
+    async def _handler(message: Message):
+        handled.append((message.from_user.id, int(message.text)))
+
+    return UpdateStreamConsumer(
+        fakeredis.FakeAsyncRedis(server=redis_server),
+        dp,
+        Bot("42:TEST"),
+        prefix="test:updates",
+        partitions=PARTITIONS,
+        block_ms=10,
+        consumer_name=name,
+        **kwargs
+    )
+
+
+async def wait_for_count(handled, count: int):
+    async def _wait():
+        while len(handled) < count:
+            await asyncio.sleep(0.01)
+    await asyncio.wait_for(_wait(), timeout=3)
+
+
+def test_partition_is_stable_per_user(producer):
+    """Тест: сообщения и callback одного пользователя попадают в одну партицию"""
+    callback = {
+        "update_id": 2,
+        "callback_query": {
+            "id": "1",
+            "from": {"id": 7, "is_bot": False, "first_name": "Test"},
+            "chat_instance": "x",
+            "data": "admin_menu",
+        },
+    }
+
+    assert producer.partition_for(make_update(1, 7)) == producer.partition_for(callback)
+
+
+@pytest.mark.asyncio
+async def test_worker_keeps_order_and_acks(redis_server, producer, handled):
+    """Тест: порядок обновлений пользователя сохраняется, записи подтверждаются"""
+    updates = [make_update(i, 100 + i % 3) for i in range(1, 31)]
+    for update in updates:
+        await producer.publish(update)
+
+    worker = make_worker(redis_server, handled, "worker-1")
+    await worker.rebalance()
+    await wait_for_count(handled, len(updates))
+
+    for user_id in (100, 101, 102):
+        user_updates = [update_id for uid, update_id in handled if uid == user_id]
+        assert user_updates == sorted(user_updates)
+
+    redis = fakeredis.FakeAsyncRedis(server=redis_server)
+    for partition in range(PARTITIONS):
+        pending = await redis.xpending(f"test:updates:{partition}", "workers")
+        assert pending["pending"] == 0
+    assert worker.stats["processed"] == len(updates)
+    await worker.stop()
+
+
+@pytest.mark.asyncio
+async def test_reclaims_entries_of_crashed_worker(redis_server, producer, handled):
+    """Тест: записи упавшего воркера обрабатываются раньше новых"""
+    redis = fakeredis.FakeAsyncRedis(server=redis_server)
+    stream = producer.stream_name(producer.partition_for(make_update(1, 5)))
+    await redis.xgroup_create(stream, "workers", id="0", mkstream=True)
+
+    for update_id in (1, 2, 3):
+        await producer.publish(make_update(update_id, 5))
+    # Воркер прочитал записи и упал, не подтвердив их
+    await redis.xreadgroup("workers", "crashed", {stream: ">"}, count=10)
+    await producer.publish(make_update(4, 5))
+
+    worker = make_worker(redis_server, handled, "worker-2", claim_idle_ms=0)
+    await worker.rebalance()
+    await wait_for_count(handled, 4)
+
+    assert handled == [(5, 1), (5, 2), (5, 3), (5, 4)]
+    assert worker.stats["reclaimed"] == 3
+    assert (await redis.xpending(stream, "workers"))["pending"] == 0
+    await worker.stop()
+
+
+@pytest.mark.asyncio
+async def test_partitions_are_shared_fairly(redis_server, handled):
+    """Тест: партиции делятся между живыми воркерами поровну"""
+    first = make_worker(redis_server, handled, "first")
+    second = make_worker(redis_server, handled, "second")
+
+    # Единственный воркер забирает все партиции
+    await first.rebalance()
+    assert first.owned_partitions == list(range(PARTITIONS))
+
+    # Новый воркер отмечается в реестре, старый отдаёт лишнее
+    await second.rebalance()
+    await first.rebalance()
+    await second.rebalance()
+
+    assert len(first.owned_partitions) == PARTITIONS // 2
+    assert len(second.owned_partitions) == PARTITIONS // 2
+    assert not set(first.owned_partitions) & set(second.owned_partitions)
+
+    # После остановки воркера его партиции забирает оставшийся
+    await first.stop()
+    await second.rebalance()
+    assert second.owned_partitions == list(range(PARTITIONS))
+    await second.stop()
+
+
+@pytest.mark.asyncio
+async def test_failed_update_goes_to_dead_letter(redis_server, producer):
+    """Тест: запись с ошибкой хендлера сразу переносится в поток недоставленных"""
+    attempts = []
+    dp = Dispatcher()
+
+    @dp.message()
+    async def _handler(message: Message):
+        attempts.append(int(message.text))
+        if message.text == "1":
+            raise RuntimeError("boom")
+
+    worker = UpdateStreamConsumer(
+        fakeredis.FakeAsyncRedis(server=redis_server),
+        dp,
+        Bot("42:TEST"),
+        prefix="test:updates",
+        partitions=PARTITIONS,
+        block_ms=10,
+        max_attempts=2,
+        consumer_name="worker"
+    )
+    await producer.publish(make_update(1, 3))
+    await producer.publish(make_update(2, 3))
+    await worker.rebalance()
+    await wait_for_count(attempts, 2)
+
+    # Хендлер не вызывается повторно: его побочные эффекты уже произошли
+    assert attempts == [1, 2]
+    redis = fakeredis.FakeAsyncRedis(server=redis_server)
+    dead = await redis.xrange("test:updates:dead")
+    stream = producer.stream_name(producer.partition_for(make_update(1, 3)))
+    assert len(dead) == 1
+    assert dead[0][1][b"stream"] == stream.encode()
+    assert worker.stats["dead_lettered"] == 1
+    await worker.stop()
+
+
+@pytest.mark.asyncio
+async def test_repeatedly_delivered_entry_is_dead_lettered(redis_server, producer, handled):
+    """Тест: запись, на которой воркеры падают, не обрабатывается снова"""
+    redis = fakeredis.FakeAsyncRedis(server=redis_server)
+    stream = producer.stream_name(producer.partition_for(make_update(1, 5)))
+    await redis.xgroup_create(stream, "workers", id="0", mkstream=True)
+    entry_id = await producer.publish(make_update(1, 5))
+    await producer.publish(make_update(2, 5))
+    # Запись 1 уже выдавалась двум воркерам, и оба упали (второй забрал
+    # её после падения первого); запись 2 выдавалась одному
+    await redis.xreadgroup("workers", "crashed", {stream: ">"}, count=10)
+    await redis.hincrby("test:updates:attempts", entry_id, 1)
+
+    worker = make_worker(redis_server, handled, "worker", claim_idle_ms=0, max_attempts=2)
+    await worker.rebalance()
+    await wait_for_count(handled, 1)
+
+    assert handled == [(5, 2)]
+    dead = await redis.xrange("test:updates:dead")
+    assert len(dead) == 1
+    assert (await redis.xpending(stream, "workers"))["pending"] == 0
+    assert await redis.hlen("test:updates:attempts") == 0
+    await worker.stop()
+
+
+@pytest.mark.asyncio
+async def test_drain_does_not_wait_for_entries_of_live_worker(redis_server, producer, handled):
+    """Тест: остановка не ждёт, пока чужие неподтверждённые записи станут простаивать"""
+    redis = fakeredis.FakeAsyncRedis(server=redis_server)
+    stream = producer.stream_name(producer.partition_for(make_update(1, 5)))
+    await redis.xgroup_create(stream, "workers", id="0", mkstream=True)
+    await producer.publish(make_update(1, 5))
+    await redis.xreadgroup("workers", "busy", {stream: ">"}, count=10)
+
+    worker = make_worker(redis_server, handled, "worker", claim_idle_ms=60000)
+    await worker.rebalance()
+    await asyncio.sleep(0.05)
+
+    assert await worker.drain(timeout=2)
+    assert handled == []
+    await worker.stop()
+
+
+@pytest.mark.asyncio
+async def test_receiver_checks_secret_and_publishes(redis_server, producer):
+    """Тест webhook-приёмника: проверка секрета и запись в поток"""
+    app = web.Application()
+    StreamRequestHandler(producer, secret_token="secret").register(app, "/webhook")
+
+    async with TestClient(TestServer(app)) as client:
+        response = await client.post("/webhook", json=make_update(1, 9))
+        assert response.status == 401
+
+        response = await client.post(
+            "/webhook",
+            json=make_update(1, 9),
+            headers={"X-Telegram-Bot-Api-Secret-Token": "secret"}
+        )
+        assert response.status == 200
+
+    redis = fakeredis.FakeAsyncRedis(server=redis_server)
+    stream = producer.stream_name(producer.partition_for(make_update(1, 9)))
+    assert await redis.xlen(stream) == 1